@@ -0,0 +1,53 @@
+import time
+
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from actions.dal.usersDAO import UserDAO
+from actions.dal.contactDAO import ContactDAO
+from actions.util.metrics import DB_POOL_WAIT
+
+
+class AsyncDAO():
+    """ Awaitable wrapper around a sync DAO.
+
+        Every DAO method becomes a coroutine with the same arguments. With an
+        AsyncSession the method runs through `AsyncSession.run_sync`, so the
+        queries are issued by the asyncio driver and the event loop is never
+        blocked. With a plain Session (DB_MODE=sync) the method is pushed to
+        the threadpool instead.
+    """
+    dao_class = None
+
+    def __init__(self, db: AsyncSession | Session):
+        self.db = db
+
+
+    def __getattr__(self, name: str):
+        method = getattr(self.dao_class, name)
+        if not callable(method):
+            raise AttributeError(name)
+
+        async def call(*args, **kwargs):
+            def run(session: Session):
+                # the first call of a transaction checks a connection out of the pool, time the wait
+                if not session.in_transaction():
+                    start = time.perf_counter()
+                    session.connection()
+                    DB_POOL_WAIT.observe(time.perf_counter() - start)
+                return method(self.dao_class(session), *args, **kwargs)
+
+            if isinstance(self.db, AsyncSession):
+                return await self.db.run_sync(run)
+            return await run_in_threadpool(run, self.db)
+
+        return call
+
+
+class AsyncUserDAO(AsyncDAO):
+    dao_class = UserDAO
+
+
+class AsyncContactDAO(AsyncDAO):
+    dao_class = ContactDAO
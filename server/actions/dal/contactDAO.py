@@ -1,14 +1,19 @@
 from datetime import datetime
-from sqlalchemy import and_, exists, not_, or_
+from sqlalchemy import and_, exists, func, insert, not_, or_, select, union_all, update
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import SQLAlchemyError
 
 from schemas.user_schema import UserBase, UserResponse
 from schemas.contact_schema import * 
 from models.contact import Contact 
+from models.contactCounter import ContactCounter, SENDER, RECEIVER
 from models.user import User
 
 from models.enum.status import Status
+from models.enum.action import Action
+from models.enum.contactList import ContactList
+from actions.dal.contactTransitions import TRANSITIONS, Transition
 
 class ContactDAO():
     # initialize ContactDAO with database
@@ -32,6 +37,9 @@ class ContactDAO():
                 last_updated=datetime.now()
             )
             self.db.add(new_contact)
+            deltas = {}
+            self.count_contact(deltas, new_contact, Status.REQUESTED, 1)
+            self.bump_counters(deltas)
             self.db.commit()
 
             # return the contact object
@@ -42,6 +50,52 @@ class ContactDAO():
             raise ValueError(f"Error requesting new contact: {str(e)}")
     
    
+    # insert many contacts at once (bulk import), `rows` are {current_user_id, friend_id, status}
+    # one executemany and one counter upsert per touched counter, in a single transaction
+    # returns the new contacts as mappings of ContactResponse's columns
+    def bulk_create_contacts(self, rows: list[dict]) -> list[dict]:
+        if not rows:
+            return []
+        try:
+            now = datetime.now()
+            # every row carries the same keys, so the whole batch is one statement
+            values = [{"date_added": None, **row, **self.status_values(row["status"], now, row["current_user_id"])} for row in rows]
+            created = self.db.execute(
+                insert(Contact).returning(
+                    Contact.id, Contact.current_user_id, Contact.friend_id, Contact.status,
+                    Contact.date_added, Contact.last_updated,
+                ),
+                values,
+            ).all()
+            deltas = {}
+            for contact in created:
+                self.count_contact(deltas, contact, contact.status, 1)
+            self.bump_counters(deltas)
+            self.db.commit()
+
+            return [contact._asdict() for contact in created]
+        except SQLAlchemyError as e:
+            # handle database errors
+            self.db.rollback()
+            raise ValueError(f"Error importing contacts: {str(e)}")
+
+
+    # the (lower id, higher id) pairs among `pairs` already linked by an active contact, either direction, in one query
+    def get_linked_pairs(self, pairs: list[tuple[int, int]]) -> set[tuple[int, int]]:
+        if not pairs:
+            return set()
+        ids = list({user_id for pair in pairs for user_id in pair})
+        rows = self.db.execute(
+            select(Contact.current_user_id, Contact.friend_id).where(
+                Contact.current_user_id.in_(ids),
+                Contact.friend_id.in_(ids),
+                not_(Contact.status.in_(self.excluded_status)),
+            )
+        )
+        wanted = set(pairs)
+        return {pair for a, b in rows if (pair := (min(a, b), max(a, b))) in wanted}
+
+   
     # update the contact status (e.g. from REQUESTED -> ACCEPTED) 
     def update_contact_status(self, identifier: ContactForm | int, status: Status, user: User | None = None) -> Contact:
         try:
@@ -72,15 +126,11 @@ class ContactDAO():
             if not contact:
                 raise ValueError("Contact not found.")
            
-            # if ACCEPTED, add the time it was ACCEPTED (added) 
-            if status == Status.ACCEPTED:
-                contact.date_added = datetime.now()
-            # if BLOCKED or REMOVED, remove date_added field
-            elif status == Status.BLOCKED or status == Status.REMOVED:
-                contact.date_added = None
-
-            contact.last_updated = datetime.now()
-            contact.status = status
+            deltas = {}
+            self.count_contact(deltas, contact, contact.status, -1)
+            self.count_contact(deltas, contact, status, 1)
+            self.apply_status(contact, status, datetime.now(), user.id if user is not None else None)
+            self.bump_counters(deltas)
             self.db.commit()
 
             # return contact object
@@ -91,54 +141,285 @@ class ContactDAO():
             raise ValueError(f"Error updating contact: {str(e)}")
 
 
+    # apply a contact action (accept, block, ...) following the TRANSITIONS table
+    # ownership, allowed source status and the update happen in a single UPDATE ... RETURNING statement;
+    # it copies the status being left into previous_status, so the counters know which one to decrement
+    # returns the updated contact, or None when the user may not apply the action to the contact
+    def transition_contact(self, user: User, contact_id: int, action: Action) -> Contact | None:
+        transition = TRANSITIONS[action]
+        try:
+            contact = self.db.scalars(self.transition_statement(user, transition, Contact.id == contact_id, datetime.now())).first()
+            if contact is not None:
+                deltas = {}
+                self.count_contact(deltas, contact, contact.previous_status, -1)
+                self.count_contact(deltas, contact, transition.target, 1)
+                self.bump_counters(deltas)
+            self.db.commit()
+
+            return contact
+        except SQLAlchemyError as e:
+            # handle database errors
+            self.db.rollback()
+            raise ValueError(f"Error updating contact: {str(e)}")
+
+
+    # apply several contact actions in one transaction, each contact may appear once
+    # one conditional UPDATE ... RETURNING per distinct action (at most one per TRANSITIONS entry), so the
+    # checks and the updates are atomic like transition_contact, and only the rows that actually changed count
+    # returns the updated contacts by id; contacts the user may not apply their action to are left out
+    def batch_transition_contacts(self, user: User, actions: list[tuple[int, Action]]) -> dict[int, Contact]:
+        by_action: dict[Action, list[int]] = {}
+        for contact_id, action in actions:
+            by_action.setdefault(action, []).append(contact_id)
+
+        try:
+            now = datetime.now()
+            updated = {}
+            deltas = {}
+            for action, contact_ids in by_action.items():
+                transition = TRANSITIONS[action]
+                for contact in self.db.scalars(self.transition_statement(user, transition, Contact.id.in_(contact_ids), now)):
+                    self.count_contact(deltas, contact, contact.previous_status, -1)
+                    self.count_contact(deltas, contact, transition.target, 1)
+                    updated[contact.id] = contact
+            self.bump_counters(deltas)
+            self.db.commit()
+
+            return updated
+        except SQLAlchemyError as e:
+            # handle database errors
+            self.db.rollback()
+            raise ValueError(f"Error updating contacts: {str(e)}")
+
+
+    # UPDATE ... RETURNING moving the contacts matched by `which` along `transition`, when `user` may;
+    # ownership and the allowed source statuses are part of the WHERE clause, and the SET expressions
+    # read the row as it was, so previous_status gets the status being left
+    def transition_statement(self, user: User, transition: Transition, which, now: datetime):
+        if transition.receiver_only:
+            owner = Contact.friend_id == user.id
+        else:
+            owner = or_(Contact.current_user_id == user.id, Contact.friend_id == user.id)
+        if transition.blocker_only:
+            owner = and_(owner, Contact.blocked_by == user.id)
+
+        return (
+            update(Contact)
+            .where(which, owner, Contact.status.in_(transition.sources))
+            .values(previous_status=Contact.status, **self.status_values(transition.target, now, user.id))
+            .returning(Contact)
+            .execution_options(populate_existing=True)
+        )
+
+
+    # column values for moving a contact to `status`, `actor` is the user making the change
+    def status_values(self, status: Status, now: datetime, actor: int | None = None) -> dict:
+        values = {"status": status, "last_updated": now}
+        # only a blocked contact has a blocker, who is the one allowed to unblock it
+        values["blocked_by"] = actor if status == Status.BLOCKED else None
+        # if ACCEPTED, add the time it was ACCEPTED (added) 
+        if status == Status.ACCEPTED:
+            values["date_added"] = now
+        # if BLOCKED or REMOVED, remove date_added field
+        elif status == Status.BLOCKED or status == Status.REMOVED:
+            values["date_added"] = None
+        return values
+
+
+    # set the new status and the timestamps that go with it
+    def apply_status(self, contact: Contact, status: Status, now: datetime, actor: int | None = None) -> None:
+        contact.previous_status = contact.status
+        for column, value in self.status_values(status, now, actor).items():
+            setattr(contact, column, value)
+
+
+    # add `delta` to the counters of both users of the contact for `status`
+    def count_contact(self, deltas: dict, contact: Contact, status: Status, delta: int) -> None:
+        for key in ((contact.current_user_id, SENDER, status), (contact.friend_id, RECEIVER, status)):
+            deltas[key] = deltas.get(key, 0) + delta
+
+
+    # apply counter deltas {(user_id, role, status): delta} in the caller's transaction, one upsert per counter
+    def bump_counters(self, deltas: dict[tuple[int, str, Status], int]) -> None:
+        # sorted, so concurrent transactions lock the counter rows in the same order
+        rows = [{"user_id": u, "role": r, "status": s, "count": d} for (u, r, s), d in sorted(deltas.items()) if d]
+        if not rows:
+            return
+
+        dialect = self.db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            stmt = (postgresql.insert if dialect == "postgresql" else sqlite.insert)(ContactCounter)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ContactCounter.user_id, ContactCounter.role, ContactCounter.status],
+                set_={"count": ContactCounter.count + stmt.excluded.count},
+            )
+            self.db.execute(stmt, rows)
+            return
+
+        # other databases: update the counter, create it when missing
+        for row in rows:
+            result = self.db.execute(
+                update(ContactCounter)
+                .where(ContactCounter.user_id == row["user_id"], ContactCounter.role == row["role"], ContactCounter.status == row["status"])
+                .values(count=ContactCounter.count + row["count"])
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 0:
+                self.db.execute(ContactCounter.__table__.insert().values(**row))
+
+
+    # the current user's contact counters: {(role, status): count}
+    def get_counters(self, user: User) -> dict[tuple[str, Status], int]:
+        rows = self.db.execute(
+            select(ContactCounter.role, ContactCounter.status, ContactCounter.count)
+            .where(ContactCounter.user_id == user.id)
+        )
+        return {(row.role, row.status): row.count for row in rows}
+
+
+    # (current_user_id, friend_id) of every ACCEPTED contact, streamed in batches (builds the social graph)
+    def iter_accepted_edges(self, batch_size: int = 100000):
+        rows = self.db.execute(
+            select(Contact.current_user_id, Contact.friend_id)
+            .where(Contact.status == Status.ACCEPTED)
+            .execution_options(yield_per=batch_size)
+        )
+        for row in rows:
+            yield row.current_user_id, row.friend_id
+
+
+    # ids among `user_ids` that already have a contact with the current user, whatever its status
+    def get_related_user_ids(self, user: User, user_ids: list[int]) -> set[int]:
+        if not user_ids:
+            return set()
+        # one branch per side so each can use its index
+        query = union_all(
+            select(Contact.friend_id.label("other_id")).where(Contact.current_user_id == user.id, Contact.friend_id.in_(user_ids)),
+            select(Contact.current_user_id.label("other_id")).where(Contact.friend_id == user.id, Contact.current_user_id.in_(user_ids)),
+        )
+        return set(self.db.execute(query).scalars())
+
+
+    # every contact in id order, to be streamed (see actions.util.exporter)
+    @staticmethod
+    def export_query():
+        return select(
+            Contact.id, Contact.current_user_id, Contact.friend_id, Contact.status,
+            Contact.date_added, Contact.last_updated,
+        ).order_by(Contact.id)
+
+
     # get all of the current user's contacts, regardless of status
-    def get_all_contacts(self, user: User) -> list[Contact]:
-        return self.db.query(Contact).filter(
+    def get_all_contacts(self, user: User, after_id: int | None = None, limit: int | None = None) -> list[Contact]:
+        query = self.db.query(Contact).filter(
             Contact.current_user_id == user.id
-        ).all()
+        )
+        return self.keyset(query, after_id, limit).all()
 
-    # TODO: temp sol'n 
-    # get contacts by status
-    def get_contacts(self, user: User, status: Status):
-        data = (self.db.query(Contact)
-                    .join(User, or_(Contact.current_user_id == User.id, Contact.friend_id == User.id))
-                    .filter(
-                        and_ (
-                            or_ (
-                                Contact.current_user_id == User.id, 
-                                Contact.friend_id == User.id 
-                            ),
-                            Contact.status == status,
-                        )
-                    )
-                    .options(
-                        joinedload(Contact.user_1).defer(User.password),
-                        joinedload(Contact.user_2).defer(User.password),
-                             )
-                    .all()
+
+    # restrict a contact query to one keyset page: contacts with an id greater than `after_id`, in id order
+    def keyset(self, query, after_id: int | None, limit: int | None):
+        if after_id is not None:
+            query = query.filter(Contact.id > after_id)
+        return query.order_by(Contact.id).limit(limit)
+
+    # get the current user's contacts with the given status, together with the other user of each contact
+    def get_contacts(self, user: User, status: Status, after_id: int | None = None, limit: int | None = None) -> list[dict]:
+        # one branch per side of the contact so each branch can use its (user, status) index,
+        # and the join already picks the "other user", so only that user's columns are fetched
+        def side(own_column, other_column):
+            return (self.contact_with_user_columns(other_column)
+                    .where(own_column == user.id, Contact.status == status)
+                    .where(Contact.id > (after_id or 0))
+                    .order_by(Contact.id)
+                    .limit(limit)
                 )
-        result = []
-        for contact in data:
-            # determine which user is not the current user and assign as the 'other user'
-            if contact.current_user_id == user.id:
-                contact.other_user = contact.user_2
-            else:
-                contact.other_user = contact.user_1
-
-            # add the contact j
-            result.append(contact)
-        
-        return result
+
+        # each branch is limited on its own, the outer query merges and limits again
+        query = union_all(
+            side(Contact.current_user_id, Contact.friend_id).subquery().select(),
+            side(Contact.friend_id, Contact.current_user_id).subquery().select(),
+        )
+        rows = self.db.execute(query.order_by(query.selected_columns.id).limit(limit))
+        return [self.contact_row(row, "other_user") for row in rows]
+
+
+    # columns of a contact together with the public columns of one of its users (no ORM objects)
+    def contact_with_user_columns(self, user_column):
+        return (select(
+                    Contact.id, Contact.current_user_id, Contact.friend_id, Contact.status,
+                    Contact.date_added, Contact.last_updated,
+                    User.id.label("other_id"), User.name, User.username, User.email,
+                )
+                .join(User, User.id == user_column)
+            )
+
+
+    # a row of `contact_with_user_columns` as the response mapping, the user nested under `user_key`
+    def contact_row(self, row, user_key: str) -> dict:
+        return {
+            "id": row.id,
+            "current_user_id": row.current_user_id,
+            "friend_id": row.friend_id,
+            "status": row.status,
+            "date_added": row.date_added,
+            "last_updated": row.last_updated,
+            user_key: {"id": row.other_id, "name": row.name, "username": row.username, "email": row.email},
+        }
+
+
+    # REQUESTED contacts sent by the current user, as mappings with the receiver under "user_2"
+    def get_requests_sent_rows(self, user: User, after_id: int | None = None, limit: int | None = None) -> list[dict]:
+        query = (self.contact_with_user_columns(Contact.friend_id)
+                    .where(Contact.current_user_id == user.id, Contact.status == Status.REQUESTED, Contact.id > (after_id or 0))
+                    .order_by(Contact.id)
+                    .limit(limit)
+                )
+        return [self.contact_row(row, "user_2") for row in self.db.execute(query)]
+
+
+    # REQUESTED contacts sent to the current user, as mappings with the sender under "user_1"
+    def get_requests_to_me_rows(self, user: User, after_id: int | None = None, limit: int | None = None) -> list[dict]:
+        query = (self.contact_with_user_columns(Contact.current_user_id)
+                    .where(Contact.friend_id == user.id, Contact.status == Status.REQUESTED, Contact.id > (after_id or 0))
+                    .order_by(Contact.id)
+                    .limit(limit)
+                )
+        return [self.contact_row(row, "user_1") for row in self.db.execute(query)]
    
+    # filters of each side of a contact list, one entry per (user, status) index the list is read from
+    def list_sides(self, user: User, contact_list: ContactList) -> list[tuple]:
+        if contact_list == ContactList.MY_CONTACTS:
+            return [
+                (Contact.current_user_id == user.id, Contact.status == Status.ACCEPTED),
+                (Contact.friend_id == user.id, Contact.status == Status.ACCEPTED),
+            ]
+        if contact_list == ContactList.REQUESTS_TO_ME:
+            return [(Contact.friend_id == user.id, Contact.status == Status.REQUESTED)]
+        return [(Contact.current_user_id == user.id, Contact.status == Status.REQUESTED)]
+
+
+    # version of a contact list: (latest last_updated, number of contacts)
+    # every change that adds, removes or updates a contact in the list changes it,
+    # and it is computed from the list's indexes without loading any row
+    def get_list_version(self, user: User, contact_list: ContactList) -> tuple[datetime | None, int]:
+        sides = [
+            select(func.max(Contact.last_updated).label("last_updated"), func.count().label("total")).where(*filters)
+            for filters in self.list_sides(user, contact_list)
+        ]
+        rows = self.db.execute(sides[0] if len(sides) == 1 else union_all(*sides)).all()
+        return max((row.last_updated for row in rows if row.last_updated is not None), default=None), sum(row.total for row in rows)
+
+
     # get all the request sent by the current user 
-    def get_requests_sent(self, user: User):
-        return (self.db.query(Contact)
+    def get_requests_sent(self, user: User, after_id: int | None = None, limit: int | None = None):
+        query = (self.db.query(Contact)
                     .filter(Contact.current_user_id == user.id, Contact.status == Status.REQUESTED)
                     .options(
                         joinedload(Contact.user_2).defer(User.password)
                     )
-                    .all()
                 )
+        return self.keyset(query, after_id, limit).all()
         
 
     # get contact via search criteria (contact id, or contact username) 
@@ -158,16 +439,16 @@ class ContactDAO():
             # return self.db.query(Contact).filter(Contact.username == criteria.username).first()
 
 
-    def get_contact_requests_to_me(self, user: User):
-        return (self.db.query(Contact)
+    def get_contact_requests_to_me(self, user: User, after_id: int | None = None, limit: int | None = None):
+        query = (self.db.query(Contact)
                     .join(User, Contact.friend_id == User.id)   # Join on the friend user (receiver of the request)
                     .filter(
                         Contact.friend_id == user.id,           # Exclude self-contacts (if applicable)
                         Contact.status == Status.REQUESTED      # Filter by Requested status
                     )
                     .options(joinedload(Contact.user_1))     # Load the user details of the foreign user
-                    .all()
                 )
+        return self.keyset(query, after_id, limit).all()
        
         
     # check if contact exists 
@@ -189,7 +470,7 @@ class ContactDAO():
         ).scalar()
 
     def contact_exists_by_id(self, user: User, contact_id: int) -> bool:
-        res = self.db.query(
+        return self.db.query(
             exists().where(
                 and_(
                     or_(
@@ -200,6 +481,4 @@ class ContactDAO():
                     not_(Contact.status.in_(self.excluded_status))
                 )
             )
-        ).scalar()
-        print(res, contact_id, user)
-        return res
\ No newline at end of file
+        ).scalar()
\ No newline at end of file
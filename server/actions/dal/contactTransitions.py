@@ -0,0 +1,21 @@
+from typing import NamedTuple
+
+from models.enum.action import Action
+from models.enum.status import Status
+
+
+class Transition(NamedTuple):
+    target: Status                  # status the contact moves to
+    sources: frozenset[Status]      # statuses the contact may be in beforehand
+    receiver_only: bool             # only the user the request was sent to (friend_id) may act
+    blocker_only: bool = False      # only the user who blocked the contact (blocked_by) may act
+
+
+# declarative state machine of a contact, enforced by ContactDAO.transition_statement
+TRANSITIONS: dict[Action, Transition] = {
+    Action.ACCEPT: Transition(Status.ACCEPTED, frozenset({Status.REQUESTED}), receiver_only=True),
+    Action.REJECT: Transition(Status.REJECTED, frozenset({Status.REQUESTED}), receiver_only=True),
+    Action.BLOCK: Transition(Status.BLOCKED, frozenset({Status.REQUESTED, Status.ACCEPTED}), receiver_only=False),
+    Action.UNBLOCK: Transition(Status.PENDING, frozenset({Status.BLOCKED}), receiver_only=False, blocker_only=True),
+    Action.REMOVE: Transition(Status.REMOVED, frozenset({Status.REQUESTED, Status.ACCEPTED}), receiver_only=False),
+}
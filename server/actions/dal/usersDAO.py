@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import or_, func, insert, literal, select, text
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
 
 from schemas.user_schema import UserCreate, UserLogin
 from models.user import User
@@ -13,19 +14,73 @@ class UserDAO():
 
 
     # create and add new user to database
-    def create_user(self, user: UserCreate) -> User:
+    # pass the bcrypt hash when it was already computed off the event loop
+    def create_user(self, user: UserCreate, hashed_password: str | None = None) -> User:
         new_user = User(name=user.name, email=user.email, username=user.username)
-        new_user.set_password(user.password)
+        if hashed_password is None:
+            new_user.set_password(user.password)
+        else:
+            new_user.password = hashed_password
         self.db.add(new_user)
         self.db.commit()
 
         # return the user or None
         return new_user 
 
+
+    # insert many users at once (bulk import), `rows` are {name, username, email, password} with the bcrypt hash
+    # one executemany, sent as batched multi-row INSERTs, and one commit; mapper events do not fire for it
+    # returns the (id, name, username, email) of the new users
+    def bulk_create_users(self, rows: list[dict]) -> list[tuple]:
+        if not rows:
+            return []
+        try:
+            created = self.db.execute(insert(User).returning(User.id, User.name, User.username, User.email), rows).all()
+            self.db.commit()
+            return created
+        except SQLAlchemyError as e:
+            # handle database errors (e.g. a username taken since the batch was checked)
+            self.db.rollback()
+            raise ValueError(f"Error importing users: {str(e)}")
+
+
+    # the usernames and emails among the given ones that are already taken, in one query
+    def get_taken_usernames_and_emails(self, usernames: list[str], emails: list[str]) -> tuple[set[str], set[str]]:
+        if not usernames and not emails:
+            return set(), set()
+        rows = self.db.execute(
+            select(User.username, User.email).where(or_(User.username.in_(usernames), User.email.in_(emails)))
+        ).all()
+        return {row.username for row in rows}, {row.email for row in rows}
+
+
+    # ids of the given usernames that exist, in one query
+    def get_ids_by_usernames(self, usernames: list[str]) -> dict[str, int]:
+        if not usernames:
+            return {}
+        return dict(self.db.execute(select(User.username, User.id).where(User.username.in_(usernames))).all())
+
   
-    # get all the users in the database
-    def get_all_users(self) -> list[User]:
-        return self.db.query(User).all()
+    # get the users in the database ordered by id, optionally one keyset page (ids after `after_id`)
+    def get_all_users(self, after_id: int | None = None, limit: int | None = None) -> list[User]:
+        query = self.db.query(User)
+        if after_id is not None:
+            query = query.filter(User.id > after_id)
+        return query.order_by(User.id).limit(limit).all()
+
+
+    # same page as get_all_users, as plain mappings of the public columns (no ORM objects)
+    def get_all_user_rows(self, after_id: int | None = None, limit: int | None = None) -> list[dict]:
+        query = select(User.id, User.name, User.username, User.email)
+        if after_id is not None:
+            query = query.where(User.id > after_id)
+        return [row._asdict() for row in self.db.execute(query.order_by(User.id).limit(limit))]
+
+
+    # every user's public columns in id order, to be streamed (see actions.util.exporter)
+    @staticmethod
+    def export_query():
+        return select(User.id, User.name, User.username, User.email).order_by(User.id)
 
 
     # get the user with UserCreate schema
@@ -62,5 +117,46 @@ class UserDAO():
     def get_user(self, user: UserLogin) -> User:
         current_user = self.db.query(User).filter(User.username == user.username, User.email == user.email).first()
         return current_user
- 
-   
\ No newline at end of file
+
+
+    # (id, name, username, email) of the given users, in no particular order
+    def get_users_by_ids(self, ids: list[int]) -> list[tuple]:
+        if not ids:
+            return []
+        return self.db.query(User.id, User.name, User.username, User.email).filter(User.id.in_(ids)).all()
+
+
+    # (id, name, username, email) of every user, used to build the in-memory search index
+    def get_search_rows(self) -> list[tuple]:
+        return self.db.query(User.id, User.name, User.username, User.email).order_by(User.id).all()
+
+
+    # ranked prefix/trigram search backed by the pg_trgm indexes (PostgreSQL only)
+    def search_users(self, query: str, limit: int, budget_ms: int) -> list[tuple]:
+        q = query.strip().lower()
+        username, name = func.lower(User.username), func.lower(User.name)
+        prefix = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        is_prefix = or_(username.like(prefix), name.like(prefix))
+
+        # give up on the search rather than hold the connection past the latency budget,
+        # then put back the timeout the transaction had (configured, per role or per database)
+        try:
+            previous = self.db.execute(text("SHOW statement_timeout")).scalar()
+            self.db.execute(text("SELECT set_config('statement_timeout', :timeout, true)"), {"timeout": str(int(budget_ms))})
+            rows = (self.db.query(User.id, User.name, User.username, User.email)
+                        .filter(or_(is_prefix, username.op("%")(q), name.op("%")(q)))
+                        .order_by(
+                            (username == q).desc(),
+                            is_prefix.desc(),
+                            func.greatest(func.similarity(username, literal(q)), func.similarity(name, literal(q))).desc(),
+                            User.id,
+                        )
+                        .limit(limit)
+                        .all()
+                    )
+            self.db.execute(text("SELECT set_config('statement_timeout', :timeout, true)"), {"timeout": previous})
+            return rows
+        except OperationalError:
+            # statement timeout, the transaction is aborted
+            self.db.rollback()
+            return []
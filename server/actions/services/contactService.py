@@ -1,14 +1,21 @@
 from fastapi import HTTPException
 from schemas.contact_schema import *
-from actions.dal.contactDAO import ContactDAO
-from actions.dal.usersDAO import UserDAO
+from actions.dal.asyncDAO import AsyncContactDAO, AsyncUserDAO
 from models.contact import Contact
 from models.user import User
 from models.enum.status import Status
+from models.enum.action import Action
+from models.enum.contactList import ContactList
+from models.contactCounter import SENDER, RECEIVER
+from actions.util.pagination import PageParams
+from actions.util.etag import make_etag
+from actions.util.eventBus import event_bus
+from actions.util.socialGraph import build_from_database, social_graph
+from schemas.user_schema import UserResponse
 
 
 class ContactService():
-    def __init__(self, dao: ContactDAO, user_dao: UserDAO):
+    def __init__(self, dao: AsyncContactDAO, user_dao: AsyncUserDAO):
         self.dao = dao
         self.user_dao = user_dao
 
@@ -19,51 +26,148 @@ class ContactService():
         await self.contact_exists(contact)    # check if the contact already exists
         await self.does_user_exists(contact)        # check if the user to be added as contact, exists
         # add/create the new contact between the current user, and the recipient
-        return self.dao.create_contact(contact)
+        new_contact = await self.dao.create_contact(contact)
+        await self.publish("requested", new_contact)
+        return new_contact
 
 
     async def remove_contact(self, user: User, id: int) -> ContactResponse:
-        await self.contact_exists_by_id(user, id)
-        return self.dao.update_contact_status(id, Status.REMOVED, user)
+        return await self.transition(user, id, Action.REMOVE)
 
    
     async def block_contact(self, user: User, id: int) -> ContactResponse:
-        await self.contact_exists_by_id(user, id)
-        return self.dao.update_contact_status(id, Status.BLOCKED, user)
+        return await self.transition(user, id, Action.BLOCK)
 
 
     async def accept_contact(self, user: User, id: int) -> ContactResponse:
-        await self.contact_exists_by_id(user, id)
-        return self.dao.update_contact_status(id, Status.ACCEPTED, user)
+        return await self.transition(user, id, Action.ACCEPT)
 
     
     async def reject_contact(self, user: User, id: int) -> ContactResponse:
-        await self.contact_exists_by_id(user, id)
-        return self.dao.update_contact_status(id, Status.REJECTED, user)
+        return await self.transition(user, id, Action.REJECT)
 
 
     async def unblock_contact(self, user: User, id: int) -> ContactResponse:
-        await self.contact_exists_by_id(user, id)
-        return self.dao.update_contact_status(id, Status.PENDING, user)
+        return await self.transition(user, id, Action.UNBLOCK)
     
 
-    async def get_all_contacts(self, user: User) -> list[ContactResponse]:
-        return self.dao.get_all_contacts(user)
+    async def transition(self, user: User, id: int, action: Action) -> ContactResponse:
+        # ownership, allowed status and update are one statement (see TRANSITIONS)
+        contact = await self.dao.transition_contact(user, id, action)
+        if contact is None:
+            raise HTTPException(status_code=400, detail="Contact does not exist.")
+        await self.publish(action.value, contact)
+        return contact
+
+
+    async def publish(self, event_type: str, contact: Contact) -> None:
+        # both parties of the contact are notified, on every open stream; the status
+        # left tells the social graph whether an ACCEPTED row came or went
+        await event_bus.publish(
+            [contact.current_user_id, contact.friend_id],
+            {
+                "type": event_type,
+                "contact": ContactResponse.model_validate(contact).model_dump(mode="json"),
+                "previous_status": contact.previous_status.value if contact.previous_status else None,
+            },
+        )
+
+
+    async def batch_update_contacts(self, user: User, batch: ContactBatchRequest) -> ContactBatchResponse:
+        # one query and one commit for the whole batch, each contact may appear once
+        seen = set()
+        actions = []
+        for item in batch.items:
+            if item.contact_id not in seen:
+                seen.add(item.contact_id)
+                actions.append((item.contact_id, item.action))
+
+        contacts = await self.dao.batch_transition_contacts(user, actions)
+        for contact_id, action in actions:
+            if contact_id in contacts:
+                await self.publish(action.value, contacts[contact_id])
+
+        results = []
+        seen.clear()
+        for item in batch.items:
+            if item.contact_id in seen:
+                results.append(ContactBatchResult(contact_id=item.contact_id, action=item.action, ok=False, detail="Duplicate contact in batch."))
+            elif item.contact_id not in contacts:
+                results.append(ContactBatchResult(contact_id=item.contact_id, action=item.action, ok=False, detail="Contact does not exist."))
+            else:
+                results.append(ContactBatchResult(contact_id=item.contact_id, action=item.action, ok=True, status=contacts[item.contact_id].status))
+            seen.add(item.contact_id)
+
+        return ContactBatchResponse(results=results)
+
+
+    async def get_all_contacts(self, user: User, page: PageParams) -> tuple[list[ContactResponse], str | None]:
+        contacts = await self.dao.get_all_contacts(user, page.after_id, page.fetch_size)
+        return page.split(contacts)
     
     
-    async def get_contact_requests_to_me(self, user: User):
-        return self.dao.get_contact_requests_to_me(user)
+    async def get_contact_requests_to_me(self, user: User, page: PageParams) -> tuple[list[dict], str | None]:
+        requests = await self.dao.get_requests_to_me_rows(user, page.after_id, page.fetch_size)
+        return page.split(requests, key=lambda c: c["id"])
     
-    async def get_blocked_contacts(self, user: User):
-        return self.dao.get_contacts(user, Status.BLOCKED)
+    async def get_blocked_contacts(self, user: User, page: PageParams) -> tuple[list[ContactWithUserResponse], str | None]:
+        contacts = await self.dao.get_contacts(user, Status.BLOCKED, page.after_id, page.fetch_size)
+        return page.split(contacts, key=lambda c: c["id"])
+
+
+    async def get_my_contacts(self, user: User, page: PageParams) -> tuple[list[ContactWithUserResponse], str | None]:
+        contacts = await self.dao.get_contacts(user, Status.ACCEPTED, page.after_id, page.fetch_size)
+        return page.split(contacts, key=lambda c: c["id"])
+
+
+    async def get_requests_sent(self, user: User, page: PageParams) -> tuple[list[dict], str | None]:
+        requests = await self.dao.get_requests_sent_rows(user, page.after_id, page.fetch_size)
+        return page.split(requests, key=lambda c: c["id"])
+
+
+    async def get_summary(self, user: User) -> ContactSummary:
+        # read from the counters kept by the DAO, never from the contacts themselves
+        counters = await self.dao.get_counters(user)
+        statuses = {status: counters.get((SENDER, status), 0) + counters.get((RECEIVER, status), 0) for status in Status}
+        return ContactSummary(
+            requests_to_me=counters.get((RECEIVER, Status.REQUESTED), 0),
+            requests_sent=counters.get((SENDER, Status.REQUESTED), 0),
+            contacts=statuses[Status.ACCEPTED],
+            blocked=statuses[Status.BLOCKED],
+            statuses=statuses,
+        )
+
+
+    async def get_mutual_contacts(self, user: User, other_id: int, limit: int) -> MutualContactsResponse:
+        # answered by the in-memory graph, the database only supplies the user details
+        await social_graph.ensure_loaded(build_from_database)
+        mutual = social_graph.mutual(user.id, other_id)
+        return MutualContactsResponse(count=len(mutual), users=await self.users_by_ids(mutual[:limit]))
+
+
+    async def get_suggestions(self, user: User, limit: int) -> list[ContactSuggestion]:
+        await social_graph.ensure_loaded(build_from_database)
+        # extra candidates make up for the ones dropped below
+        candidates = social_graph.suggestions(user.id, limit * 2)
+        # pending requests, blocks, ... are not edges of the graph, skip anyone the user already has a contact with
+        related = await self.dao.get_related_user_ids(user, [user_id for user_id, _ in candidates])
+        candidates = [(user_id, count) for user_id, count in candidates if user_id not in related][:limit]
+
+        users = {u.id: u for u in await self.users_by_ids([user_id for user_id, _ in candidates])}
+        return [ContactSuggestion(user=users[user_id], mutual_count=count) for user_id, count in candidates if user_id in users]
 
 
-    async def get_my_contacts(self, user: User):
-        return self.dao.get_contacts(user, Status.ACCEPTED)
+    async def users_by_ids(self, ids: list[int]) -> list[UserResponse]:
+        # one query, results in the order of `ids`
+        rows = {row[0]: row for row in await self.user_dao.get_users_by_ids(ids)}
+        return [UserResponse(id=id, name=name, username=username, email=email)
+                for id, name, username, email in (rows[i] for i in ids if i in rows)]
 
 
-    async def get_requests_sent(self, user: User):
-        return self.dao.get_requests_sent(user)
+    async def get_list_etag(self, user: User, contact_list: ContactList, page: PageParams) -> str:
+        # the page is part of the tag, each page of a list is revalidated on its own
+        last_updated, total = await self.dao.get_list_version(user, contact_list)
+        return make_etag(contact_list.value, user.id, page.after_id, page.limit, last_updated, total)
 
 
     async def search_contact(self, contact_criteria: ContactSearch) -> ContactResponse:
@@ -73,7 +177,7 @@ class ContactService():
         if contact_criteria.id is None and contact_criteria.user_id is None and contact_criteria.username is None:
             raise HTTPException(status_code=400, detail="No search criteria present.")
 
-        contact = self.dao.search_contact(contact_criteria)
+        contact = await self.dao.search_contact(contact_criteria)
         if contact is None:
             raise HTTPException(status_code=400, detail="Contact does not exist.")
         
@@ -81,17 +185,16 @@ class ContactService():
 
 
     async def does_user_exists(self, c: ContactForm) -> None:
-        if self.user_dao.get_user_by_id(c.friend_id) is None:
+        if await self.user_dao.get_user_by_id(c.friend_id) is None:
             raise HTTPException(status_code=400, detail="User does not exists.")
 
 
     async def contact_exists_by_id(self, user: User, contact_id: int) -> None:
-        if not self.dao.contact_exists_by_id(user, contact_id):
+        if not await self.dao.contact_exists_by_id(user, contact_id):
             raise HTTPException(status_code=400, detail="Contact does not exist.")    
     
     async def contact_exists(self, c: ContactResponse) -> None:
-        print(self.dao.contact_exists(c))
-        if self.dao.contact_exists(c):
+        if await self.dao.contact_exists(c):
              raise HTTPException(status_code=400, detail="User is already in your contact list.")
 
 
@@ -1,19 +1,26 @@
+import time
 from datetime import timedelta
 from typing import Tuple
+import jwt
 from fastapi import HTTPException
 from schemas.user_schema import UserCreate, UserLogin, UserBase, UserResponse
-from actions.dal.usersDAO import UserDAO
+from actions.dal.asyncDAO import AsyncUserDAO
 from models.user import User
-from actions.util.jwtHelper import ACCESS_TOKEN_EXPIRE_MIN, JwtHelper
+from actions.util.jwtHelper import ACCESS_TOKEN_EXPIRE_MIN, REFRESH_KEY, ALGORITHM, JwtHelper
+from actions.util.sessionStore import SessionReuseError, session_store
+from actions.util.tokenCache import token_cache
+from actions.util.passwordHasher import password_hasher
+from actions.util.pagination import PageParams
+from actions.util.userSearch import SEARCH_BACKEND, SEARCH_BUDGET_MS, user_search_index
 from schemas.token_schema import TokenData
 
 class UserServices():
-    def __init__(self, dao: UserDAO):
-        """ Initialize UserServices with an instance of UserDAO
-            UserDAO is responsible for data access layer got db interactions
+    def __init__(self, dao: AsyncUserDAO):
+        """ Initialize UserServices with an instance of AsyncUserDAO
+            AsyncUserDAO is responsible for data access layer got db interactions
 
         Args:
-            dao (UserDAO): Data access layer for User
+            dao (AsyncUserDAO): Data access layer for User
         """
         
         self.dao = dao
@@ -29,6 +36,7 @@ class UserServices():
 
         Raises:
             HTTPException: If a user already has the same email or username.
+            HTTPException: The password hashing pool is saturated (503).
 
         Returns:
             User: The created user object. 
@@ -40,8 +48,9 @@ class UserServices():
         if await self.check_user_exists(user):
             raise HTTPException(status_code=400, detail="Email and(or) username already registered.")
 
-        # create and return the new user
-        return self.dao.create_user(user) 
+        # hash on the worker pool, then create and return the new user
+        hashed_password = await password_hasher.hash_password(user.password)
+        return await self.dao.create_user(user, hashed_password) 
 
 
     async def login_user(self, user: UserLogin) -> Tuple[str, str, User]:
@@ -57,7 +66,9 @@ class UserServices():
         Raises:
             HTTPException: User does not exists based on login data.
             HTTPException: Password is not correct.
+            HTTPException: The password hashing pool is saturated (503).
             HTTPException: Error logging user at current moment. 
+            redis.RedisError: The session store is unavailable (answered with a 503, see routers.middleware.errors).
 
         Returns:
             Tuple[str, str, User]: Tuple with both tokens & the newly logged in user. 
@@ -67,21 +78,24 @@ class UserServices():
         await self.validate_user_login_data(user)
         
         # get the current user 
-        current_user = self.dao.get_user(user)
+        current_user = await self.dao.get_user(user)
 
         # if we can't find a user then raise an error
         if current_user is None:
             raise HTTPException(status_code=404, detail="User does not exist. Please try again.")  
         
         # check if the provided password is correct
-        if not current_user.check_password(user.password):
+        if not await password_hasher.check_password(user.password, current_user.password):
             raise HTTPException(status_code=404, detail="The password you entered is incorrect.") 
        
         expires_time = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MIN)
 
+        # open a server side session, the refresh token carries its ids
+        sid, jti = await session_store.create(current_user.id)
+
         # create both tokens
         jwt_access_token = await JwtHelper.create_access_token({"user_id":current_user.id}, expires_delta=expires_time)
-        jwt_refresh_token = await JwtHelper.create_refresh_token({"user_id":current_user.id})
+        jwt_refresh_token = await JwtHelper.create_refresh_token({"user_id":current_user.id, "sid": sid, "jti": jti})
 
         # return the token and user object
         return jwt_access_token, jwt_refresh_token, current_user
@@ -89,15 +103,18 @@ class UserServices():
 
     async def handle_refresh_token(self, refresh_token: str) -> Tuple[str, str, int]:
         """ Handles refreshing token once the access token expires.
-            Validates the refresh token and then will create a new
-            access & refresh token.
+            Validates the refresh token, rotates it in the session store
+            and then will create a new access & refresh token. A refresh
+            token works once: presenting a rotated one again ends its session.
 
         Args:
             refresh_token (str): Current refresh token that is in cookie. 
 
         Raises:
             HTTPException: There is no refresh token.
-            HTTPException: Token payload does not have 'user_id'. 
+            HTTPException: Token payload does not have 'user_id' or a session.
+            HTTPException: The session was ended (logout, reuse of a rotated token).
+            redis.RedisError: The session store is unavailable (answered with a 503, see routers.middleware.errors).
 
         Returns:
             Tuple[str, str]: Tuples with the new tokens and user id,
@@ -109,26 +126,88 @@ class UserServices():
         payload = await JwtHelper.verify_refresh_token(refresh_token)  
 
         user_id = payload.get("user_id")
-        if not user_id:
+        sid, jti = payload.get("sid"), payload.get("jti")
+        # tokens issued before sessions existed have no ids, their users log in again
+        if not user_id or not sid or not jti:
             raise HTTPException(status_code=401, detail="Invalid refresh token")
 
+        try:
+            new_jti = await session_store.rotate(user_id, sid, jti, int(payload["exp"] - time.time()))
+        except SessionReuseError:
+            raise HTTPException(status_code=401, detail="Refresh token reuse detected. Please log in again.")
+        except KeyError:
+            raise HTTPException(status_code=401, detail="Session expired. Please log in again.")
+
         # Generate a new access token
         expires_time = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MIN)
 
         # create both tokens
         new_access_token = await JwtHelper.create_access_token({"user_id":user_id}, expires_delta=expires_time)
-        new_refresh_token = await JwtHelper.create_refresh_token({"user_id":user_id})
+        new_refresh_token = await JwtHelper.create_refresh_token({"user_id":user_id, "sid": sid, "jti": new_jti})
 
         return new_access_token, new_refresh_token, user_id
 
 
-    async def get_all_users(self) -> list[UserResponse]:
-        """ Retrieves all users in database.
+    async def logout_user(self, user_id: int, access_token: str, refresh_token: str | None) -> None:
+        """ Ends the session of the refresh token and revokes the access token.
+
+        Args:
+            user_id (int): The authenticated user.
+            access_token (str): The access token of the request.
+            refresh_token (str | None): The refresh token cookie, if any.
+
+        Raises:
+            redis.RedisError: The session store is unavailable (answered with a 503, see routers.middleware.errors).
+        """
+        # the access token must stop authenticating even though it has not expired yet
+        await token_cache.revoke(access_token)
+
+        if not refresh_token:
+            return
+        try:
+            payload = jwt.decode(refresh_token, REFRESH_KEY, algorithms=ALGORITHM)
+        except jwt.InvalidTokenError:
+            # nothing to end, the token would be refused anyway
+            return
+        if payload.get("user_id") == user_id and payload.get("sid"):
+            await session_store.end(user_id, payload["sid"])
+
+
+    async def logout_everywhere(self, user_id: int, access_token: str) -> int:
+        """ Ends every session of the user, on every device.
+
+            Refresh tokens stop working at once. Access tokens are short lived:
+            the one of this request is revoked, cached ones are dropped on
+            every worker, and the others expire within ACCESS_TOKEN_EXPIRE_MIN.
+
+        Args:
+            user_id (int): The authenticated user.
+            access_token (str): The access token of the request.
+
+        Raises:
+            redis.RedisError: The session store is unavailable (answered with a 503, see routers.middleware.errors).
 
         Returns:
-            list[User]: List of users in databae. 
+            int: The number of sessions ended.
         """
-        return self.dao.get_all_users()
+        await token_cache.revoke(access_token)
+        await token_cache.revoke_user(user_id)
+        return await session_store.end_all(user_id)
+
+
+    async def get_all_users(self, page: PageParams) -> Tuple[list[dict], str | None]:
+        """ Retrieves one keyset page of the users in database.
+            Users come back as plain mappings of the UserResponse fields,
+            ready to be serialized without ORM objects or validation.
+
+        Args:
+            page (PageParams): Cursor and page size requested by the client.
+
+        Returns:
+            Tuple[list[dict], str | None]: The users of the page and the cursor of the next page, if any.
+        """
+        users = await self.dao.get_all_user_rows(page.after_id, page.fetch_size)
+        return page.split(users, key=lambda u: u["id"])
         
     
     async def get_current_user(self, username: str, email: str) -> UserResponse:
@@ -141,7 +220,7 @@ class UserServices():
         Returns:
             User: The user object. 
         """
-        return self.dao.get_user_by_username_and_email(username, email)
+        return await self.dao.get_user_by_username_and_email(username, email)
         
         
     async def check_user_exists(self, user: UserCreate) -> UserResponse:
@@ -153,7 +232,7 @@ class UserServices():
         Returns:
             User: The user object 
         """
-        u = self.dao.get_user_by_data(user)
+        u = await self.dao.get_user_by_data(user)
         return u
 
 
@@ -212,9 +291,38 @@ class UserServices():
         if username is None or username == "":
             raise HTTPException(status_code=400, detail="No search criteria present. Enter a username.")
 
-        user = self.dao.get_user_by_username(username)
+        user = await self.dao.get_user_by_username(username)
 
         if user is None:
             raise HTTPException(status_code=400, detail="User does not exist.")
         
-        return user
\ No newline at end of file
+        return user
+
+
+    async def search_users(self, query: str, limit: int) -> list[UserResponse]:
+        """ Search-as-you-type over username and name.
+
+            Exact and prefix matches rank first, then fuzzy (trigram) matches.
+            On PostgreSQL the pg_trgm indexes answer the query, elsewhere the
+            in-memory index does. Either way the search stops at SEARCH_BUDGET_MS.
+
+        Args:
+            query (str): What the user has typed so far.
+            limit (int): Maximum number of results.
+
+        Raises:
+            HTTPException: No search criteria present.
+
+        Returns:
+            list[UserResponse]: Matching users, best match first.
+        """
+        if query is None or query.strip() == "":
+            raise HTTPException(status_code=400, detail="No search criteria present. Enter a username.")
+
+        if SEARCH_BACKEND == "database":
+            rows = await self.dao.search_users(query, limit, SEARCH_BUDGET_MS)
+        else:
+            await user_search_index.ensure_loaded(self.dao.get_search_rows)
+            rows = user_search_index.search(query, limit)
+
+        return [UserResponse(id=id, name=name, username=username, email=email) for id, name, username, email in rows]
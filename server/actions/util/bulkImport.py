@@ -0,0 +1,239 @@
+import csv
+import json
+import os
+import time
+from typing import AsyncIterable, AsyncIterator
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from actions.dal.asyncDAO import AsyncUserDAO, AsyncContactDAO
+from actions.util.eventBus import event_bus
+from actions.util.fastJson import orjson
+from actions.util.passwordHasher import PasswordHasher, password_hasher
+from actions.util.userSearch import user_search_index
+from schemas.contact_schema import ContactImport, ContactResponse
+from schemas.user_schema import UserCreate
+
+# rows validated, deduplicated, hashed and inserted together
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", 1000))
+# rejected rows reported with their line and reason, the rest are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 100))
+IMPORT_FORMATS = ("ndjson", "csv")
+IMPORT_SCHEMAS: dict[str, type[BaseModel]] = {"users": UserCreate, "contacts": ContactImport}
+
+loads = orjson.loads if orjson is not None else json.loads
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """ Lines of a byte stream (e.g. `request.stream()`), decoded as UTF-8. """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if buffer:
+        yield buffer.decode("utf-8")
+
+
+class BulkImport():
+    """ Imports users or contacts from NDJSON or CSV (one record per line, CSV with a header row).
+
+        Records are read and processed `batch_size` at a time, and each batch
+        costs a fixed number of round trips whatever its size:
+
+            validate   every row against UserCreate / ContactImport
+            dedupe     against earlier rows of the file, then one query for the
+                       usernames/emails (users) or linked pairs (contacts) that exist
+            hash       the passwords on every worker of the bcrypt pool at once
+            insert     one executemany and one commit
+
+        Bulk inserts bypass the mapper events and ContactDAO's per row hooks,
+        so the batch updates the search index, publishes the contact events
+        (social graph, open streams) and bumps the contact counters itself.
+        `run` yields a progress report after every batch.
+    """
+    def __init__(self, table: str, db: AsyncSession | Session, hasher: PasswordHasher = password_hasher, batch_size: int = IMPORT_BATCH_SIZE):
+        self.table = table
+        self.schema = IMPORT_SCHEMAS[table]
+        self.users = AsyncUserDAO(db)
+        self.contacts = AsyncContactDAO(db)
+        self.hasher = hasher
+        self.batch_size = batch_size
+        self.read = self.imported = self.duplicates = self.invalid = 0
+        self.errors: list[dict] = []
+        # keys of the rows imported so far, so a file repeating itself is deduplicated too
+        self.seen: set = set()
+        self.started = time.perf_counter()
+
+
+    async def run(self, lines: AsyncIterable[str], fmt: str) -> AsyncIterator[dict]:
+        """ Imports every record of `lines`, yielding `progress()` after each batch. """
+        columns = None
+        batch: list[tuple[int, str]] = []
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            if fmt == "csv" and columns is None:
+                columns = next(csv.reader([line]))
+                continue
+            batch.append((line_no, line))
+            if len(batch) >= self.batch_size:
+                await self.import_batch(batch, fmt, columns)
+                batch = []
+                yield self.progress()
+        if batch:
+            await self.import_batch(batch, fmt, columns)
+        yield self.progress(done=True)
+
+
+    def progress(self, done: bool = False) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "table": self.table,
+            "done": done,
+            "read": self.read,
+            "imported": self.imported,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(self.read / elapsed, 1) if elapsed else 0.0,
+            # the rejected rows are only listed once, at the end
+            **({"errors": self.errors} if done else {}),
+        }
+
+
+    async def import_batch(self, batch: list[tuple[int, str]], fmt: str, columns: list[str] | None) -> None:
+        self.read += len(batch)
+        rows = self.validate(self.parse(batch, fmt, columns))
+        if self.table == "users":
+            await self.import_users(rows)
+        else:
+            await self.import_contacts(rows)
+
+
+    def parse(self, batch: list[tuple[int, str]], fmt: str, columns: list[str] | None) -> list[tuple[int, dict]]:
+        if fmt == "csv":
+            values = csv.reader([line for _, line in batch])
+            return [(line_no, dict(zip(columns, row))) for (line_no, _), row in zip(batch, values)]
+
+        records = []
+        for line_no, line in batch:
+            try:
+                record = loads(line)
+            except ValueError:
+                self.reject(line_no, "invalid JSON")
+                continue
+            if isinstance(record, dict):
+                records.append((line_no, record))
+            else:
+                self.reject(line_no, "expected a JSON object")
+        return records
+
+
+    def validate(self, records: list[tuple[int, dict]]) -> list[tuple[int, BaseModel]]:
+        rows = []
+        for line_no, record in records:
+            try:
+                rows.append((line_no, self.schema.model_validate(record)))
+            except ValidationError as e:
+                self.reject(line_no, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+        return rows
+
+
+    async def import_users(self, rows: list[tuple[int, UserCreate]]) -> None:
+        # duplicates within the file, the first row wins
+        fresh = []
+        for line_no, user in rows:
+            if ("username", user.username) in self.seen or ("email", user.email) in self.seen:
+                self.duplicate(line_no, "username or email repeated in the file")
+                continue
+            self.seen.update((("username", user.username), ("email", user.email)))
+            fresh.append((line_no, user))
+
+        usernames, emails = await self.users.get_taken_usernames_and_emails(
+            [user.username for _, user in fresh], [user.email for _, user in fresh]
+        )
+        new = []
+        for line_no, user in fresh:
+            if user.username in usernames or user.email in emails:
+                self.duplicate(line_no, "username or email already taken")
+            else:
+                new.append((line_no, user))
+        if not new:
+            return
+
+        hashes = await self.hasher.hash_many([user.password for _, user in new])
+        try:
+            created = await self.users.bulk_create_users([
+                {"name": user.name, "username": user.username, "email": user.email, "password": hashed}
+                for (_, user), hashed in zip(new, hashes)
+            ])
+        except ValueError as e:
+            for line_no, _ in new:
+                self.reject(line_no, str(e))
+            return
+
+        self.imported += len(created)
+        if user_search_index.loaded:
+            for user in created:
+                user_search_index.add(tuple(user))
+
+
+    async def import_contacts(self, rows: list[tuple[int, ContactImport]]) -> None:
+        ids = await self.users.get_ids_by_usernames(
+            list({name for _, c in rows for name in (c.username, c.friend_username)})
+        )
+        fresh = []
+        for line_no, c in rows:
+            user_id, friend_id = ids.get(c.username), ids.get(c.friend_username)
+            if user_id is None or friend_id is None:
+                self.reject(line_no, f"unknown user: {c.username if user_id is None else c.friend_username}")
+            elif user_id == friend_id:
+                self.reject(line_no, "a user cannot be their own contact")
+            elif (pair := (min(user_id, friend_id), max(user_id, friend_id))) in self.seen:
+                self.duplicate(line_no, "pair of users repeated in the file")
+            else:
+                self.seen.add(pair)
+                fresh.append((line_no, pair, {"current_user_id": user_id, "friend_id": friend_id, "status": c.status}))
+
+        linked = await self.contacts.get_linked_pairs([pair for _, pair, _ in fresh])
+        new = []
+        for line_no, pair, row in fresh:
+            if pair in linked:
+                self.duplicate(line_no, "users are already contacts")
+            else:
+                new.append((line_no, row))
+        if not new:
+            return
+
+        try:
+            created = await self.contacts.bulk_create_contacts([row for _, row in new])
+        except ValueError as e:
+            for line_no, _ in new:
+                self.reject(line_no, str(e))
+            return
+
+        self.imported += len(created)
+        for contact in created:
+            await event_bus.publish(
+                [contact["current_user_id"], contact["friend_id"]],
+                {"type": "imported", "contact": ContactResponse.model_validate(contact).model_dump(mode="json"), "previous_status": None},
+            )
+
+
+    def reject(self, line_no: int, detail: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line_no, "detail": detail})
+
+
+    def duplicate(self, line_no: int, detail: str) -> None:
+        self.duplicates += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"line": line_no, "detail": detail})
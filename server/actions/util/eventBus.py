@@ -0,0 +1,137 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Callable
+
+import redis
+import redis.asyncio as aioredis
+
+logger = logging.getLogger(__name__)
+
+EVENTS_CHANNEL = "contact-events"
+# events buffered per connection; a client that falls further behind is told to resync
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 100))
+# seconds between reconnect attempts of the Redis listener
+EVENTS_RECONNECT_DELAY = float(os.getenv("EVENTS_RECONNECT_DELAY", 1))
+
+
+class Subscriber():
+    """ One open event stream: a bounded queue and whether events were dropped from it. """
+    def __init__(self, user_id: int, maxsize: int = EVENTS_QUEUE_SIZE):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.lost = False
+
+
+    def push(self, event: dict) -> None:
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # never block the publisher on a slow client
+            self.lost = True
+
+
+class EventBus():
+    """ Fan-out of contact events to the streams open on this worker.
+
+        With Redis, every event is published on EVENTS_CHANNEL and each worker
+        delivers the messages it receives to its own subscribers, so a client
+        gets its events whichever worker serves its stream. Without Redis (or
+        while the listener is disconnected) events are delivered in process.
+    """
+    def __init__(self):
+        self.subscribers: dict[int, set[Subscriber]] = {}
+        # in-process consumers of every event (e.g. the social graph), run on the event loop
+        self.listeners: list[Callable[[dict], None]] = []
+        self.redis: aioredis.Redis | None = None
+        self.listener: asyncio.Task | None = None
+        # True while the listener is subscribed, only then are events routed through Redis
+        self.connected = False
+        self.published = 0
+        self.delivered = 0
+
+
+    async def start(self, redis_url: str | None) -> None:
+        if redis_url:
+            self.redis = aioredis.from_url(redis_url)
+            self.listener = asyncio.create_task(self.listen())
+
+
+    async def stop(self) -> None:
+        if self.listener is not None:
+            self.listener.cancel()
+            try:
+                await self.listener
+            except asyncio.CancelledError:
+                pass
+            self.listener = None
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+        self.connected = False
+
+
+    def subscribe(self, user_id: int) -> Subscriber:
+        subscriber = Subscriber(user_id)
+        self.subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self.subscribers.get(subscriber.user_id)
+        if subscribers is not None:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self.subscribers[subscriber.user_id]
+
+
+    @property
+    def connections(self) -> int:
+        return sum(len(s) for s in self.subscribers.values())
+
+
+    async def publish(self, user_ids: list[int], event: dict) -> None:
+        """ Sends `event` to every open stream of the given users, on any worker. """
+        self.published += 1
+        if self.connected:
+            try:
+                await self.redis.publish(EVENTS_CHANNEL, json.dumps({"users": user_ids, "event": event}, default=str))
+                return
+            except redis.RedisError as e:
+                logger.warning("event bus: redis publish failed, delivering locally: %s", e)
+        self.deliver(user_ids, event)
+
+
+    def deliver(self, user_ids: list[int], event: dict) -> None:
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception:
+                logger.exception("event bus: listener failed")
+        for user_id in user_ids:
+            for subscriber in self.subscribers.get(user_id, ()):
+                subscriber.push(event)
+                self.delivered += 1
+
+
+    async def listen(self) -> None:
+        # reconnects forever, the task is cancelled on shutdown
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(EVENTS_CHANNEL)
+                    self.connected = True
+                    async for message in pubsub.listen():
+                        if message["type"] != "message":
+                            continue
+                        payload = json.loads(message["data"])
+                        self.deliver(payload["users"], payload["event"])
+            except (redis.RedisError, OSError) as e:
+                logger.warning("event bus: redis listener disconnected: %s", e)
+            finally:
+                self.connected = False
+            await asyncio.sleep(EVENTS_RECONNECT_DELAY)
+
+
+event_bus = EventBus()
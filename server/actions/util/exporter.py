@@ -0,0 +1,50 @@
+import csv
+import io
+import os
+from datetime import date
+from enum import Enum
+from typing import AsyncIterator
+
+from sqlalchemy import Select
+
+from database import async_engine
+from actions.util.fastJson import dumps
+
+# rows fetched from the server side cursor and written per chunk
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 5000))
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def plain(value):
+    """ CSV cell of a column value (enums by value, dates in ISO 8601). """
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def encode_ndjson(columns: list[str], rows) -> bytes:
+    return b"".join(dumps(dict(zip(columns, row))) + b"\n" for row in rows)
+
+
+def encode_csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows([plain(value) for value in row] for row in rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+async def stream_export(query: Select, fmt: str, batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """ Streams the rows of `query` as NDJSON or CSV chunks.
+
+        Rows come from a server side cursor on a connection of their own, one
+        batch at a time, so memory stays flat whatever the table size, and a
+        chunk is sent as soon as its batch is encoded.
+    """
+    async with async_engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=batch_size))
+        columns = list(result.keys())
+        if fmt == "csv":
+            yield encode_csv([columns])
+        async for rows in result.partitions():
+            yield encode_ndjson(columns, rows) if fmt == "ndjson" else encode_csv(rows)
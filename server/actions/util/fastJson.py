@@ -0,0 +1,29 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+# optional, pydantic's own Rust encoder is used without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """ JSON bytes of plain Python data (dicts, lists, datetimes, enums), no validation. """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return to_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """ JSONResponse rendered by orjson (or pydantic-core) instead of the stdlib encoder.
+
+        The app's default response class. List routes also return it directly
+        with the mappings a DAO selected, which skips both ORM hydration and
+        FastAPI's per-row validation: the DAO picks exactly the response
+        schema's columns, so there is nothing left to validate.
+    """
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
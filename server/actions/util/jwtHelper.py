@@ -3,19 +3,25 @@ from fastapi import HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt, os
 
-from models.user import User
 from schemas.token_schema import TokenData
+from actions.dal.asyncDAO import AsyncUserDAO
+from actions.util.userCache import user_cache
+from actions.util.tokenCache import token_cache
+from actions.util.metrics import JWT_VERIFICATIONS
+from schemas.user_schema import UserResponse
 
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 REFRESH_KEY = os.getenv("REFRESH_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MIN = 60
+REFRESH_TOKEN_EXPIRE_DAYS = 7
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 class JwtHelper():
     def __init__(self, db):
         self.db = db   
+        self.user_dao = AsyncUserDAO(db)
         self.credentials_exception = HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, 
                 detail="Could not validate credentials.",
@@ -26,12 +32,22 @@ class JwtHelper():
         token = request.cookies.get("jwt_token")
 
         if token is None:
+            JWT_VERIFICATIONS.inc("rejected")
             raise self.credentials_exception
         
         try:
-            payload = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM)
-            if payload.get("token_type") != "access":
-                raise HTTPException(status_code=403, detail="Invalid token type")
+            # skip the HMAC check and claim parsing for tokens verified recently
+            payload = token_cache.get(token)
+            if payload is None:
+                if await token_cache.is_revoked(token):
+                    raise self.credentials_exception
+                payload = jwt.decode(token, SECRET_KEY, algorithms=ALGORITHM, options={"require": ["exp"]})
+                if payload.get("token_type") != "access":
+                    raise HTTPException(status_code=403, detail="Invalid token type")
+                token_cache.set(token, payload)
+                JWT_VERIFICATIONS.inc("decoded")
+            else:
+                JWT_VERIFICATIONS.inc("cached")
 
             # store user info into the request state
             user_id = payload.get("user_id")
@@ -45,14 +61,29 @@ class JwtHelper():
                 id=user_id
             )
 
+            user = await self.get_user(user_id)
+            if user is None:
+                raise self.credentials_exception
+
             request.state.token = token_data
-            request.state.user = await self.get_user(user_id)
+            # expiry of the verified token, long-lived responses (event streams) end with it
+            request.state.token_exp = payload["exp"]
+            request.state.user = user
         except jwt.InvalidTokenError:
+            JWT_VERIFICATIONS.inc("rejected")
             raise self.credentials_exception
 
 
-    async def get_user(self, user_id: int) -> User:
-        return self.db.query(User).filter(User.id==user_id).first()
+    # authenticated identity, served from the user cache when possible
+    async def get_user(self, user_id: int) -> UserResponse | None:
+        user = await user_cache.get(user_id)
+        if user is not None:
+            return user
+
+        db_user = await self.user_dao.get_user_by_id(user_id)
+        if db_user is None:
+            return None
+        return await user_cache.set(db_user)
 
 
     @staticmethod 
@@ -93,7 +124,7 @@ class JwtHelper():
     @staticmethod
     async def create_refresh_token(data: dict) -> str:
         to_encode = data.copy()
-        expire = datetime.now(timezone.utc) + timedelta(days=7)
+        expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
         to_encode.update({"exp" : expire, "token_type" : "refresh"})
         encoded_jwt = jwt.encode(to_encode, REFRESH_KEY, algorithm=ALGORITHM)
         return encoded_jwt
\ No newline at end of file
@@ -0,0 +1,66 @@
+import time
+from collections import OrderedDict
+
+
+class LRUCache():
+    """ In-process LRU cache with a per-entry expiry.
+
+        Entries expire `ttl` seconds after they are set, or earlier when an
+        explicit `expires_at` (monotonic time) is given. Only meant to be used
+        from the event loop thread.
+    """
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+
+    def set(self, key, value, expires_at: float | None = None) -> None:
+        deadline = time.monotonic() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+
+        self._data[key] = (value, deadline)
+        self._data.move_to_end(key)
+        # evict the least recently used entries
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+    def delete(self, key) -> None:
+        self._data.pop(key, None)
+
+
+    def delete_where(self, predicate) -> int:
+        """ Drops every entry whose value matches `predicate`, a full scan meant for rare bulk invalidations. """
+        stale = [key for key, (value, _) in self._data.items() if predicate(value)]
+        for key in stale:
+            del self._data[key]
+        return len(stale)
+
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,149 @@
+import bisect
+import time
+from typing import Callable
+
+
+# latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric():
+    """ Base of the Prometheus style instruments.
+
+        Series are plain Python ints/floats updated without locks: on CPython
+        a lost increment is possible only across threads, and the hot path
+        runs on the event loop. A series is allocated the first time its
+        label values are seen, later updates allocate nothing.
+    """
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        registry.append(self)
+
+
+    def format_labels(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{label}="{value}"' for label, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: dict[tuple, float] = {}
+
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+
+    def render(self) -> list[str]:
+        return self.header() + [f"{self.name}{self.format_labels(k)} {v}" for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount: float = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) - amount
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # per series: [count per bucket (+Inf last), sum]
+        self.series: dict[tuple, list] = {}
+
+
+    def observe(self, value: float, *label_values) -> None:
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for key, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{self.format_labels(key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self.format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{self.format_labels(key)} {cumulative}")
+        return lines
+
+
+class Collector(Metric):
+    """ Gauge or counter whose samples are read from elsewhere at scrape time,
+        so the code being observed pays nothing on its hot path.
+    """
+    def __init__(self, name: str, help: str, kind: str, collect: Callable[[], dict[tuple, float]], labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.collect = collect
+
+
+    def render(self) -> list[str]:
+        return self.header() + [f"{self.name}{self.format_labels(k)} {v}" for k, v in self.collect().items()]
+
+
+registry: list[Metric] = []
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# instruments updated on the request path
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route.", ("method", "route", "status"))
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being served.")
+JWT_VERIFICATIONS = Counter("jwt_verifications_total", "Access token checks by outcome (cached, decoded, rejected).", ("result",))
+DB_POOL_WAIT = Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection.")
+
+
+class MetricsMiddleware():
+    """ Pure ASGI middleware recording in-flight requests and latency per route template. """
+    def __init__(self, app):
+        self.app = app
+
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # the route template (not the raw path) keeps the number of series bounded
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(time.perf_counter() - start, scope["method"], route.path if route else "unmatched", status)
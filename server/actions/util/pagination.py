@@ -0,0 +1,60 @@
+import base64
+import json
+
+from fastapi import HTTPException, Query, Response
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"k": last_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["k"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return last_id
+
+
+class PageParams():
+    """ Keyset pagination parameters (`?cursor=...&limit=...`).
+
+        Pages are ordered by primary key and the cursor encodes the last key of
+        the previous page, so every page is an index range scan of `limit` rows
+        no matter how deep the client pages. Services ask the DAO for
+        `fetch_size` (limit + 1) rows so `split` can tell whether another
+        page exists.
+    """
+    def __init__(self, cursor: str | None = Query(None), limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+        self.after_id = decode_cursor(cursor)
+        self.limit = limit
+
+
+    @property
+    def fetch_size(self) -> int:
+        return self.limit + 1
+
+
+    def split(self, rows: list, key=lambda row: row.id) -> tuple[list, str | None]:
+        """ Splits the `limit + 1` rows fetched by a DAO into the page and the next cursor. """
+        if len(rows) <= self.limit:
+            return rows, None
+        items = rows[:self.limit]
+        return items, encode_cursor(key(items[-1]))
+
+
+def set_next_cursor(response: Response, next_cursor: str | None) -> None:
+    # the body stays a plain list, the cursor of the next page travels in a header
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
@@ -0,0 +1,109 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+import bcrypt
+from fastapi import HTTPException
+
+
+# "thread" is enough since bcrypt releases the GIL while hashing, "process" isolates the CPU work completely
+BCRYPT_EXECUTOR = os.getenv("BCRYPT_EXECUTOR", "thread").lower()
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", os.cpu_count() or 1))
+# hashes allowed to wait for a free worker before new ones are turned away with a 503
+BCRYPT_QUEUE_LIMIT = int(os.getenv("BCRYPT_QUEUE_LIMIT", BCRYPT_WORKERS * 4))
+BCRYPT_RETRY_AFTER = int(os.getenv("BCRYPT_RETRY_AFTER", 1))
+
+
+# module level functions so they can be pickled for the process pool
+def hash_password_sync(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def check_password_sync(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+
+class PasswordHasher():
+    """ Runs bcrypt on a bounded worker pool so hashing never blocks the event loop.
+
+        At most `workers + queue_limit` hashes are in flight; anything beyond
+        that fails fast with a 503 instead of piling up behind the pool.
+    """
+    def __init__(self, workers: int = BCRYPT_WORKERS, queue_limit: int = BCRYPT_QUEUE_LIMIT, kind: str = BCRYPT_EXECUTOR):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.kind = kind
+        self.in_flight = 0
+        self.rejected = 0
+        self._executor: Executor | None = None
+
+
+    @property
+    def executor(self) -> Executor:
+        # created lazily so importing the module never forks or spawns threads
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+
+    @property
+    def queue_depth(self) -> int:
+        # hashes waiting for a worker
+        return max(0, self.in_flight - self.workers)
+
+
+    async def hash_password(self, password: str) -> str:
+        return await self._submit(hash_password_sync, password)
+
+
+    async def check_password(self, password: str, hashed: str) -> bool:
+        return await self._submit(check_password_sync, password, hashed)
+
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """ Hashes a bulk import batch on every worker, in the order given.
+
+            Passwords are submitted one pool's worth at a time and the batch
+            waits for the pool rather than failing with a 503, so logins that
+            arrive meanwhile queue behind at most one round of hashes.
+        """
+        loop = asyncio.get_running_loop()
+        hashes = []
+        for start in range(0, len(passwords), self.workers):
+            chunk = passwords[start:start + self.workers]
+            self.in_flight += len(chunk)
+            try:
+                hashes.extend(await asyncio.gather(*(
+                    loop.run_in_executor(self.executor, hash_password_sync, password) for password in chunk
+                )))
+            finally:
+                self.in_flight -= len(chunk)
+        return hashes
+
+
+    async def _submit(self, fn, *args):
+        if self.in_flight >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy. Please try again.",
+                headers={"Retry-After": str(BCRYPT_RETRY_AFTER)}
+            )
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.in_flight -= 1
+
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,153 @@
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+# same statement repeated this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 10))
+
+
+class QueryStats():
+    """ Queries issued (and time spent in the database) within one scope.
+
+        Scopes nest: a query is also counted by every enclosing scope, so a
+        `query_budget` around a whole flow still sees the per-request counts.
+    """
+    __slots__ = ("count", "seconds", "statements", "parent")
+
+    def __init__(self, parent: "QueryStats | None" = None):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = Counter()
+        self.parent = parent
+
+
+    def record(self, statement: str, seconds: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.seconds += seconds
+            stats.statements[statement] += 1
+            stats = stats.parent
+
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        return [(statement, n) for statement, n in self.statements.most_common() if n >= threshold]
+
+
+# the stats object is shared (not copied) with threadpool workers and SQLAlchemy greenlets
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+# every engine, sync or the one behind the AsyncEngine, reports to the current scope
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def end_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def failed_query(context):
+    # after_cursor_execute does not run for failed statements
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+class QueryCountMiddleware():
+    """ Pure ASGI middleware that counts the SQL queries of each request.
+
+        Adds X-DB-Query-Count and X-DB-Time-Ms to the response, logs them, and
+        warns when one statement repeats often enough to look like an N+1.
+    """
+    def __init__(self, app):
+        self.app = app
+
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats(parent=_current.get())
+        token = _current.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers[QUERY_COUNT_HEADER] = str(stats.count)
+                headers[QUERY_TIME_HEADER] = f"{stats.seconds * 1000:.2f}"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
+            logger.info("%s %s queries=%d db_ms=%.2f", scope["method"], scope["path"], stats.count, stats.seconds * 1000)
+            for statement, n in stats.repeated():
+                logger.warning("possible N+1 on %s %s: statement ran %d times: %s", scope["method"], scope["path"], n, statement)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class query_budget():
+    """ Test helper: fails when the code inside the block runs more than `max_queries` queries.
+
+            with query_budget(2):
+                ContactDAO(db).get_contacts(user, Status.ACCEPTED)
+    """
+    def __init__(self, max_queries: int):
+        self.max_queries = max_queries
+        self.stats = None
+        self._token = None
+
+
+    def __enter__(self) -> QueryStats:
+        self.stats = QueryStats(parent=_current.get())
+        self._token = _current.set(self.stats)
+        return self.stats
+
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        if exc_type is None and self.stats.count > self.max_queries:
+            raise QueryBudgetExceeded(describe_budget(self.stats.count, self.max_queries, self.stats.statements))
+
+
+def assert_query_budget(response, max_queries: int) -> None:
+    """ Test helper: fails when the request behind `response` ran more than `max_queries` queries.
+
+            res = client.get("/contact/my-contacts")
+            assert_query_budget(res, 2)
+    """
+    count = int(response.headers[QUERY_COUNT_HEADER])
+    if count > max_queries:
+        raise QueryBudgetExceeded(f"{response.request.method} {response.request.url.path}: {describe_budget(count, max_queries)}")
+
+
+def describe_budget(count: int, max_queries: int, statements: Counter | None = None) -> str:
+    message = f"ran {count} queries, budget is {max_queries}"
+    if statements:
+        message += "\n" + "\n".join(f"  {n}x {statement}" for statement, n in statements.most_common(5))
+    return message
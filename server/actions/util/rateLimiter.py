@@ -0,0 +1,84 @@
+import logging
+import math
+import os
+import time
+
+import redis
+
+from actions.util.lruCache import LRUCache
+from actions.util.redisClient import get_redis
+
+logger = logging.getLogger(__name__)
+
+# login attempts allowed per window, per username and per client IP
+LOGIN_RATE_LIMIT_USER = int(os.getenv("LOGIN_RATE_LIMIT_USER", 10))
+LOGIN_RATE_LIMIT_IP = int(os.getenv("LOGIN_RATE_LIMIT_IP", 50))
+LOGIN_RATE_WINDOW = int(os.getenv("LOGIN_RATE_WINDOW", 60))
+# keys tracked by the in-process fallback, the least recently seen are dropped first
+RATE_LIMIT_LOCAL_SIZE = int(os.getenv("RATE_LIMIT_LOCAL_SIZE", 100000))
+
+
+class SlidingWindowLimiter():
+    """ Sliding window counter: at most `limit` hits per `window` seconds per key.
+
+        The count of the current fixed window is added to the count of the
+        previous one, weighted by how much of it still overlaps the sliding
+        window. That is one INCR/EXPIRE/GET pipeline (a single round trip) per
+        check in Redis, so every worker shares the same counters. Without
+        Redis, or when it fails, the counters are kept in process.
+    """
+    def __init__(self, name: str, limit: int, window: int, local_size: int = RATE_LIMIT_LOCAL_SIZE):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        # key -> [window number, hits in that window, hits in the window before]
+        self.local = LRUCache(local_size, 2 * window)
+        self.rejected = 0
+
+
+    def redis_key(self, key: str, number: int) -> str:
+        return f"ratelimit:{self.name}:{key}:{number}"
+
+
+    async def counts(self, key: str, number: int) -> tuple[int, int]:
+        """ Records a hit and returns the hits of the current and previous window. """
+        client = get_redis()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                pipe.incr(self.redis_key(key, number))
+                pipe.expire(self.redis_key(key, number), 2 * self.window)
+                pipe.get(self.redis_key(key, number - 1))
+                current, _, previous = await pipe.execute()
+                return current, int(previous or 0)
+            except redis.RedisError as e:
+                logger.warning("rate limiter: redis failed, using local counters: %s", e)
+
+        entry = self.local.get(key)
+        if entry is None or entry[0] < number - 1:
+            entry = [number, 0, 0]
+        elif entry[0] == number - 1:
+            entry = [number, 0, entry[1]]
+        entry[1] += 1
+        self.local.set(key, entry)
+        return entry[1], entry[2]
+
+
+    async def hit(self, key: str) -> int:
+        """ Counts an attempt for `key`.
+
+        Returns:
+            int: 0 when the attempt is allowed, otherwise the seconds to wait before retrying.
+        """
+        now = time.time()
+        number, offset = divmod(now, self.window)
+        current, previous = await self.counts(key, int(number))
+
+        if previous * (1 - offset / self.window) + current <= self.limit:
+            return 0
+        self.rejected += 1
+        return max(1, math.ceil(self.window - offset))
+
+
+login_user_limiter = SlidingWindowLimiter("login:user", LOGIN_RATE_LIMIT_USER, LOGIN_RATE_WINDOW)
+login_ip_limiter = SlidingWindowLimiter("login:ip", LOGIN_RATE_LIMIT_IP, LOGIN_RATE_WINDOW)
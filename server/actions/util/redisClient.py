@@ -0,0 +1,15 @@
+import redis.asyncio as aioredis
+
+
+# the asyncio client created by main.py, so a Redis round trip never blocks the event loop;
+# None until the app sets it (scripts run without Redis)
+_redis_client: aioredis.Redis | None = None
+
+
+def set_redis(client: aioredis.Redis | None) -> None:
+    global _redis_client
+    _redis_client = client
+
+
+def get_redis() -> aioredis.Redis | None:
+    return _redis_client
@@ -0,0 +1,189 @@
+import os
+import time
+import uuid
+
+import redis.asyncio as aioredis
+
+from actions.util.lruCache import LRUCache
+from actions.util.redisClient import get_redis
+from actions.util.jwtHelper import REFRESH_TOKEN_EXPIRE_DAYS
+
+# sessions kept by the in-process fallback, the least recently used are dropped first
+SESSION_LOCAL_SIZE = int(os.getenv("SESSION_LOCAL_SIZE", 100000))
+
+
+class SessionReuseError(Exception):
+    """ A refresh token was presented again after it had been rotated. """
+
+
+class RedisBackend():
+    def __init__(self, client: aioredis.Redis):
+        self.client = client
+
+
+    async def get(self, key: str) -> str | None:
+        value = await self.client.get(key)
+        return value.decode() if value is not None else None
+
+
+    async def getdel(self, key: str) -> str | None:
+        value = await self.client.getdel(key)
+        return value.decode() if value is not None else None
+
+
+    async def put(self, values: dict[str, str], ttl: int) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.set(key, value, ex=ttl)
+        await pipe.execute()
+
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+
+    async def add_member(self, key: str, member: str, ttl: int) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.sadd(key, member)
+        pipe.expire(key, ttl)
+        await pipe.execute()
+
+
+    async def members(self, key: str) -> set[str]:
+        return {m.decode() for m in await self.client.smembers(key)}
+
+
+    async def remove_member(self, key: str, member: str) -> None:
+        await self.client.srem(key, member)
+
+
+class LocalBackend():
+    """ Same operations (coroutines too) on an in-process LRU, for running without Redis (single worker). """
+    def __init__(self, maxsize: int = SESSION_LOCAL_SIZE):
+        self.cache = LRUCache(maxsize, float("inf"))
+
+
+    async def get(self, key: str) -> str | None:
+        return self.cache.get(key)
+
+
+    async def getdel(self, key: str) -> str | None:
+        value = self.cache.get(key)
+        self.cache.delete(key)
+        return value
+
+
+    async def put(self, values: dict[str, str], ttl: int) -> None:
+        for key, value in values.items():
+            self.cache.set(key, value, expires_at=time.monotonic() + ttl)
+
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.cache.delete(key)
+
+
+    async def add_member(self, key: str, member: str, ttl: int) -> None:
+        members = self.cache.get(key) or set()
+        members.add(member)
+        self.cache.set(key, members, expires_at=time.monotonic() + ttl)
+
+
+    async def members(self, key: str) -> set[str]:
+        return set(self.cache.get(key) or ())
+
+
+    async def remove_member(self, key: str, member: str) -> None:
+        members = self.cache.get(key)
+        if members is not None:
+            members.discard(member)
+
+
+class SessionStore():
+    """ Server side state of refresh tokens, so sessions can be revoked.
+
+        A login opens a session (`sid`) whose current refresh token id
+        (`jti`) is stored under `session:refresh:<jti>`. Refreshing consumes
+        that key with one GETDEL and stores the next token id, so a validity
+        check is a single O(1) lookup and every refresh token works once.
+        Consumed ids are remembered until they would have expired: presenting
+        one again means the token was stolen, and the whole session is ended.
+        Every key carries a TTL no longer than the refresh token lifetime.
+    """
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self.local = LocalBackend()
+
+
+    @property
+    def backend(self) -> RedisBackend | LocalBackend:
+        client = get_redis()
+        return RedisBackend(client) if client is not None else self.local
+
+
+    async def create(self, user_id: int) -> tuple[str, str]:
+        """ Opens a session for the user.
+
+        Returns:
+            tuple[str, str]: The session id and the id of its first refresh token.
+        """
+        sid, jti = uuid.uuid4().hex, uuid.uuid4().hex
+        backend = self.backend
+        await backend.put({f"session:refresh:{jti}": f"{user_id}:{sid}", f"session:family:{sid}": jti}, self.ttl)
+        await backend.add_member(f"session:user:{user_id}", sid, self.ttl)
+        return sid, jti
+
+
+    async def rotate(self, user_id: int, sid: str, jti: str, expires_in: int) -> str:
+        """ Consumes refresh token `jti` and issues the id of the next one.
+
+        Args:
+            expires_in (int): Seconds until the presented token expires.
+
+        Raises:
+            SessionReuseError: The token had already been rotated, the session is now ended.
+            KeyError: The token is unknown, expired or revoked.
+
+        Returns:
+            str: The id of the session's new refresh token.
+        """
+        backend = self.backend
+        if await backend.getdel(f"session:refresh:{jti}") != f"{user_id}:{sid}":
+            if await backend.get(f"session:used:{jti}") == sid:
+                await self.end(user_id, sid)
+                raise SessionReuseError(sid)
+            raise KeyError(jti)
+
+        new_jti = uuid.uuid4().hex
+        await backend.put({f"session:refresh:{new_jti}": f"{user_id}:{sid}", f"session:family:{sid}": new_jti}, self.ttl)
+        await backend.put({f"session:used:{jti}": sid}, max(1, expires_in))
+        # the user's session set has to outlive every session in it, or end_all() would miss live ones
+        await backend.add_member(f"session:user:{user_id}", sid, self.ttl)
+        return new_jti
+
+
+    async def end(self, user_id: int, sid: str) -> None:
+        """ Ends one session (logout, reuse detected). """
+        backend = self.backend
+        jti = await backend.getdel(f"session:family:{sid}")
+        if jti is not None:
+            await backend.delete(f"session:refresh:{jti}")
+        await backend.remove_member(f"session:user:{user_id}", sid)
+
+
+    async def end_all(self, user_id: int) -> int:
+        """ Ends every session of the user ("log out everywhere").
+
+        Returns:
+            int: The number of sessions ended.
+        """
+        backend = self.backend
+        sids = await backend.members(f"session:user:{user_id}")
+        for sid in sids:
+            await self.end(user_id, sid)
+        await backend.delete(f"session:user:{user_id}")
+        return len(sids)
+
+
+session_store = SessionStore(REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600)
@@ -0,0 +1,215 @@
+import asyncio
+import bisect
+import logging
+import os
+from array import array
+from collections import Counter
+from typing import Callable, Iterable
+
+from starlette.concurrency import run_in_threadpool
+
+from database import SessionLocal
+from models.enum.status import Status
+from actions.dal.contactDAO import ContactDAO
+from actions.util.eventBus import event_bus
+
+logger = logging.getLogger(__name__)
+
+GRAPH_DEFAULT_LIMIT = 10
+GRAPH_MAX_LIMIT = 50
+# neighbours expanded per hop of a suggestion query, bounds the cost for users with huge contact lists
+GRAPH_MAX_FANOUT = int(os.getenv("GRAPH_MAX_FANOUT", 500))
+# build the graph in the background at startup instead of on the first query
+GRAPH_PRELOAD = os.getenv("GRAPH_PRELOAD", "1") == "1"
+
+EMPTY = array("i")
+
+
+class SocialGraph():
+    """ In-memory index of ACCEPTED contacts for mutual contact and suggestion queries.
+
+        Each user's contacts are a sorted `array('i')` (4 bytes per edge end)
+        in a list indexed by user id, so 1M users with 20M edges take a few
+        hundred MB and a lookup is one list index. Intersections bisect the
+        larger array. The graph is built once from the contacts table in a
+        worker thread and then kept current from the contact events of the
+        event bus, which every worker receives.
+
+        Nothing stops two contact rows of the same pair from both being
+        ACCEPTED, so edges are reference counted: `repeated` holds the extra
+        rows of the (few) pairs that have more than one, and an edge only
+        leaves the arrays when its last ACCEPTED row does.
+    """
+    def __init__(self):
+        self.adjacency: list[array | None] = []
+        self.edges = 0
+        # (smaller id, larger id) -> ACCEPTED rows of the pair beyond the first
+        self.repeated: dict[tuple[int, int], int] = {}
+        self.loaded = False
+        # changes received while a build runs, applied once it is swapped in
+        self.pending: list[tuple[int, int, bool]] | None = None
+        self._load_lock = asyncio.Lock()
+
+
+    async def ensure_loaded(self, build: Callable[[], tuple[list, int]]) -> None:
+        """ Builds the graph once, `build` runs in the threadpool and returns `SocialGraph.build(...)`. """
+        async with self._load_lock:
+            if self.loaded:
+                return
+            self.pending = []
+            try:
+                self.adjacency, self.edges, self.repeated = await run_in_threadpool(build)
+                self.loaded = True
+                # the build may already have read these rows, so they are replayed without counting
+                for a, b, accepted in self.pending:
+                    if accepted:
+                        self._add(a, b, count=False)
+                    elif not self.repeated.get((min(a, b), max(a, b))):
+                        self._remove(a, b)
+            finally:
+                self.pending = None
+
+
+    @staticmethod
+    def build(edges: Iterable[tuple[int, int]]) -> tuple[list, int, dict]:
+        """ Adjacency arrays, edge count and `repeated` from (user id, user id) pairs, in any order and possibly repeated. """
+        adjacency: list[array | None] = []
+        for a, b in edges:
+            if a == b:
+                continue
+            top = a if a > b else b
+            if top >= len(adjacency):
+                adjacency.extend([None] * (top + 1 - len(adjacency)))
+            for u, v in ((a, b), (b, a)):
+                neighbours = adjacency[u]
+                if neighbours is None:
+                    neighbours = adjacency[u] = array("i")
+                neighbours.append(v)
+
+        total = 0
+        repeated = {}
+        for u, neighbours in enumerate(adjacency):
+            if neighbours is not None:
+                ordered = sorted(neighbours)
+                adjacency[u] = neighbours = array("i", sorted(set(ordered)))
+                total += len(neighbours)
+                if len(neighbours) < len(ordered):
+                    # each pair is counted from its smaller id
+                    for v, n in Counter(ordered).items():
+                        if n > 1 and u < v:
+                            repeated[(u, v)] = n - 1
+        return adjacency, total // 2, repeated
+
+
+    def neighbours(self, user_id: int) -> array:
+        if user_id < len(self.adjacency):
+            return self.adjacency[user_id] or EMPTY
+        return EMPTY
+
+
+    def connected(self, a: int, b: int) -> bool:
+        neighbours = self.neighbours(a)
+        i = bisect.bisect_left(neighbours, b)
+        return i < len(neighbours) and neighbours[i] == b
+
+
+    def apply(self, a: int, b: int, accepted: bool) -> None:
+        """ Counts an ACCEPTED contact row of two users in (`accepted`) or out. """
+        if self.pending is not None:
+            self.pending.append((a, b, accepted))
+            return
+        if not self.loaded or a == b:
+            return
+        if accepted:
+            self._add(a, b)
+        else:
+            self._remove(a, b)
+
+
+    def mutual(self, a: int, b: int) -> list[int]:
+        """ Contacts two users have in common, in id order. """
+        small, large = sorted((self.neighbours(a), self.neighbours(b)), key=len)
+        common = []
+        for v in small:
+            i = bisect.bisect_left(large, v)
+            if i < len(large) and large[i] == v:
+                common.append(v)
+        return common
+
+
+    def suggestions(self, user_id: int, limit: int) -> list[tuple[int, int]]:
+        """ Friends of friends who are not contacts yet, as (user id, mutual count), most mutual first. """
+        friends = self.neighbours(user_id)
+        counts = Counter()
+        for friend in friends[:GRAPH_MAX_FANOUT]:
+            counts.update(self.neighbours(friend)[:GRAPH_MAX_FANOUT])
+
+        counts.pop(user_id, None)
+        for friend in friends:
+            counts.pop(friend, None)
+        return counts.most_common(limit)
+
+
+    def _add(self, a: int, b: int, count: bool = True) -> None:
+        if count and self.connected(a, b):
+            pair = (min(a, b), max(a, b))
+            self.repeated[pair] = self.repeated.get(pair, 0) + 1
+            return
+        top = a if a > b else b
+        if top >= len(self.adjacency):
+            self.adjacency.extend([None] * (top + 1 - len(self.adjacency)))
+        added = False
+        for u, v in ((a, b), (b, a)):
+            neighbours = self.adjacency[u]
+            if neighbours is None:
+                neighbours = self.adjacency[u] = array("i")
+            i = bisect.bisect_left(neighbours, v)
+            if i == len(neighbours) or neighbours[i] != v:
+                neighbours.insert(i, v)
+                added = True
+        self.edges += added
+
+
+    def _remove(self, a: int, b: int) -> None:
+        pair = (min(a, b), max(a, b))
+        extra = self.repeated.get(pair)
+        if extra:
+            # another ACCEPTED row of the pair keeps the edge
+            if extra == 1:
+                del self.repeated[pair]
+            else:
+                self.repeated[pair] = extra - 1
+            return
+        removed = False
+        for u, v in ((a, b), (b, a)):
+            neighbours = self.neighbours(u)
+            i = bisect.bisect_left(neighbours, v)
+            if i < len(neighbours) and neighbours[i] == v:
+                del neighbours[i]
+                removed = True
+        self.edges -= removed
+
+
+def build_from_database() -> tuple[list, int, dict]:
+    """ Builds the graph from the ACCEPTED contacts, streamed on a session of its own (runs in a thread). """
+    with SessionLocal() as db:
+        graph = SocialGraph.build(ContactDAO(db).iter_accepted_edges())
+    logger.info("social graph built: %d users, %d edges", len(graph[0]), graph[1])
+    return graph
+
+
+social_graph = SocialGraph()
+
+
+# keep the graph current with the contact changes of every worker: only a row
+# entering or leaving ACCEPTED changes an edge's count
+def apply_contact_event(event: dict) -> None:
+    contact = event.get("contact")
+    if contact is None:
+        return
+    accepted = contact["status"] == Status.ACCEPTED
+    if accepted != (event.get("previous_status") == Status.ACCEPTED):
+        social_graph.apply(contact["current_user_id"], contact["friend_id"], accepted)
+
+
+event_bus.listeners.append(apply_contact_event)
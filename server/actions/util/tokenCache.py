@@ -0,0 +1,129 @@
+import hashlib
+import logging
+import os
+import time
+
+import jwt
+import redis
+
+from actions.util.eventBus import event_bus
+from actions.util.lruCache import LRUCache
+from actions.util.redisClient import get_redis
+
+logger = logging.getLogger(__name__)
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 20000))
+TOKEN_CACHE_TTL = int(os.getenv("TOKEN_CACHE_TTL", 300))
+
+
+class TokenCache():
+    """ Cache of verified access token payloads.
+
+        Keys are SHA-256 digests, so raw tokens are never held in memory longer
+        than the request. An entry lives at most TOKEN_CACHE_TTL seconds and
+        never past the token's own `exp` claim.
+
+        Revoking a token tombstones its digest until `exp`. With Redis the
+        tombstone is stored under `token:revoked:<digest>` and checked before
+        a token is cached, and every worker drops its cached payload through
+        the event bus, so a revocation holds on all workers. Without Redis it
+        only holds on the worker that revoked the token.
+    """
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE, ttl: int = TOKEN_CACHE_TTL):
+        self.cache = LRUCache(maxsize, ttl)
+        # digests of revoked tokens, kept until the token would have expired anyway
+        self.revoked = LRUCache(maxsize, float("inf"))
+        self.enabled = maxsize > 0
+
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+    @staticmethod
+    def redis_key(key: bytes) -> str:
+        return f"token:revoked:{key.hex()}"
+
+
+    def get(self, token: str) -> dict | None:
+        if not self.enabled:
+            return None
+        return self.cache.get(self.digest(token))
+
+
+    def set(self, token: str, payload: dict) -> None:
+        if not self.enabled:
+            return
+        # translate the wall clock `exp` claim onto the monotonic clock used by the cache
+        expires_at = time.monotonic() + (payload["exp"] - time.time())
+        self.cache.set(self.digest(token), payload, expires_at=expires_at)
+
+
+    async def is_revoked(self, token: str) -> bool:
+        key = self.digest(token)
+        if self.revoked.get(key) is not None:
+            return True
+
+        client = get_redis()
+        if client is None:
+            return False
+        try:
+            return await client.exists(self.redis_key(key)) > 0
+        except redis.RedisError as e:
+            logger.warning("token cache: redis revocation check failed: %s", e)
+            return False
+
+
+    async def revoke(self, token: str, payload: dict | None = None) -> None:
+        """ Tombstones the token until its `exp`, whether or not it was cached. """
+        key = self.digest(token)
+        payload = payload or self.cache.get(key)
+        if payload is None:
+            # only the expiry is needed, tokens with a bad signature are refused anyway
+            try:
+                payload = jwt.decode(token, options={"verify_signature": False, "verify_exp": False})
+            except jwt.InvalidTokenError:
+                return
+        remaining = payload["exp"] - time.time()
+        if remaining <= 0:
+            return
+
+        self.tombstone(key, remaining)
+        client = get_redis()
+        if client is not None:
+            try:
+                await client.set(self.redis_key(key), 1, ex=max(1, int(remaining) + 1))
+            except redis.RedisError as e:
+                logger.warning("token cache: redis revocation failed: %s", e)
+        # the other workers drop their cached payload when the event reaches them
+        await event_bus.publish([], {"type": "token_revoked", "digest": key.hex(), "remaining": remaining})
+
+
+    def tombstone(self, key: bytes, remaining: float) -> None:
+        self.cache.delete(key)
+        self.revoked.set(key, True, expires_at=time.monotonic() + remaining)
+
+
+    async def revoke_user(self, user_id: int) -> None:
+        """ Drops the user's cached payloads on every worker; their tokens are verified again on next use. """
+        self.drop_user(user_id)
+        await event_bus.publish([], {"type": "user_tokens_dropped", "user_id": user_id})
+
+
+    def drop_user(self, user_id: int) -> int:
+        # rare operation (e.g. logout everywhere), a full scan is acceptable
+        return self.cache.delete_where(lambda payload: payload.get("user_id") == user_id)
+
+
+token_cache = TokenCache()
+
+
+def apply_token_event(event: dict) -> None:
+    if event.get("type") == "token_revoked":
+        token_cache.tombstone(bytes.fromhex(event["digest"]), event["remaining"])
+    elif event.get("type") == "user_tokens_dropped":
+        token_cache.drop_user(event["user_id"])
+
+
+event_bus.listeners.append(apply_token_event)
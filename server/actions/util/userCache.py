@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import os
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy import event
+
+from models.user import User
+from schemas.user_schema import UserResponse
+from actions.util.lruCache import LRUCache
+from actions.util.eventBus import event_bus
+from actions.util.redisClient import get_redis
+
+logger = logging.getLogger(__name__)
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 10000))
+USER_CACHE_TTL = int(os.getenv("USER_CACHE_TTL", 60))
+# lifetime of the in-process entries, the longest a missed invalidation can go unnoticed on a worker
+USER_CACHE_LOCAL_TTL = int(os.getenv("USER_CACHE_LOCAL_TTL", 10))
+# second tier shared by all workers, only used when Redis is configured
+USER_CACHE_REDIS = os.getenv("USER_CACHE_REDIS", "0") == "1"
+
+
+class UserCache():
+    """ Identity cache for authenticated users.
+
+        Holds `UserResponse` snapshots (never ORM objects, they belong to a
+        session) keyed by user id. Lookups go to the in-process LRU first,
+        then to Redis, and only then to the database.
+
+        An ORM update or delete of the user row drops the entry here, in
+        Redis and, through the event bus, on every other worker. Writes that
+        bypass the mapper events (Core `update(User)`, executemany) must call
+        `invalidate` themselves; anything missed is bounded by the entry
+        lifetimes (USER_CACHE_LOCAL_TTL in process, USER_CACHE_TTL in Redis).
+        Bulk imports only insert new ids, which are never stale.
+    """
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: int = USER_CACHE_TTL, local_ttl: int = USER_CACHE_LOCAL_TTL, use_redis: bool = USER_CACHE_REDIS):
+        self.local = LRUCache(maxsize, min(ttl, local_ttl))
+        self.ttl = ttl
+        self.use_redis = use_redis
+        self.redis_hits = 0
+        self.redis_misses = 0
+        # the loop serving requests, invalidations from mapper events (any thread) are handed to it
+        self.loop: asyncio.AbstractEventLoop | None = None
+
+
+    def key(self, user_id: int) -> str:
+        return f"user:{user_id}"
+
+
+    async def get(self, user_id: int) -> UserResponse | None:
+        self.loop = asyncio.get_running_loop()
+        user = self.local.get(user_id)
+        if user is not None:
+            return user
+
+        client = self.redis
+        if client is None:
+            return None
+
+        try:
+            raw = await client.get(self.key(user_id))
+        except redis.RedisError as e:
+            logger.warning("user cache: redis get failed: %s", e)
+            return None
+
+        if raw is None:
+            self.redis_misses += 1
+            return None
+
+        self.redis_hits += 1
+        user = UserResponse.model_validate_json(raw)
+        self.local.set(user_id, user)
+        return user
+
+
+    async def set(self, user: User) -> UserResponse:
+        snapshot = UserResponse.model_validate(user)
+        self.local.set(snapshot.id, snapshot)
+
+        client = self.redis
+        if client is not None:
+            try:
+                await client.set(self.key(snapshot.id), snapshot.model_dump_json(), ex=self.ttl)
+            except redis.RedisError as e:
+                logger.warning("user cache: redis set failed: %s", e)
+        return snapshot
+
+
+    def invalidate(self, user_id: int) -> None:
+        """ Drops the user everywhere, callable from any thread (mapper events run in the threadpool with DB_MODE=sync). """
+        self.local.delete(user_id)
+        if self.loop is not None and not self.loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.invalidate_shared(user_id), self.loop)
+
+
+    async def invalidate_shared(self, user_id: int) -> None:
+        client = self.redis
+        if client is not None:
+            try:
+                await client.delete(self.key(user_id))
+            except redis.RedisError as e:
+                logger.warning("user cache: redis delete failed: %s", e)
+        # the other workers drop their local copy when the event reaches them
+        await event_bus.publish([], {"type": "user_changed", "user_id": user_id})
+
+
+    @property
+    def redis(self) -> aioredis.Redis | None:
+        return get_redis() if self.use_redis else None
+
+
+    def stats(self) -> dict:
+        return {
+            "local_hits": self.local.hits,
+            "local_misses": self.local.misses,
+            "redis_hits": self.redis_hits,
+            "redis_misses": self.redis_misses,
+            "size": len(self.local),
+        }
+
+
+user_cache = UserCache()
+
+
+# drop cached identities as soon as the user row changes
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_user(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.id)
+
+
+def drop_changed_user(event: dict) -> None:
+    if event.get("type") == "user_changed":
+        user_cache.local.delete(event["user_id"])
+
+
+event_bus.listeners.append(drop_changed_user)
@@ -0,0 +1,175 @@
+import asyncio
+import bisect
+import heapq
+import os
+import time
+from collections import Counter
+from operator import itemgetter
+
+from sqlalchemy import event
+
+from database import engine
+from models.user import User
+
+
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+# latency budget of one search; scoring stops and returns what it has once it is spent
+SEARCH_BUDGET_MS = int(os.getenv("SEARCH_BUDGET_MS", 50))
+# "database" uses the pg_trgm indexes (migration m0003), "memory" the UserSearchIndex below
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND") or ("database" if engine.dialect.name == "postgresql" else "memory")
+# minimum trigram similarity for a fuzzy (non prefix) match
+SEARCH_MIN_SIMILARITY = float(os.getenv("SEARCH_MIN_SIMILARITY", 0.3))
+# trigrams shared by more users than this are too common to tell matches apart, fuzzy search skips them
+SEARCH_MAX_POSTING = int(os.getenv("SEARCH_MAX_POSTING", 20000))
+
+
+def trigrams(text: str) -> set[str]:
+    """ Trigrams of the padded text, the same way pg_trgm builds them. """
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class UserSearchIndex():
+    """ In-memory prefix and trigram index over `username` and `name`.
+
+        Used when the database has no trigram index (SQLite in development).
+        Prefix lookups bisect a sorted list of lowercased keys; fuzzy lookups
+        count shared trigrams over posting sets and rank by similarity.
+        The index is loaded on first use and kept current by mapper events.
+    """
+    def __init__(self):
+        self.loaded = False
+        self.users: dict[int, tuple[int, str, str, str]] = {}
+        self.keys: list[tuple[str, int]] = []
+        self.postings: dict[str, set[int]] = {}
+        self._load_lock = asyncio.Lock()
+
+
+    async def ensure_loaded(self, fetch_rows) -> None:
+        """ Loads the index once, `fetch_rows` is awaited for the (id, name, username, email) rows. """
+        async with self._load_lock:
+            if not self.loaded:
+                self.load(await fetch_rows())
+
+
+    def load(self, rows) -> None:
+        """ Builds the index from (id, name, username, email) rows. """
+        self.users.clear()
+        self.postings.clear()
+        keys = []
+        for row in rows:
+            user = tuple(row)
+            self.users[user[0]] = user
+            keys.extend(self._keys(user))
+            self._post(user, add=True)
+        keys.sort()
+        self.keys = keys
+        self.loaded = True
+
+
+    def add(self, user: tuple[int, str, str, str]) -> None:
+        self.remove(user[0])
+        self.users[user[0]] = user
+        for key in self._keys(user):
+            bisect.insort(self.keys, key)
+        self._post(user, add=True)
+
+
+    def remove(self, user_id: int) -> None:
+        user = self.users.pop(user_id, None)
+        if user is None:
+            return
+        for key in self._keys(user):
+            i = bisect.bisect_left(self.keys, key)
+            if i < len(self.keys) and self.keys[i] == key:
+                del self.keys[i]
+        self._post(user, add=False)
+
+
+    def search(self, query: str, limit: int = SEARCH_DEFAULT_LIMIT, budget_ms: int = SEARCH_BUDGET_MS) -> list[tuple[int, str, str, str]]:
+        """ Ranked matches: exact, then prefix (shortest first), then trigram similarity. """
+        q = query.strip().lower()
+        deadline = time.perf_counter() + budget_ms / 1000
+        ranked: dict[int, tuple] = {}
+
+        # prefix matches on either key
+        i = bisect.bisect_left(self.keys, (q, -1))
+        while i < len(self.keys) and self.keys[i][0].startswith(q) and len(ranked) < limit * 4:
+            key, user_id = self.keys[i]
+            rank = (0 if key == q else 1, len(key), key)
+            if user_id not in ranked or rank < ranked[user_id]:
+                ranked[user_id] = rank
+            i += 1
+
+        # fuzzy matches, only needed when the prefixes did not fill the page
+        if len(ranked) < limit:
+            q_grams = trigrams(q)
+            # rarest trigrams first, they are the most selective; counting gets a third of the budget,
+            # since picking the best candidates afterwards costs about as much as counting them
+            postings = sorted((self.postings.get(gram, ()) for gram in q_grams), key=len)
+            count_deadline = deadline - budget_ms * 2 / 3000
+            shared = Counter()
+            started, counted = time.perf_counter(), 0
+            for ids in postings:
+                now = time.perf_counter()
+                # one posting cannot be interrupted, skip it when the rate so far says it would overrun
+                if len(ids) > SEARCH_MAX_POSTING or now + len(ids) * (now - started) / max(counted, 1) > count_deadline:
+                    break
+                shared.update(ids)
+                counted += len(ids)
+            # only the best candidates are scored, without sorting all of them
+            for user_id, _ in heapq.nlargest(limit * 4, shared.items(), key=itemgetter(1)):
+                if time.perf_counter() > deadline:
+                    break
+                if user_id in ranked or user_id not in self.users:
+                    continue
+                _, name, username, _ = self.users[user_id]
+                similarity = max(self._similarity(q_grams, username), self._similarity(q_grams, name))
+                if similarity >= SEARCH_MIN_SIMILARITY:
+                    ranked[user_id] = (2, -similarity, username)
+
+        best = sorted(ranked.items(), key=lambda item: item[1])[:limit]
+        # mapper events may remove a user while we rank, skip it rather than fail
+        return [self.users[user_id] for user_id, _ in best if user_id in self.users]
+
+
+    @staticmethod
+    def _similarity(q_grams: set[str], text: str) -> float:
+        grams = trigrams(text.lower())
+        shared = len(q_grams & grams)
+        return shared / (len(q_grams) + len(grams) - shared)
+
+
+    @staticmethod
+    def _keys(user: tuple[int, str, str, str]) -> list[tuple[str, int]]:
+        user_id, name, username, _ = user
+        return [(username.lower(), user_id), (name.lower(), user_id)]
+
+
+    def _post(self, user: tuple[int, str, str, str], add: bool) -> None:
+        user_id, name, username, _ = user
+        for gram in trigrams(username.lower()) | trigrams(name.lower()):
+            if add:
+                self.postings.setdefault(gram, set()).add(user_id)
+            else:
+                ids = self.postings.get(gram)
+                if ids is not None:
+                    ids.discard(user_id)
+
+
+user_search_index = UserSearchIndex()
+
+
+# keep the index current once it has been loaded
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+def index_user(mapper, connection, target: User) -> None:
+    if user_search_index.loaded:
+        user_search_index.add((target.id, target.name, target.username, target.email))
+
+
+@event.listens_for(User, "after_delete")
+def unindex_user(mapper, connection, target: User) -> None:
+    if user_search_index.loaded:
+        user_search_index.remove(target.id)
@@ -0,0 +1,131 @@
+""" Concurrency benchmark for the DAO layer: blocking Session vs AsyncSession.
+
+    Many coroutines look users up by id while a few others run a deliberately
+    slow query, which is what one heavy request does to a uvicorn worker.
+
+        sync-inline      UserDAO on SessionLocal, called on the event loop (old behaviour)
+        sync-threadpool  AsyncUserDAO on SessionLocal (DB_MODE=sync)
+        async            AsyncUserDAO on AsyncSessionLocal (DB_MODE=async)
+
+    On SQLite the asyncio driver gives no gain: aiosqlite still runs each
+    connection on a thread and adds a loop hop per result, and a run with
+    --users 5000 --concurrency 30 --requests 20 measured
+
+        sync-threadpool  p50   17.5 ms  p99   83.7 ms  1069 req/s
+        async            p50   52.8 ms  p99  476.8 ms   334 req/s
+
+    which is why DB_MODE defaults to "sync" for SQLite. The async path is
+    meant for PostgreSQL/asyncpg; point DB_URL at a PostgreSQL database to
+    compare the modes there before relying on it.
+
+    Usage:
+        python -m benchmarks.bench_async_db --users 20000 --concurrency 50
+        DB_URL=postgresql://... python -m benchmarks.bench_async_db
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+# every coroutine holds a session, the pool must not be the bottleneck being measured
+os.environ.setdefault("DB_POOL_SIZE", "200")
+
+from sqlalchemy import insert, text
+
+from database import Base, engine, async_engine, SessionLocal, AsyncSessionLocal
+from actions.dal.usersDAO import UserDAO
+from actions.dal.asyncDAO import AsyncUserDAO
+from models.user import User
+
+SLOW_QUERY = text("SELECT count(*) FROM users a JOIN users b ON a.id % 97 = b.id % 89 WHERE a.id < :n")
+
+
+def seed(n: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(User.__table__.delete())
+        conn.execute(insert(User), [
+            {"name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com", "password": "x"}
+            for i in range(1, n + 1)
+        ])
+
+
+def make_session(mode: str):
+    return AsyncSessionLocal() if mode == "async" else SessionLocal()
+
+
+async def close_session(mode: str, db) -> None:
+    if mode == "async":
+        await db.close()
+    else:
+        db.close()
+
+
+async def run_query(mode: str, db, fn):
+    if mode == "sync-inline":
+        return fn(db)
+    if mode == "async":
+        return await db.run_sync(fn)
+    return await asyncio.to_thread(fn, db)
+
+
+async def slow_worker(mode: str, stop: asyncio.Event, n: int) -> None:
+    db = make_session(mode)
+    try:
+        while not stop.is_set():
+            await run_query(mode, db, lambda s: s.execute(SLOW_QUERY, {"n": n}).scalar())
+            await asyncio.sleep(0)
+    finally:
+        await close_session(mode, db)
+
+
+async def fast_worker(mode: str, requests: int, users: int, samples: list[float]) -> None:
+    db = make_session(mode)
+    dao = UserDAO(db) if mode == "sync-inline" else AsyncUserDAO(db)
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            result = dao.get_user_by_id(random.randint(1, users))
+            if mode != "sync-inline":
+                await result
+            samples.append(time.perf_counter() - start)
+            await asyncio.sleep(0)
+    finally:
+        await close_session(mode, db)
+
+
+async def run_mode(mode: str, args) -> dict:
+    samples: list[float] = []
+    stop = asyncio.Event()
+    slow = [asyncio.create_task(slow_worker(mode, stop, args.slow_rows)) for _ in range(args.slow)]
+    start = time.perf_counter()
+    await asyncio.gather(*(fast_worker(mode, args.requests, args.users, samples) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*slow)
+    # pooled asyncio connections are bound to this event loop
+    await async_engine.dispose()
+    return summarize(samples, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50, help="coroutines issuing fast lookups")
+    parser.add_argument("--requests", type=int, default=40, help="lookups per coroutine")
+    parser.add_argument("--slow", type=int, default=2, help="coroutines issuing the slow query")
+    parser.add_argument("--slow-rows", type=int, default=2000)
+    parser.add_argument("--modes", default="sync-inline,sync-threadpool,async")
+    args = parser.parse_args()
+
+    seed(args.users)
+    results = {mode: asyncio.run(run_mode(mode, args)) for mode in args.modes.split(",")}
+    print_table(f"get_user_by_id latency with {args.slow} concurrent slow queries", results)
+
+
+if __name__ == "__main__":
+    main()
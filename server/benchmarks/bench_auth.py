@@ -0,0 +1,97 @@
+""" Requests per second on /user/current-user with the old BaseHTTPMiddleware
+    auth layer versus the `verify_jwt` dependency.
+
+    The legacy middleware is reproduced here so both variants can be measured
+    against the same tree.
+
+    Usage:
+        python -m benchmarks.bench_auth --requests 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from database import Base, engine, async_engine, SessionLocal
+from actions.util.jwtHelper import JwtHelper
+from models.user import User
+from routers.user_api import u_api
+from routers.middleware.auth import EXCLUDED_PATHS, verify_jwt
+
+
+class LegacyJWTMiddleWare(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        if request.url.path in EXCLUDED_PATHS:
+            return await call_next(request)
+        db = SessionLocal()
+        try:
+            await JwtHelper(db).verify_token(request)
+            response = await call_next(request)
+        except HTTPException as e:
+            return JSONResponse(content={"detail": e.detail}, status_code=e.status_code)
+        finally:
+            db.close()
+        return response
+
+
+def build_app(variant: str) -> FastAPI:
+    if variant == "legacy-middleware":
+        app = FastAPI()
+        app.add_middleware(LegacyJWTMiddleWare)
+    else:
+        app = FastAPI(dependencies=[Depends(verify_jwt)])
+    app.include_router(u_api, prefix="/user")
+    return app
+
+
+def seed_user() -> int:
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        user = db.query(User).filter(User.username == "bench").first()
+        if user is None:
+            user = User(name="Bench", username="bench", email="bench@example.com", password="x")
+            db.add(user)
+            db.commit()
+        return user.id
+
+
+async def run_variant(variant: str, token: str, args) -> dict:
+    transport = httpx.ASGITransport(app=build_app(variant))
+    samples: list[float] = []
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies={"jwt_token": token}) as client:
+        async def worker(n: int):
+            for _ in range(n):
+                start = time.perf_counter()
+                res = await client.get("/user/current-user")
+                res.raise_for_status()
+                samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(args.requests // args.concurrency) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    await async_engine.dispose()
+    return summarize(samples, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    user_id = seed_user()
+    token = asyncio.run(JwtHelper.create_access_token({"user_id": user_id}))
+    results = {variant: asyncio.run(run_variant(variant, token, args)) for variant in ("legacy-middleware", "dependency")}
+    print_table("GET /user/current-user", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+""" Query plans and timings of the ContactDAO lookups without and with the
+    contact indexes from migrations/m0002_contact_indexes.py.
+
+    Seeds users and contacts into a local database (a throwaway SQLite file
+    unless DB_URL is set), drops the indexes, measures every DAO method, then
+    recreates the indexes through the migration and measures again.
+
+    Usage:
+        python -m benchmarks.bench_contact_indexes --users 100000 --contacts 2000000
+"""
+import argparse
+import random
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+from sqlalchemy import event, insert, text
+
+from database import Base, engine, SessionLocal
+from actions.dal.contactDAO import ContactDAO
+from migrations import m0002_contact_indexes
+from models.contact import Contact
+from models.enum.status import Status
+from models.user import User
+from schemas.contact_schema import ContactForm
+
+BATCH = 50000
+STATUSES = [Status.REQUESTED, Status.ACCEPTED, Status.ACCEPTED, Status.REJECTED, Status.BLOCKED, Status.REMOVED]
+
+
+def seed(users: int, contacts: int) -> None:
+    Base.metadata.drop_all(bind=engine, tables=[Contact.__table__, User.__table__])
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Contact.__table__])
+    now = datetime.now()
+    with engine.begin() as conn:
+        for start in range(1, users + 1, BATCH):
+            conn.execute(insert(User), [
+                {"name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com", "password": "x"}
+                for i in range(start, min(start + BATCH, users + 1))
+            ])
+        for start in range(0, contacts, BATCH):
+            rows = []
+            for _ in range(min(BATCH, contacts - start)):
+                a, b = random.sample(range(1, users + 1), 2)
+                rows.append({"current_user_id": a, "friend_id": b, "status": random.choice(STATUSES), "last_updated": now})
+            conn.execute(insert(Contact), rows)
+            print(f"  seeded {start + len(rows):,} contacts", end="\r")
+    print()
+
+
+def set_indexes(enabled: bool) -> None:
+    with engine.begin() as conn:
+        if enabled:
+            m0002_contact_indexes.upgrade(conn)
+        else:
+            for name in m0002_contact_indexes.INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        if engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+
+
+def explain(sql: str, params) -> list[str]:
+    prefix = "EXPLAIN QUERY PLAN " if engine.dialect.name == "sqlite" else "EXPLAIN "
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(prefix + sql, params).fetchall()
+    return [" ".join(str(col) for col in row) for row in rows]
+
+
+def cases(users: int) -> dict:
+    def user():
+        return SimpleNamespace(id=random.randint(1, users))
+
+    def pair():
+        a, b = random.sample(range(1, users + 1), 2)
+        return ContactForm(current_user_id=a, friend_id=b)
+
+    return {
+        "get_requests_sent": lambda dao: dao.get_requests_sent(user()),
+        "get_contact_requests_to_me": lambda dao: dao.get_contact_requests_to_me(user()),
+        "get_contacts(ACCEPTED)": lambda dao: dao.get_contacts(user(), Status.ACCEPTED),
+        "get_all_contacts": lambda dao: dao.get_all_contacts(user()),
+        "contact_exists": lambda dao: dao.contact_exists(pair()),
+        "contact_exists_by_id": lambda dao: dao.contact_exists_by_id(user(), random.randint(1, users)),
+    }
+
+
+def measure(users: int, iterations: int, label: str) -> dict:
+    results = {}
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    with SessionLocal() as db:
+        dao = ContactDAO(db)
+        for name, case in cases(users).items():
+            captured.clear()
+            event.listen(engine, "before_cursor_execute", capture)
+            case(dao)
+            event.remove(engine, "before_cursor_execute", capture)
+            print(f"\n[{label}] {name}")
+            for line in explain(*captured[-1]):
+                print(f"    {line}")
+
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                case(dao)
+                samples.append(time.perf_counter() - start)
+                db.expunge_all()
+            results[f"{label}: {name}"] = summarize(samples)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--contacts", type=int, default=2000000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in DB_URL")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.users, args.contacts)
+
+    results = {}
+    set_indexes(False)
+    results.update(measure(args.users, args.iterations, "no indexes"))
+    set_indexes(True)
+    results.update(measure(args.users, args.iterations, "indexed"))
+    print_table("ContactDAO timings", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+""" Throughput of concurrent accept/reject calls: the old exists-check + select +
+    update path versus the single UPDATE ... RETURNING transition.
+
+    Usage:
+        python -m benchmarks.bench_contact_transitions --contacts 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+from sqlalchemy import insert
+
+from database import Base, engine, async_engine, AsyncSessionLocal
+from actions.dal.asyncDAO import AsyncContactDAO
+from models.contact import Contact
+from models.contactCounter import ContactCounter
+from migrations import m0004_contact_counters
+from models.enum.action import Action
+from models.enum.status import Status
+from models.user import User
+
+ACTION_STATUS = {Action.ACCEPT: Status.ACCEPTED, Action.REJECT: Status.REJECTED}
+
+
+def seed(users: int, contacts: int) -> list[tuple[int, int]]:
+    """ Creates REQUESTED contacts and returns (contact id, receiver id) pairs. """
+    Base.metadata.drop_all(bind=engine, tables=[ContactCounter.__table__, Contact.__table__, User.__table__])
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Contact.__table__, ContactCounter.__table__])
+    now = datetime.now()
+    rows = []
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com", "password": "x"}
+            for i in range(1, users + 1)
+        ])
+        for contact_id in range(1, contacts + 1):
+            a, b = random.sample(range(1, users + 1), 2)
+            rows.append({"id": contact_id, "current_user_id": a, "friend_id": b, "status": Status.REQUESTED, "last_updated": now})
+        conn.execute(insert(Contact), rows)
+        m0004_contact_counters.backfill(conn)
+    return [(row["id"], row["friend_id"]) for row in rows]
+
+
+async def legacy(dao: AsyncContactDAO, user, contact_id: int, action: Action) -> None:
+    if await dao.contact_exists_by_id(user, contact_id):
+        await dao.update_contact_status(contact_id, ACTION_STATUS[action], user)
+
+
+async def transition(dao: AsyncContactDAO, user, contact_id: int, action: Action) -> None:
+    await dao.transition_contact(user, contact_id, action)
+
+
+async def run_case(call, work: list[tuple[int, int]], concurrency: int) -> dict:
+    queue = list(work)
+    samples: list[float] = []
+
+    async def worker():
+        async with AsyncSessionLocal() as db:
+            dao = AsyncContactDAO(db)
+            while queue:
+                contact_id, receiver = queue.pop()
+                start = time.perf_counter()
+                await call(dao, SimpleNamespace(id=receiver), contact_id, random.choice(list(ACTION_STATUS)))
+                samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await async_engine.dispose()
+    return summarize(samples, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--contacts", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    results = {}
+    for name, call in (("exists + select + update", legacy), ("UPDATE ... RETURNING", transition)):
+        work = seed(args.users, args.contacts)
+        results[name] = asyncio.run(run_case(call, work, args.concurrency))
+    print_table("concurrent accept/reject", results)
+
+
+if __name__ == "__main__":
+    main()
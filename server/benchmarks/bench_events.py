@@ -0,0 +1,167 @@
+""" Contact event streams: connected clients per worker and delivery latency.
+
+    Starts uvicorn on a seeded database, opens --clients event streams
+    (GET /contact/events, one user each) and then sends contact requests to
+    them through POST /contact/add-contact. Latency runs from the moment the
+    request is sent to the moment the receiving stream gets the event.
+
+    With more than one worker the events cross workers, so REDIS_URL must
+    point to a Redis server:
+
+        python -m benchmarks.bench_events --clients 2000 --messages 500
+        REDIS_URL=redis://localhost:6379/0 python -m benchmarks.bench_events --workers 4 --clients 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+os.environ.setdefault("REDIS_URL", "")
+
+import httpx
+from sqlalchemy import insert
+
+import migrations
+from database import engine
+from actions.util.jwtHelper import JwtHelper
+from models.user import User
+
+
+def seed(users: int) -> None:
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com", "password": "-"}
+            for i in range(1, users + 1)
+        ])
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid: int) -> float:
+    """ Resident memory of a process and its children (Linux only, 0 elsewhere). """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            rss = next(int(line.split()[1]) for line in f if line.startswith("VmRSS"))
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            children = [int(c) for c in f.read().split()]
+    except (OSError, StopIteration):
+        return 0.0
+    return rss / 1024 + sum(rss_mb(child) for child in children)
+
+
+async def wait_ready(base_url: str, timeout: float = 30) -> None:
+    start = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        while time.perf_counter() - start < timeout:
+            try:
+                await client.get(f"{base_url}/openapi.json")
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.05)
+    raise TimeoutError("server did not start")
+
+
+async def listen(client: httpx.AsyncClient, user_id: int, token: str, connected: asyncio.Event,
+                 sent: dict[int, float], latencies: list[float]) -> None:
+    async with client.stream("GET", "/contact/events", headers={"Cookie": f"jwt_token={token}"}) as res:
+        async for line in res.aiter_lines():
+            if line.startswith("retry:"):
+                connected.set()
+            elif line.startswith("data:"):
+                contact = json.loads(line[5:])
+                if contact["friend_id"] == user_id and user_id in sent:
+                    latencies.append(time.perf_counter() - sent[user_id])
+
+
+async def run(args, base_url: str) -> dict:
+    sender = args.clients + 1
+    tokens = {i: await JwtHelper.create_access_token({"user_id": i}, timedelta(hours=1)) for i in range(1, sender + 1)}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    sent: dict[int, float] = {}
+    latencies: list[float] = []
+    posts: list[float] = []
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        connect_start = time.perf_counter()
+        events = {i: asyncio.Event() for i in range(1, args.clients + 1)}
+        listeners = [asyncio.create_task(listen(client, i, tokens[i], events[i], sent, latencies)) for i in events]
+        await asyncio.wait_for(asyncio.gather(*(e.wait() for e in events.values())), args.timeout)
+        connect_elapsed = time.perf_counter() - connect_start
+
+        # one request per receiver, so every add-contact creates a new contact
+        receivers = random.sample(range(1, args.clients + 1), min(args.messages, args.clients))
+        send_start = time.perf_counter()
+        for receiver in receivers:
+            sent[receiver] = start = time.perf_counter()
+            res = await client.post("/contact/add-contact", json={"current_user_id": sender, "friend_id": receiver},
+                                    headers={"Cookie": f"jwt_token={tokens[sender]}"})
+            res.raise_for_status()
+            posts.append(time.perf_counter() - start)
+            if args.rate:
+                await asyncio.sleep(1 / args.rate)
+
+        deadline = time.perf_counter() + args.timeout
+        while len(latencies) < len(receivers) and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        send_elapsed = time.perf_counter() - send_start
+
+        for task in listeners:
+            task.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+
+    return {
+        "connect_s": connect_elapsed,
+        "delivered": len(latencies),
+        "expected": len(receivers),
+        "POST /contact/add-contact": summarize(posts, send_elapsed),
+        "event delivery": summarize(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--messages", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=0, help="messages per second (0 sends back to back)")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    if args.workers > 1 and not os.environ["REDIS_URL"]:
+        sys.exit("--workers > 1 needs REDIS_URL, events only cross workers through Redis")
+
+    seed(args.clients + 1)
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port),
+                               "--workers", str(args.workers), "--log-level", "warning"])
+    try:
+        asyncio.run(wait_ready(base_url))
+        result = asyncio.run(run(args, base_url))
+        memory = rss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"\n{args.clients} streams on {args.workers} worker(s) ({args.clients / args.workers:.0f} per worker), "
+          f"connected in {result['connect_s']:.2f}s, server RSS {memory:.0f} MB")
+    print(f"delivered {result['delivered']}/{result['expected']} events")
+    print_table("contact events", {k: result[k] for k in ("POST /contact/add-contact", "event delivery")})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+""" Full table export: streamed NDJSON/CSV versus loading the table with `.all()`.
+
+    Seeds --users users, then exports them three ways and reports rows per
+    second and the peak Python memory (tracemalloc) of each:
+
+        all()    UserDAO.get_all_users() and one json document (the old way)
+        ndjson   stream_export(..., "ndjson")
+        csv      stream_export(..., "csv")
+
+    Run it at a few sizes: the streamed peaks stay flat, the all() one grows
+    with the table.
+
+    Usage:
+        python -m benchmarks.bench_export --users 100000 1000000
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.common import configure_env
+
+configure_env()
+
+from sqlalchemy import insert
+
+from database import Base, engine, async_engine, SessionLocal
+from actions.dal.usersDAO import UserDAO
+from actions.util.exporter import stream_export
+from models.contact import Contact
+from models.contactCounter import ContactCounter
+from models.user import User
+from schemas.user_schema import UserResponse
+
+BATCH = 50000
+
+
+def seed(users: int) -> None:
+    Base.metadata.drop_all(bind=engine, tables=[ContactCounter.__table__, Contact.__table__, User.__table__])
+    Base.metadata.create_all(bind=engine, tables=[User.__table__])
+    with engine.begin() as conn:
+        for start in range(1, users + 1, BATCH):
+            conn.execute(insert(User), [
+                {"name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com", "password": "x" * 60}
+                for i in range(start, min(start + BATCH, users + 1))
+            ])
+
+
+async def load_all() -> tuple[int, int]:
+    with SessionLocal() as db:
+        users = UserDAO(db).get_all_users()
+        body = json.dumps([UserResponse.model_validate(u).model_dump() for u in users])
+    return len(users), len(body)
+
+
+async def streamed(fmt: str) -> tuple[int, int]:
+    rows = size = 0
+    async for chunk in stream_export(UserDAO.export_query(), fmt):
+        rows += chunk.count(b"\n")
+        size += len(chunk)
+    # the CSV header line is not a row
+    return rows - (fmt == "csv"), size
+
+
+async def measure(call, *args) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows, size = await call(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"rows": rows, "rows_per_s": rows / elapsed, "mb": size / 2**20, "peak_mb": peak / 2**20}
+
+
+async def run() -> dict:
+    results = {
+        "all()": await measure(load_all),
+        "ndjson": await measure(streamed, "ndjson"),
+        "csv": await measure(streamed, "csv"),
+    }
+    await async_engine.dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[100000])
+    args = parser.parse_args()
+
+    for users in args.users:
+        seed(users)
+        print(f"\n{users} users ({datetime.now():%H:%M:%S})")
+        for name, r in asyncio.run(run()).items():
+            print(f"  {name:<8} {r['rows']:>9} rows  {r['rows_per_s']:12.0f} rows/s  {r['mb']:8.1f} MB out  peak {r['peak_mb']:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
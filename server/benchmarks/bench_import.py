@@ -0,0 +1,95 @@
+""" Onboarding users: one create_user per row versus the bulk import pipeline.
+
+    one-by-one  UserDAO.create_user for each row (inline bcrypt, one commit per row)
+    bulk        BulkImport over the same rows as NDJSON (batched validation,
+                parallel bcrypt on --workers processes, one dedupe query and
+                one executemany per batch)
+
+    Every run imports --users fresh users into an emptied table; the bulk
+    import then runs again over the same file to time the dedupe-only path.
+    bcrypt dominates both, so keep --users modest for the one-by-one case.
+
+    Usage:
+        python -m benchmarks.bench_import --users 500 --workers 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from benchmarks.common import configure_env
+
+configure_env()
+
+from database import Base, engine, SessionLocal
+from actions.dal.usersDAO import UserDAO
+from actions.util.bulkImport import BulkImport
+from actions.util.passwordHasher import PasswordHasher
+from models.contact import Contact
+from models.contactCounter import ContactCounter
+from models.user import User
+from schemas.user_schema import UserCreate
+
+
+def reset() -> None:
+    Base.metadata.drop_all(bind=engine, tables=[ContactCounter.__table__, Contact.__table__, User.__table__])
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Contact.__table__, ContactCounter.__table__])
+
+
+def records(users: int) -> list[dict]:
+    return [
+        {"name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com", "password": f"secret-{i}"}
+        for i in range(1, users + 1)
+    ]
+
+
+def one_by_one(rows: list[dict]) -> dict:
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        dao = UserDAO(db)
+        for row in rows:
+            dao.create_user(UserCreate(**row))
+    elapsed = time.perf_counter() - start
+    return {"imported": len(rows), "s": elapsed, "rows_per_s": len(rows) / elapsed}
+
+
+async def bulk(rows: list[dict], workers: int, batch_size: int) -> dict:
+    async def lines():
+        for row in rows:
+            yield json.dumps(row)
+
+    hasher = PasswordHasher(workers=workers, kind="process")
+    start = time.perf_counter()
+    try:
+        with SessionLocal() as db:
+            async for report in BulkImport("users", db, hasher, batch_size).run(lines(), "ndjson"):
+                pass
+    finally:
+        hasher.shutdown()
+    elapsed = time.perf_counter() - start
+    return {"imported": report["imported"], "s": elapsed, "rows_per_s": len(rows) / elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    rows = records(args.users)
+    results = {}
+    reset()
+    results["one-by-one"] = one_by_one(rows)
+    reset()
+    results["bulk"] = asyncio.run(bulk(rows, args.workers, args.batch_size))
+    results["bulk (all dupes)"] = asyncio.run(bulk(rows, args.workers, args.batch_size))
+
+    print(f"\n{args.users} users, {args.workers} bcrypt workers")
+    for name, r in results.items():
+        print(f"  {name:<17} {r['imported']:>8} imported  {r['s']:9.2f}s  {r['rows_per_s']:10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
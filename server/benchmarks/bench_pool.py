@@ -0,0 +1,74 @@
+""" Pool stress test: more concurrent requests than pooled connections.
+
+    Each simulated request checks a connection out through the DAO layer,
+    holds it for --hold-ms (a slow handler) and releases it. Requests that
+    cannot get a connection within DB_POOL_TIMEOUT fail the way the app
+    answers them: 503 with Retry-After.
+
+    Pool settings come from the environment, e.g.
+
+        DB_POOL_SIZE=5 DB_MAX_OVERFLOW=0 DB_POOL_TIMEOUT=0.5 \
+            python -m benchmarks.bench_pool --concurrency 50 --hold-ms 100
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from database import (Base, engine, async_engine, AsyncSessionLocal,
+                      DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT)
+from actions.dal.asyncDAO import AsyncUserDAO
+
+
+async def request(hold: float, ok: list[float], rejected: list[float]) -> None:
+    start = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            await AsyncUserDAO(db).get_user_by_id(1)
+            await asyncio.sleep(hold)
+        ok.append(time.perf_counter() - start)
+    except PoolTimeoutError:
+        rejected.append(time.perf_counter() - start)
+
+
+async def run(args) -> dict:
+    ok: list[float] = []
+    rejected: list[float] = []
+    pending = args.requests
+
+    async def client():
+        nonlocal pending
+        while pending > 0:
+            pending -= 1
+            await request(args.hold_ms / 1000, ok, rejected)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    await async_engine.dispose()
+    return {"served": summarize(ok, elapsed), "rejected (503)": summarize(rejected, elapsed)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--hold-ms", type=float, default=100)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    results = asyncio.run(run(args))
+    print_table(
+        f"pool_size={DB_POOL_SIZE} max_overflow={DB_MAX_OVERFLOW} pool_timeout={DB_POOL_TIMEOUT}s, "
+        f"concurrency={args.concurrency}, hold={args.hold_ms}ms",
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
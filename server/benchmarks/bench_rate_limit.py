@@ -0,0 +1,63 @@
+""" Cost of the login rate limit check, which runs before every login attempt.
+
+    Times `SlidingWindowLimiter.hit` with the in-process counters and, when
+    available, with fakeredis and a real Redis server (REDIS_URL). Keys are
+    spread over --keys usernames so both allowed and rejected paths are hit.
+
+    Usage:
+        python -m benchmarks.bench_rate_limit --iterations 20000
+        REDIS_URL=redis://localhost:6379/0 python -m benchmarks.bench_rate_limit
+"""
+import argparse
+import asyncio
+import os
+import random
+import time
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+import redis.asyncio as aioredis
+
+from actions.util.rateLimiter import SlidingWindowLimiter
+from actions.util.redisClient import set_redis
+
+
+async def run_case(client, iterations: int, keys: int) -> dict:
+    set_redis(client)
+    limiter = SlidingWindowLimiter(f"bench:{random.random()}", limit=10, window=60)
+    samples: list[float] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        key = f"user{random.randrange(keys)}"
+        t = time.perf_counter()
+        await limiter.hit(key)
+        samples.append(time.perf_counter() - t)
+    result = summarize(samples, time.perf_counter() - start)
+    set_redis(None)
+    if client is not None:
+        await client.aclose()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--keys", type=int, default=1000)
+    args = parser.parse_args()
+
+    results = {"in-process": asyncio.run(run_case(None, args.iterations, args.keys))}
+    try:
+        import fakeredis
+        results["fakeredis"] = asyncio.run(run_case(fakeredis.FakeAsyncRedis(), args.iterations, args.keys))
+    except ImportError:
+        pass
+    if os.getenv("REDIS_URL"):
+        results["redis"] = asyncio.run(run_case(aioredis.from_url(os.environ["REDIS_URL"]), args.iterations, args.keys))
+
+    print_table("SlidingWindowLimiter.hit", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+""" List responses before and after the mapping + FastJSONResponse path.
+
+    before: ORM objects from the DAO, validated row by row (UserResponse for
+            /user/all-users, jsonable_encoder for /contact/requests-to-me)
+            and encoded by the stdlib JSONResponse
+    after:  plain mappings from the DAO encoded by FastJSONResponse
+
+    Each case is one full page of --rows rows (fetch + serialize), measured
+    at every size given.
+
+    Usage:
+        python -m benchmarks.bench_serialization --rows 10000 100000 --repeat 5
+"""
+import argparse
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
+
+from database import Base, engine, SessionLocal
+from actions.dal.contactDAO import ContactDAO
+from actions.dal.usersDAO import UserDAO
+from actions.util.fastJson import FastJSONResponse, orjson
+from models.contact import Contact
+from models.contactCounter import ContactCounter
+from models.enum.status import Status
+from models.user import User
+from schemas.user_schema import UserResponse
+
+BATCH = 50000
+
+
+def seed(rows: int) -> None:
+    """ `rows` users, each with a pending request to user 1. """
+    Base.metadata.drop_all(bind=engine, tables=[ContactCounter.__table__, Contact.__table__, User.__table__])
+    Base.metadata.create_all(bind=engine, tables=[User.__table__, Contact.__table__])
+    now = datetime.now()
+    with engine.begin() as conn:
+        for start in range(1, rows + 2, BATCH):
+            conn.execute(insert(User), [
+                {"name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com", "password": "x" * 60}
+                for i in range(start, min(start + BATCH, rows + 2))
+            ])
+        for start in range(2, rows + 2, BATCH):
+            conn.execute(insert(Contact), [
+                {"current_user_id": i, "friend_id": 1, "status": Status.REQUESTED, "last_updated": now}
+                for i in range(start, min(start + BATCH, rows + 2))
+            ])
+
+
+def users_before(db, rows: int) -> bytes:
+    users = UserDAO(db).get_all_users(None, rows)
+    return JSONResponse(jsonable_encoder([UserResponse.model_validate(u) for u in users])).body
+
+
+def users_after(db, rows: int) -> bytes:
+    return FastJSONResponse(UserDAO(db).get_all_user_rows(None, rows)).body
+
+
+def requests_before(db, rows: int) -> bytes:
+    contacts = ContactDAO(db).get_contact_requests_to_me(SimpleNamespace(id=1), None, rows)
+    return JSONResponse(jsonable_encoder(contacts)).body
+
+
+def requests_after(db, rows: int) -> bytes:
+    return FastJSONResponse(ContactDAO(db).get_requests_to_me_rows(SimpleNamespace(id=1), None, rows)).body
+
+
+def measure(call, rows: int, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        # a fresh session each time, so no identity map is reused between runs
+        with SessionLocal() as db:
+            start = time.perf_counter()
+            call(db, rows)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seed(max(args.rows))
+    print(f"encoder: {'orjson' if orjson is not None else 'pydantic-core'}")
+    for rows in args.rows:
+        print_table(f"{rows} rows per page", {
+            "all-users before": measure(users_before, rows, args.repeat),
+            "all-users after": measure(users_after, rows, args.repeat),
+            "requests-to-me before": measure(requests_before, rows, args.repeat),
+            "requests-to-me after": measure(requests_after, rows, args.repeat),
+        })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+""" Social graph index at scale: build time, memory and query latency.
+
+    Generates a random graph (--users, --edges; a share of the users are
+    hubs with many more contacts than the rest) directly in memory, builds
+    the SocialGraph from it and times `mutual` and `suggestions` for random
+    users, plus single edge updates.
+
+    Usage:
+        python -m benchmarks.bench_social_graph --users 1000000 --edges 20000000
+"""
+import argparse
+import random
+import resource
+import sys
+import time
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+from actions.util.socialGraph import SocialGraph
+
+
+def random_edges(users: int, edges: int, hub_share: float):
+    # hubs are the lowest ids, one end of `hub_share` of the edges is a hub
+    hubs = max(1, users // 1000)
+    for _ in range(edges):
+        a = random.randint(1, hubs) if random.random() < hub_share else random.randint(1, users)
+        yield a, random.randint(1, users)
+
+
+def max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def timed(samples: list[float], call, *args):
+    start = time.perf_counter()
+    result = call(*args)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--edges", type=int, default=20_000_000)
+    parser.add_argument("--hub-share", type=float, default=0.05, help="share of the edges attached to a hub")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    rss_before = max_rss_mb()
+    start = time.perf_counter()
+    graph = SocialGraph()
+    graph.adjacency, graph.edges, graph.repeated = SocialGraph.build(random_edges(args.users, args.edges, args.hub_share))
+    graph.loaded = True
+    build_s = time.perf_counter() - start
+    print(f"\nbuilt {graph.edges:,} edges over {len(graph.adjacency) - 1:,} users in {build_s:.1f}s, "
+          f"max RSS +{max_rss_mb() - rss_before:.0f} MB")
+
+    mutual: list[float] = []
+    suggestions: list[float] = []
+    updates: list[float] = []
+    for _ in range(args.queries):
+        a, b = random.randint(1, args.users), random.randint(1, args.users)
+        timed(mutual, graph.mutual, a, b)
+        timed(suggestions, graph.suggestions, a, args.limit)
+        timed(updates, graph.apply, a, b, True)
+        timed(updates, graph.apply, a, b, False)
+
+    print_table(f"{args.queries} random users", {
+        "mutual": summarize(mutual),
+        "suggestions": summarize(suggestions),
+        "edge add/remove": summarize(updates),
+    })
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+""" Worker startup cost: import time of `main` and time to first request.
+
+    Both are measured in fresh interpreters, the way uvicorn starts every
+    worker (and every `--reload`). The first request is timed from process
+    spawn until uvicorn answers GET /openapi.json. Append --output to keep a
+    JSON history that can be tracked over time.
+
+    Usage:
+        python -m benchmarks.bench_startup --runs 5 --output benchmarks/results/startup.jsonl
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime
+
+from benchmarks.common import configure_env, summarize
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def import_time() -> float:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def first_request_time(timeout: float = 30) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"])
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/openapi.json", timeout=1).read()
+                return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.01)
+        raise TimeoutError("server did not answer in time")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="JSON lines file to append the result to")
+    args = parser.parse_args()
+
+    configure_env()
+    os.environ.setdefault("REDIS_URL", "")
+
+    imports = [import_time() for _ in range(args.runs)]
+    firsts = [first_request_time() for _ in range(args.runs)]
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "import_main": summarize(imports),
+        "time_to_first_request": summarize(firsts),
+    }
+    print(f"import main            p50={result['import_main']['p50_ms']:8.1f}ms  max={result['import_main']['max_ms']:8.1f}ms")
+    print(f"time to first request  p50={result['time_to_first_request']['p50_ms']:8.1f}ms  max={result['time_to_first_request']['max_ms']:8.1f}ms")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "a") as f:
+            f.write(json.dumps(result) + "\n")
+
+
+if __name__ == "__main__":
+    main()
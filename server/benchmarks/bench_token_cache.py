@@ -0,0 +1,64 @@
+""" Auth overhead per request with and without the verified-token cache.
+
+    Runs `JwtHelper.verify_token` against the same cookie over and over, with the
+    user identity already cached, so only the token handling is measured.
+
+    Usage:
+        python -m benchmarks.bench_token_cache --iterations 50000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+from starlette.requests import Request
+
+from actions.util.jwtHelper import JwtHelper
+from actions.util.tokenCache import token_cache
+from actions.util.userCache import user_cache
+from schemas.user_schema import UserResponse
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/user/current-user",
+        "headers": [(b"cookie", f"jwt_token={token}".encode())],
+    })
+
+
+async def run_case(enabled: bool, token: str, iterations: int) -> dict:
+    token_cache.enabled = enabled
+    token_cache.cache.clear()
+    helper = JwtHelper(db=None)
+    samples: list[float] = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        await helper.verify_token(make_request(token))
+        samples.append(time.perf_counter() - t)
+    return summarize(samples, time.perf_counter() - start)
+
+
+async def run(iterations: int) -> dict:
+    user_cache.local.set(1, UserResponse(id=1, name="Bench", username="bench", email="bench@example.com"))
+    token = await JwtHelper.create_access_token({"user_id": 1})
+    return {
+        "jwt.decode every request": await run_case(False, token, iterations),
+        "token cache": await run_case(True, token, iterations),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50000)
+    args = parser.parse_args()
+    print_table("JwtHelper.verify_token", asyncio.run(run(args.iterations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+""" Search-as-you-type latency over synthetic users.
+
+    Always measures the in-memory UserSearchIndex. With --database the users
+    are also seeded into DB_URL (point it at PostgreSQL with the m0003 indexes)
+    and UserDAO.search_users is measured too.
+
+    Every synthetic user is typed out keystroke by keystroke (prefix queries),
+    plus a misspelled variant of the username (fuzzy queries).
+
+    The run fails (exit status 1) when the p99 of an in-memory case exceeds
+    SEARCH_BUDGET_MS, so it can guard the budget in CI.
+
+    Usage:
+        python -m benchmarks.bench_user_search --users 1000000
+        DB_URL=postgresql://localhost/tulz_bench python -m benchmarks.bench_user_search --database
+"""
+import argparse
+import random
+import sys
+import time
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+
+from sqlalchemy import insert
+
+from database import Base, engine, SessionLocal
+from actions.dal.usersDAO import UserDAO
+from actions.util.userSearch import SEARCH_BUDGET_MS, UserSearchIndex
+from migrations import m0003_user_search_indexes
+from models.user import User
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "ton", "el", "sa", "vi", "no", "dar", "an", "qu", "is", "be", "ry", "jo"]
+
+
+def synthetic_users(n: int) -> list[tuple[int, str, str, str]]:
+    rng = random.Random(42)
+    users = []
+    for i in range(1, n + 1):
+        first = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3))).title()
+        last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).title()
+        username = f"{first.lower()}{last.lower()[:3]}{i}"
+        users.append((i, f"{first} {last}", username, f"{username}@example.com"))
+    return users
+
+
+def queries(users, count: int) -> dict[str, list[str]]:
+    rng = random.Random(7)
+    sample = rng.sample(users, count)
+    prefixes = [u[2][:k] for u in sample for k in range(1, 7)]
+    typos = []
+    for u in sample:
+        name = u[2]
+        i = rng.randrange(1, len(name) - 1)
+        typos.append(name[:i] + name[i + 1] + name[i] + name[i + 2:])
+    return {"prefix (keystrokes)": prefixes, "fuzzy (typo)": typos}
+
+
+def measure(search, qs: list[str]) -> dict:
+    samples = []
+    for q in qs:
+        start = time.perf_counter()
+        search(q)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--database", action="store_true", help="also seed DB_URL and measure UserDAO.search_users")
+    args = parser.parse_args()
+
+    users = synthetic_users(args.users)
+    workload = queries(users, args.queries)
+    results = {}
+
+    index = UserSearchIndex()
+    start = time.perf_counter()
+    index.load(users)
+    print(f"in-memory index built over {args.users:,} users in {time.perf_counter() - start:.1f}s")
+    for name, qs in workload.items():
+        results[f"memory: {name}"] = measure(lambda q: index.search(q, args.limit), qs)
+
+    if args.database:
+        Base.metadata.drop_all(bind=engine, tables=[User.__table__])
+        Base.metadata.create_all(bind=engine, tables=[User.__table__])
+        with engine.begin() as conn:
+            for i in range(0, len(users), 50000):
+                conn.execute(insert(User), [
+                    {"id": u[0], "name": u[1], "username": u[2], "email": u[3], "password": "x"}
+                    for u in users[i:i + 50000]
+                ])
+            m0003_user_search_indexes.upgrade(conn)
+        with SessionLocal() as db:
+            dao = UserDAO(db)
+            for name, qs in workload.items():
+                results[f"database: {name}"] = measure(lambda q: (dao.search_users(q, args.limit, SEARCH_BUDGET_MS), db.commit()), qs)
+
+    print_table(f"user search, limit {args.limit}, budget {SEARCH_BUDGET_MS}ms", results)
+
+    over = [name for name, r in results.items() if name.startswith("memory") and r["p99_ms"] > SEARCH_BUDGET_MS]
+    if over:
+        sys.exit(f"p99 over the {SEARCH_BUDGET_MS}ms budget: {', '.join(over)}")
+
+
+if __name__ == "__main__":
+    main()
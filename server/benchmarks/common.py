@@ -0,0 +1,63 @@
+""" Shared helpers for the benchmark scripts.
+
+    The scripts are run from the `server` directory, e.g.
+
+        python -m benchmarks.bench_async_db --users 10000
+
+    `configure_env` has to be called before any app module is imported, since
+    `database.py` and `jwtHelper.py` read their settings at import time.
+"""
+import os
+import statistics
+import tempfile
+
+
+def configure_env(db_url: str | None = None) -> str:
+    """ Points the app at a throwaway SQLite database unless DB_URL is already set.
+
+    Returns:
+        str: The database URL in use.
+    """
+    if db_url is None and not os.getenv("DB_URL"):
+        path = os.path.join(tempfile.mkdtemp(prefix="tulz-bench-"), "bench.db")
+        db_url = f"sqlite:///{path}"
+    if db_url:
+        os.environ["DB_URL"] = db_url
+    os.environ.setdefault("SECRET_KEY", "bench-secret")
+    os.environ.setdefault("REFRESH_KEY", "bench-refresh")
+    os.environ.setdefault("ALLOWED_URL", "http://localhost:5173")
+    return os.environ["DB_URL"]
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """ Nearest-rank percentile of the samples (pct in 0-100). """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: list[float], elapsed: float | None = None) -> dict:
+    """ Latency summary in milliseconds for a list of durations in seconds. """
+    summary = {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+    if elapsed:
+        summary["throughput_rps"] = len(samples) / elapsed
+    return summary
+
+
+def print_table(title: str, rows: dict[str, dict]) -> None:
+    """ Prints one line per benchmark case. """
+    print(f"\n{title}")
+    for name, s in rows.items():
+        line = f"  {name:<28} n={s['count']:<7} p50={s['p50_ms']:8.2f}ms  p95={s['p95_ms']:8.2f}ms  p99={s['p99_ms']:8.2f}ms"
+        if "throughput_rps" in s:
+            line += f"  {s['throughput_rps']:10.1f} req/s"
+        print(line)
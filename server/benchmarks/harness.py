@@ -0,0 +1,248 @@
+""" End-to-end load test of the FastAPI app.
+
+    Boots `main.app` in-process against a local database (a throwaway SQLite
+    file unless DB_URL is set) with fakeredis standing in for Redis when it is
+    installed, seeds synthetic users and contacts, then replays a traffic mix
+    and reports throughput and p50/p95/p99 per route. Results are written as
+    JSON so runs can be compared over time.
+
+    Mixes:
+        login    login storm (bcrypt bound)
+        poll     contact list polling by logged in users
+        social   add contact / accept flows
+        mixed    all of the above
+
+    Usage:
+        python -m benchmarks.harness --mix mixed --users 2000 --contacts 20000 --requests 5000
+        python -m benchmarks.harness --base-url http://localhost:8000 --skip-seed   # a running server
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from benchmarks.common import configure_env, print_table, summarize
+
+configure_env()
+# every simulated client shares one IP and the login mix reuses usernames, measure the app, not the limiter
+os.environ.setdefault("LOGIN_RATE_LIMIT_USER", "1000000000")
+os.environ.setdefault("LOGIN_RATE_LIMIT_IP", "1000000000")
+
+import bcrypt
+import httpx
+from sqlalchemy import func, insert, select
+
+from database import Base, engine
+from actions.util.jwtHelper import JwtHelper
+from actions.util.redisClient import set_redis
+from models.contact import Contact
+from models.contactCounter import ContactCounter
+from migrations import m0004_contact_counters
+from models.enum.status import Status
+from models.user import User
+
+PASSWORD = "bench-password"
+STATUSES = [Status.REQUESTED, Status.ACCEPTED, Status.ACCEPTED, Status.ACCEPTED, Status.REJECTED, Status.BLOCKED]
+MIXES = {
+    "login": {"login": 1},
+    "poll": {"my_contacts": 4, "requests_to_me": 3, "requests_sent": 3, "current_user": 2, "summary": 4},
+    "social": {"add_accept": 1, "search": 1},
+    "mixed": {"login": 1, "my_contacts": 8, "requests_to_me": 6, "requests_sent": 6, "current_user": 4, "summary": 8, "add_accept": 2, "search": 2},
+}
+
+
+def load_app():
+    """ Imports the app with fakeredis standing in for Redis, or without Redis when it is not installed. """
+    try:
+        import fakeredis
+        set_redis(fakeredis.FakeAsyncRedis())
+    except ImportError:
+        os.environ.setdefault("REDIS_URL", "")
+    import main
+    return main.app
+
+
+def seed(users: int, contacts: int, rounds: int) -> None:
+    """ Users share one password hash, computed once, so seeding stays fast at any scale. """
+    Base.metadata.drop_all(bind=engine, tables=[ContactCounter.__table__, Contact.__table__, User.__table__])
+    Base.metadata.create_all(bind=engine)
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+    now = datetime.now()
+    with engine.begin() as conn:
+        for start in range(1, users + 1, 50000):
+            conn.execute(insert(User), [
+                {"name": f"User {i}", "username": f"user{i}", "email": f"user{i}@example.com", "password": hashed}
+                for i in range(start, min(start + 50000, users + 1))
+            ])
+        for start in range(0, contacts, 50000):
+            rows = []
+            for _ in range(min(50000, contacts - start)):
+                a, b = random.sample(range(1, users + 1), 2)
+                status = random.choice(STATUSES)
+                rows.append({"current_user_id": a, "friend_id": b, "status": status, "last_updated": now,
+                             "date_added": now if status == Status.ACCEPTED else None})
+            conn.execute(insert(Contact), rows)
+        # the bulk insert bypasses ContactDAO, rebuild the counters from the seeded rows
+        m0004_contact_counters.backfill(conn)
+
+
+def user_count() -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count(User.id))).scalar()
+
+
+class Traffic():
+    """ The scripted requests; each step records its latency under a route label. """
+    def __init__(self, client: httpx.AsyncClient, users: int):
+        self.client = client
+        self.users = users
+        self.tokens: dict[int, str] = {}
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        # last ETag seen per (user, url), replayed like a browser cache would
+        self.etags: dict[tuple[int, str], str] = {}
+
+
+    async def token(self, user_id: int) -> str:
+        if user_id not in self.tokens:
+            self.tokens[user_id] = await JwtHelper.create_access_token({"user_id": user_id})
+        return self.tokens[user_id]
+
+
+    async def call(self, label: str, method: str, url: str, user_id: int | None = None, **kwargs) -> httpx.Response:
+        if user_id is not None:
+            kwargs["cookies"] = {"jwt_token": await self.token(user_id)}
+        start = time.perf_counter()
+        res = await self.client.request(method, url, **kwargs)
+        self.samples[label].append(time.perf_counter() - start)
+        self.statuses[label][res.status_code] += 1
+        return res
+
+
+    async def poll(self, label: str, url: str, user_id: int) -> httpx.Response:
+        etag = self.etags.get((user_id, url))
+        res = await self.call(label, "GET", url, user_id, headers={"If-None-Match": etag} if etag else None)
+        if "etag" in res.headers:
+            self.etags[(user_id, url)] = res.headers["etag"]
+        return res
+
+
+    def random_user(self) -> int:
+        return random.randint(1, self.users)
+
+
+    async def login(self):
+        i = self.random_user()
+        await self.call("POST /user/login", "POST", "/user/login",
+                        json={"username": f"user{i}", "email": f"user{i}@example.com", "password": PASSWORD})
+
+
+    async def my_contacts(self):
+        await self.poll("GET /contact/my-contacts", "/contact/my-contacts", self.random_user())
+
+
+    async def requests_to_me(self):
+        await self.poll("GET /contact/requests-to-me", "/contact/requests-to-me", self.random_user())
+
+
+    async def requests_sent(self):
+        await self.poll("GET /contact/requests-sent", "/contact/requests-sent", self.random_user())
+
+
+    async def summary(self):
+        await self.call("GET /contact/summary", "GET", "/contact/summary", self.random_user())
+
+
+    async def current_user(self):
+        await self.call("GET /user/current-user", "GET", "/user/current-user", self.random_user())
+
+
+    async def search(self):
+        await self.call("GET /user/search-users", "GET", f"/user/search-users?q=user{random.randint(1, 999)}", self.random_user())
+
+
+    async def add_accept(self):
+        a, b = random.sample(range(1, self.users + 1), 2)
+        res = await self.call("POST /contact/add-contact", "POST", "/contact/add-contact", a,
+                              json={"current_user_id": a, "friend_id": b})
+        if res.status_code == 200:
+            await self.call("PUT /contact/accept-contact/{id}", "PUT", f"/contact/accept-contact/{res.json()['id']}", b)
+
+
+async def run(app, args) -> dict:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=60)
+    else:
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+
+    # the ASGI transport does not send lifespan events, run startup/shutdown around the load
+    async with (app.router.lifespan_context(app) if app else contextlib.nullcontext()), client:
+        traffic = Traffic(client, user_count())
+        steps = MIXES[args.mix]
+        names, weights = list(steps), list(steps.values())
+        remaining = args.requests
+
+        async def worker():
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                await getattr(traffic, random.choices(names, weights)[0])()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    routes = {label: summarize(samples, elapsed) for label, samples in sorted(traffic.samples.items())}
+    for label, summary in routes.items():
+        summary["status_codes"] = dict(traffic.statuses[label])
+    return {"elapsed_s": elapsed, "total": summarize([s for v in traffic.samples.values() for s in v], elapsed), "routes": routes}
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mix", choices=MIXES, default="mixed")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--contacts", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="cost of the seeded password hash")
+    parser.add_argument("--skip-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--base-url", help="load test a running server instead of the in-process app")
+    parser.add_argument("--output", default="benchmarks/results", help="directory for the JSON results")
+    args = parser.parse_args()
+
+    if not args.skip_seed:
+        seed(args.users, args.contacts, args.bcrypt_rounds)
+    app = None if args.base_url else load_app()
+    result = asyncio.run(run(app, args))
+
+    print_table(f"{args.mix} mix, {args.requests} requests, concurrency {args.concurrency}", {"total": result["total"], **result["routes"]})
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "config": {**vars(args), "db_url": engine.url.render_as_string(hide_password=True)},
+        **result,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{report['timestamp'].replace(':', '')}-{args.mix}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nresults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
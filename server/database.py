@@ -1,11 +1,66 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
 import os
 
 DATABASE_URL = os.getenv("DB_URL")
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+# "async" serves requests through the AsyncEngine, "sync" keeps the blocking engine
+# (queries are then pushed to a worker thread). Scripts and tooling always use SessionLocal.
+# SQLite defaults to "sync": aiosqlite runs every connection on a thread of its own and hands
+# results back through the loop, which benchmarks/bench_async_db.py measures as slower than
+# the threadpool, so the asyncio driver only pays off with a network database (asyncpg).
+DB_MODE = (os.getenv("DB_MODE") or ("sync" if make_url(DATABASE_URL).get_backend_name() == "sqlite" else "async")).lower()
+
+# async drivers for the sync URLs we accept in DB_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """ Maps a sync database URL onto the matching asyncio driver.
+        ASYNC_DB_URL can be set to bypass the mapping.
+    """
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DB_URL") or to_async_url(DATABASE_URL)
+
+# connection pool, per engine and per worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+# seconds to wait for a free connection before failing with 503 (SQLAlchemy's default of 30s stalls the client)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 2))
+# seconds after which a connection is replaced, stays below typical server/proxy idle timeouts
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+DB_RETRY_AFTER = int(os.getenv("DB_RETRY_AFTER", 1))
+
+
+def pool_options(url: str) -> dict:
+    """ Engine keyword arguments for the pool settings above. """
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    # in-memory SQLite uses a singleton pool without size or overflow
+    if make_url(url).get_backend_name() == "sqlite" and make_url(url).database in (None, "", ":memory:"):
+        return options
+    options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return options
+
+
+# objects returned by the DAOs are used after commit (events, response serialization) on the
+# event loop, so neither session expires them: a lazy refresh there would be a blocking query
+# outside the threadpool (DB_MODE=sync) or is not allowed outside the greenlet (DB_MODE=async)
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **pool_options(ASYNC_DATABASE_URL))
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
@@ -1,61 +1,84 @@
 from fastapi import Depends
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import SessionLocal
-from actions.dal.usersDAO import UserDAO 
-from actions.dal.contactDAO import ContactDAO
+from database import DB_MODE, SessionLocal, AsyncSessionLocal
+from actions.dal.asyncDAO import AsyncUserDAO, AsyncContactDAO
 from actions.services.userServices import UserServices
 from actions.services.contactService import ContactService
 
 
-def get_db():
+async def get_db():
     """ Creates and yields a new database session for each request.
     
         This function uses FastAPI's dependency injection system to provide
         a database session to route handlers. The session is automatically
         closed once the request is finished.
         
-        The `SessionLocal()` object represents a session factory bound to
-        the database, and `yield` is used to return the session to the route
-        while ensuring it gets closed after the request is completed.
+        With DB_MODE=async (the default for network databases) `AsyncSessionLocal()`
+        is used, so queries run on the asyncio driver and never block the event
+        loop. With DB_MODE=sync (the SQLite default) the blocking `SessionLocal()`
+        is yielded instead and the DAOs run it in the threadpool.
     """
-    db = SessionLocal()
-    try:
+    if DB_MODE == "sync":
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
+        return
+
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
-        
-        
-def get_user_services(db: Session = Depends(get_db)) -> UserServices:
+
+
+async def release_db(db: AsyncSession | Session) -> None:
+    """ Closes the request's session ahead of time, returning its connection to the pool.
+
+        For long lived responses (event streams) that are done with the database
+        once the request is authenticated. `get_db` closes it again at the end,
+        which is a no-op.
+
+    Args:
+        db (AsyncSession | Session): The request's database session.
+    """
+    if isinstance(db, AsyncSession):
+        await db.close()
+    else:
+        await run_in_threadpool(db.close)
+
+
+def get_user_services(db: AsyncSession | Session = Depends(get_db)) -> UserServices:
     """ Provides an instance of UserServices for handling user-related operations.
     
         This function is used by FastAPI's dependency injection system to inject
         an instance of the `UserServices` class into the route handlers that
-        require it. The `UserDAO` (data access object) is created with the provided
-        database session (`db`), and `UserServices` is initialized with `UserDAO`.
+        require it. The `AsyncUserDAO` (data access object) is created with the provided
+        database session (`db`), and `UserServices` is initialized with `AsyncUserDAO`.
 
     Args:
-        db (Session, optional): The database session injected by FastAPI's Depends. 
+        db (AsyncSession | Session, optional): The database session injected by FastAPI's Depends. 
                                 Defaults to Depends(get_db).
 
     Returns:
         UserServices: An instance of the UserServices class, which handles
         user-related logic, such as user registration, login, and logout.
     """
-    dao = UserDAO(db)
+    dao = AsyncUserDAO(db)
     return UserServices(dao)
 
 
-def get_contact_services(db: Session = Depends(get_db)) -> ContactService:
+def get_contact_services(db: AsyncSession | Session = Depends(get_db)) -> ContactService:
     """ Provides an instance of ContactService for handling contact-related operations
     
         This function is used by FastAPI's dependency injection system to inject
         an instance of the `ContactService` class into the route handlers that
-        require it. The `ContactDAO` (data access object) is created with the provided
-        database session (`db`), and `ContactService` is initialized with `ContactDAO`.   
+        require it. The `AsyncContactDAO` (data access object) is created with the provided
+        database session (`db`), and `ContactService` is initialized with `AsyncContactDAO`.   
 
     Args:
-        db (Session, optional): The database session injected by FastAPI's Depends. 
+        db (AsyncSession | Session, optional): The database session injected by FastAPI's Depends. 
                                 Defaults to Depends(get_db).
 
     Returns:
@@ -63,6 +86,6 @@ def get_contact_services(db: Session = Depends(get_db)) -> ContactService:
         contact-related logic, such blocking, unblocking, rejecting, accepting contact
         requests, etc. 
     """
-    contact_dao = ContactDAO(db)
-    user_dao = UserDAO(db)
+    contact_dao = AsyncContactDAO(db)
+    user_dao = AsyncUserDAO(db)
     return ContactService(contact_dao, user_dao)
\ No newline at end of file
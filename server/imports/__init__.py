@@ -0,0 +1 @@
+""" Bulk import of users and contacts from the command line, see `python -m imports --help`. """
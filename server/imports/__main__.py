@@ -0,0 +1,70 @@
+""" Bulk import of users or contacts from an NDJSON or CSV file (one record per line).
+
+    users     name, username, email, password
+    contacts  username, friend_username, status (default ACCEPTED)
+
+    Progress goes to stderr after every batch, the rejected rows at the end.
+    Passwords are hashed on a process pool of --workers (all cores by default).
+    Contacts imported here reach a running server's social graph on its next
+    build; import through POST /admin/import/contacts to update it live.
+
+    Usage:
+        python -m imports users partners.csv
+        python -m imports contacts links.ndjson --batch-size 5000
+        cat users.ndjson | python -m imports users - --format ndjson
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import SessionLocal
+from actions.util.bulkImport import IMPORT_BATCH_SIZE, IMPORT_FORMATS, IMPORT_SCHEMAS, BulkImport
+from actions.util.passwordHasher import PasswordHasher
+
+
+async def read_lines(path: str):
+    with (sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")) as f:
+        for line in f:
+            yield line
+
+
+async def run(args: argparse.Namespace) -> dict:
+    hasher = PasswordHasher(workers=args.workers, kind="process")
+    try:
+        # scripts use the blocking session, the DAOs then run in a worker thread
+        with SessionLocal() as db:
+            async for report in BulkImport(args.table, db, hasher, args.batch_size).run(read_lines(args.path), args.format):
+                print(
+                    f"{report['read']:>10} read  {report['imported']:>10} imported  {report['duplicates']:>8} duplicates  "
+                    f"{report['invalid']:>8} invalid  {report['rows_per_s']:10.0f} rows/s",
+                    file=sys.stderr,
+                )
+        return report
+    finally:
+        hasher.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m imports", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("table", choices=sorted(IMPORT_SCHEMAS))
+    parser.add_argument("path", help="file to import, - for stdin")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="default: from the file extension")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="bcrypt processes")
+    args = parser.parse_args()
+    if args.format is None:
+        args.format = "csv" if args.path.lower().endswith(".csv") else "ndjson"
+
+    report = asyncio.run(run(args))
+    for error in report["errors"]:
+        print(f"line {error['line']}: {error['detail']}", file=sys.stderr)
+    print(f"{report['imported']} {args.table} imported in {report['elapsed_s']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
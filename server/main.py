@@ -1,21 +1,75 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
 from dotenv import load_dotenv
 import os
-import redis
+import redis.asyncio as aioredis
 
 load_dotenv()
 
 from routers.user_api import u_api
 from routers.contact_api import c_api
-from database import Base, engine
-from routers.middleware.auth import JWTMiddleWare
+from routers.metrics_api import m_api
+from routers.admin_api import a_api
+from database import engine, async_engine
+from routers.middleware.auth import verify_jwt
+from routers.middleware.errors import PoolTimeoutError, RedisError, pool_timeout_handler, redis_error_handler
+from actions.util.redisClient import get_redis, set_redis
+from actions.util.passwordHasher import password_hasher
+from actions.util.eventBus import event_bus
+from actions.util.socialGraph import GRAPH_PRELOAD, build_from_database, social_graph
+from actions.util.pagination import NEXT_CURSOR_HEADER
+from actions.util.fastJson import FastJSONResponse
+from actions.util.queryCounter import QUERY_COUNT_HEADER, QUERY_TIME_HEADER, QueryCountMiddleware
+from actions.util.metrics import MetricsMiddleware
 
-Base.metadata.create_all(bind=engine)
+import migrations
 
-redis_client = redis.StrictRedis(host="localhost", port=6379, db=0)
-app = FastAPI()
+# empty to run without Redis (caches and limiters fall back to in-process state)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# schema changes normally run once per deploy with `make migrate`; set for single process dev setups
+RUN_MIGRATIONS = os.getenv("RUN_MIGRATIONS", "0") == "1"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """ Creates the per worker resources on startup and releases them on shutdown.
+
+        Nothing here runs at import time, so importing the app (tests, tooling,
+        `--reload`) never touches the database or Redis.
+    """
+    if RUN_MIGRATIONS:
+        await run_in_threadpool(migrations.upgrade, engine)
+
+    # a client may already be set (e.g. fakeredis in the benchmark harness)
+    redis_client = None
+    if get_redis() is None and REDIS_URL:
+        redis_client = aioredis.from_url(REDIS_URL)
+        set_redis(redis_client)
+    # contact events fan out through Redis pub/sub only with the app's own Redis
+    await event_bus.start(REDIS_URL if redis_client is not None else None)
+    # built in a worker thread, requests are served meanwhile (graph queries wait for it)
+    graph_task = asyncio.create_task(social_graph.ensure_loaded(build_from_database)) if GRAPH_PRELOAD else None
+
+    yield
+
+    if graph_task is not None:
+        graph_task.cancel()
+    await event_bus.stop()
+    if redis_client is not None:
+        set_redis(None)
+        await redis_client.aclose()
+    password_hasher.shutdown()
+    await async_engine.dispose()
+    engine.dispose()
+
+
+app = FastAPI(dependencies=[Depends(verify_jwt)], lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
+app.add_exception_handler(RedisError, redis_error_handler)
 
 allowed_url = os.getenv("ALLOWED_URL")
 if not allowed_url:
@@ -23,14 +77,18 @@ if not allowed_url:
 
 allowed_origins = [allowed_url, 'http://localhost:5173']  # Wrap the URL in a list
 
-app.add_middleware(JWTMiddleWare)
+app.add_middleware(QueryCountMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", QUERY_COUNT_HEADER, QUERY_TIME_HEADER],
 )
 
 app.include_router(u_api, prefix="/user", tags=["Users"])
-app.include_router(c_api, prefix="/contact", tags=["Contacts"])
\ No newline at end of file
+app.include_router(c_api, prefix="/contact", tags=["Contacts"])
+app.include_router(a_api, prefix="/admin", tags=["Admin"])
+app.include_router(m_api, tags=["Metrics"])
\ No newline at end of file
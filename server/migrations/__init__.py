@@ -0,0 +1,85 @@
+""" Versioned schema migrations.
+
+    Each migration is a module named `mNNNN_<description>.py` exposing
+    `upgrade(conn)`. Applied versions are recorded in the `schema_version`
+    table, and every pending migration runs in its own transaction, in order.
+
+    Migrations are meant to run once per deploy (`make migrate`), not from
+    every worker. When workers do run them (RUN_MIGRATIONS=1), an up to date
+    database costs a single SELECT, and on PostgreSQL an advisory lock lets
+    only one worker apply pending versions.
+
+        python -m migrations            # apply pending migrations
+        python -m migrations status     # list applied and pending versions
+"""
+import importlib
+import logging
+import pkgutil
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, select, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# key of the PostgreSQL advisory lock held while migrating
+MIGRATION_LOCK_KEY = 7210431
+
+version_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    version_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+def discover() -> list[tuple[int, str]]:
+    """ Returns (version, module name) for every migration module, sorted by version. """
+    found = []
+    for module in pkgutil.iter_modules(__path__):
+        if module.name.startswith("m") and module.name[1:5].isdigit():
+            found.append((int(module.name[1:5]), module.name))
+    return sorted(found)
+
+
+def applied_versions(engine: Engine) -> set[int]:
+    version_metadata.create_all(engine)
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_version.c.version)).scalars())
+
+
+def pending(engine: Engine) -> list[tuple[int, str]]:
+    done = applied_versions(engine)
+    return [(version, name) for version, name in discover() if version not in done]
+
+
+def upgrade(engine: Engine) -> list[str]:
+    """ Applies every pending migration.
+
+    Returns:
+        list[str]: Names of the migrations that were applied.
+    """
+    # fast path: nothing to do, no lock taken
+    if not pending(engine):
+        return []
+
+    with engine.connect() as lock_conn:
+        locked = engine.dialect.name == "postgresql"
+        if locked:
+            lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            applied = []
+            # another process may have migrated while we waited for the lock
+            for version, name in pending(engine):
+                module = importlib.import_module(f"{__name__}.{name}")
+                logger.info("applying migration %s", name)
+                with engine.begin() as conn:
+                    module.upgrade(conn)
+                    conn.execute(schema_version.insert().values(version=version, name=name, applied_at=datetime.now()))
+                applied.append(name)
+            return applied
+        finally:
+            if locked:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
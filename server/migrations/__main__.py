@@ -0,0 +1,22 @@
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import engine
+from migrations import applied_versions, discover, upgrade
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+
+    if command == "status":
+        done = applied_versions(engine)
+        for version, name in discover():
+            print(f"{'applied' if version in done else 'pending':<8} {name}")
+    elif command == "upgrade":
+        names = upgrade(engine)
+        print("\n".join(f"applied  {name}" for name in names) or "database is up to date")
+    else:
+        sys.exit(f"unknown command: {command} (expected 'upgrade' or 'status')")
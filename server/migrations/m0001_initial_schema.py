@@ -0,0 +1,9 @@
+""" Baseline: the users and contacts tables as the app used to create them at startup. """
+from database import Base
+from models.user import User
+from models.contact import Contact
+
+
+def upgrade(conn) -> None:
+    # checkfirst keeps this a no-op on databases created before migrations existed
+    Base.metadata.create_all(conn, tables=[User.__table__, Contact.__table__], checkfirst=True)
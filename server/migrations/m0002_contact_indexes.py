@@ -0,0 +1,14 @@
+""" Composite indexes for the ContactDAO access patterns. """
+from sqlalchemy import text
+
+
+INDEXES = {
+    "ix_contacts_current_user_status": "current_user_id, status",
+    "ix_contacts_friend_status": "friend_id, status",
+    "ix_contacts_pair": "current_user_id, friend_id",
+}
+
+
+def upgrade(conn) -> None:
+    for name, columns in INDEXES.items():
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON contacts ({columns})"))
@@ -0,0 +1,20 @@
+""" Trigram and prefix indexes for the username/name search (PostgreSQL only). """
+from sqlalchemy import text
+
+
+INDEXES = {
+    "ix_users_username_trgm": "USING gin (lower(username) gin_trgm_ops)",
+    "ix_users_name_trgm": "USING gin (lower(name) gin_trgm_ops)",
+    "ix_users_username_prefix": "(lower(username) text_pattern_ops)",
+    "ix_users_name_prefix": "(lower(name) text_pattern_ops)",
+}
+
+
+def upgrade(conn) -> None:
+    # other backends are served by the in-memory index in actions/util/userSearch.py
+    if conn.dialect.name != "postgresql":
+        return
+
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for name, definition in INDEXES.items():
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON users {definition}"))
@@ -0,0 +1,20 @@
+""" Per user contact counters behind /contact/summary, backfilled from the contacts table. """
+from sqlalchemy import text
+
+from database import Base
+from models.contactCounter import ContactCounter, SENDER, RECEIVER
+
+
+def backfill(conn) -> None:
+    """ Recomputes every counter from the contacts table. """
+    conn.execute(ContactCounter.__table__.delete())
+    for role, column in ((SENDER, "current_user_id"), (RECEIVER, "friend_id")):
+        conn.execute(text(
+            f"INSERT INTO contact_counters (user_id, role, status, count) "
+            f"SELECT {column}, :role, status, COUNT(*) FROM contacts GROUP BY {column}, status"
+        ), {"role": role})
+
+
+def upgrade(conn) -> None:
+    Base.metadata.create_all(conn, tables=[ContactCounter.__table__], checkfirst=True)
+    backfill(conn)
@@ -0,0 +1,16 @@
+""" Who blocked a contact (only they may unblock it) and the status left by the last transition. """
+from sqlalchemy import inspect, text
+
+from models.contact import Contact
+
+COLUMNS = ("blocked_by", "previous_status")
+
+
+def upgrade(conn) -> None:
+    # databases created after this change already have the columns (m0001 builds the current model)
+    existing = {column["name"] for column in inspect(conn).get_columns("contacts")}
+    for name in COLUMNS:
+        if name not in existing:
+            column = Contact.__table__.c[name]
+            conn.execute(text(f"ALTER TABLE contacts ADD COLUMN {name} {column.type.compile(dialect=conn.dialect)}"))
+    # contacts blocked before the blocker was recorded are given one by m0006_backfill_blocked_by
@@ -0,0 +1,15 @@
+""" Gives contacts blocked before m0005 a blocker, so they can be unblocked. """
+from sqlalchemy import update
+
+from models.contact import Contact
+from models.enum.status import Status
+
+
+def upgrade(conn) -> None:
+    # which user blocked a legacy contact was never recorded: the contact's creator (current_user_id)
+    # gets to unblock it, rather than nobody (blocker-only UNBLOCK) or either user
+    conn.execute(
+        update(Contact.__table__)
+        .where(Contact.status == Status.BLOCKED, Contact.blocked_by.is_(None))
+        .values(blocked_by=Contact.current_user_id)
+    )
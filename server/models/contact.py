@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, Enum, DateTime, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from models.enum.status import Status
@@ -6,6 +6,15 @@ from datetime import datetime
 
 class Contact(Base):
     __tablename__ = "contacts"
+    # Indexes matching the ContactDAO filters (see migrations/m0002_contact_indexes.py):
+    #   (current_user_id, status): requests sent, contacts/blocked lists on the sender side
+    #   (friend_id, status): requests to me, contacts/blocked lists on the receiver side
+    #   (current_user_id, friend_id): contact_exists between two users
+    __table_args__ = (
+        Index("ix_contacts_current_user_status", "current_user_id", "status"),
+        Index("ix_contacts_friend_status", "friend_id", "status"),
+        Index("ix_contacts_pair", "current_user_id", "friend_id"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     
@@ -19,6 +28,12 @@ class Contact(Base):
     # The date the contact was accepted 
     date_added = Column(DateTime, default=None, nullable=True)
     
+    # The user who blocked the contact, only they may unblock it
+    blocked_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    # Status before the last transition, written by the same UPDATE so the counters know which status was left
+    previous_status = Column(Enum(Status), nullable=True)
+
     # Last updated timestamp
     last_updated = Column(DateTime, default=datetime.now(), onupdate=datetime.now, nullable=False)
     
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from database import Base
+from models.enum.status import Status
+
+# side of the contact a counter belongs to
+SENDER = "sender"       # the user is the contact's current_user_id (sent the request)
+RECEIVER = "receiver"   # the user is the contact's friend_id (received the request)
+
+
+class ContactCounter(Base):
+    __tablename__ = "contact_counters"
+    # Number of a user's contacts per side and status, kept in step with the contacts table
+    # by ContactDAO in the same transaction as the contact change (see migrations/m0004_contact_counters.py)
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    role = Column(String(8), primary_key=True)
+    status = Column(Enum(Status), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ContactCounter(user_id={self.user_id}, role={self.role}, status={self.status}, count={self.count})>"
@@ -0,0 +1,8 @@
+from enum import Enum
+
+class Action(str, Enum):
+    ACCEPT = "accept"       # Accept a contact request
+    REJECT = "reject"       # Reject a contact request
+    BLOCK = "block"         # Block the contact
+    UNBLOCK = "unblock"     # Unblock a blocked contact
+    REMOVE = "remove"       # Remove the contact
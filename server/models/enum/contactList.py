@@ -0,0 +1,6 @@
+from enum import Enum
+
+class ContactList(str, Enum):
+    MY_CONTACTS = "my-contacts"         # Accepted contacts, on either side
+    REQUESTS_TO_ME = "requests-to-me"   # Pending requests the user received
+    REQUESTS_SENT = "requests-sent"     # Pending requests the user sent
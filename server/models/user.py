@@ -1,8 +1,8 @@
 from sqlalchemy import Column, Integer, String, Boolean
 from sqlalchemy.orm import relationship
 from database import Base
-import bcrypt
 from .contact import Contact
+from actions.util.passwordHasher import hash_password_sync, check_password_sync
 
 
 class User(Base):
@@ -28,13 +28,12 @@ class User(Base):
         cascade="all, delete-orphan",
         overlaps="contact_2"
     )
+    # blocking helpers for scripts; request handlers go through actions.util.passwordHasher
     def set_password(self, password: str):
-        p = password.encode("utf-8")
-        salt = bcrypt.gensalt()
-        self.password = bcrypt.hashpw(p, salt).decode("utf-8")
+        self.password = hash_password_sync(password)
    
     def check_password(self, password: str) -> bool:
-        return bcrypt.checkpw(password.encode("utf-8"), self.password.encode("utf-8"))
+        return check_password_sync(password, self.password)
 
     def __repr__(self):
         return f"<User(id={self.id}, name={self.name}, email=({self.email})>"
\ No newline at end of file
@@ -0,0 +1,94 @@
+import os
+from contextlib import asynccontextmanager
+from datetime import datetime
+from tempfile import SpooledTemporaryFile
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.datastructures import UploadFile
+
+from dependencies import get_db, release_db
+from routers.middleware.auth import require_admin
+from actions.dal.usersDAO import UserDAO
+from actions.dal.contactDAO import ContactDAO
+from actions.util.bulkImport import BulkImport, iter_lines
+from actions.util.exporter import EXPORT_FORMATS, stream_export
+from actions.util.fastJson import dumps
+
+a_api = APIRouter(dependencies=[Depends(require_admin)])
+
+# bytes of an uploaded import file kept in memory, larger files are spooled to a temporary file
+IMPORT_SPOOL_MEMORY = int(os.getenv("IMPORT_SPOOL_MEMORY", 16 * 1024 * 1024))
+IMPORT_READ_SIZE = 64 * 1024
+
+
+async def export_response(query, table: str, fmt: str, db: AsyncSession | Session) -> StreamingResponse:
+    # the export reads on a connection of its own, hand the request's one back first
+    await release_db(db)
+    filename = f"{table}-{datetime.now():%Y%m%d-%H%M%S}.{fmt}"
+    return StreamingResponse(
+        stream_export(query, fmt),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# stream every user (id, name, username, email) as NDJSON or CSV
+@a_api.get("/export/users")
+async def export_users(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: AsyncSession | Session = Depends(get_db)) -> StreamingResponse:
+    return await export_response(UserDAO.export_query(), "users", format, db)
+
+
+# stream every contact as NDJSON or CSV
+@a_api.get("/export/contacts")
+async def export_contacts(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: AsyncSession | Session = Depends(get_db)) -> StreamingResponse:
+    return await export_response(ContactDAO.export_query(), "contacts", format, db)
+
+
+async def spool_body(request: Request) -> UploadFile:
+    # a StreamingResponse listens for the disconnect on receive(), so the body cannot be read
+    # while the response is sent: it is spooled (in memory up to IMPORT_SPOOL_MEMORY) first
+    upload = UploadFile(SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY))
+    try:
+        async for chunk in request.stream():
+            await upload.write(chunk)
+        await upload.seek(0)
+    except BaseException:
+        await upload.close()
+        raise
+    return upload
+
+
+async def iter_chunks(upload: UploadFile):
+    while chunk := await upload.read(IMPORT_READ_SIZE):
+        yield chunk
+
+
+async def import_response(table: str, fmt: str, request: Request, db: AsyncSession | Session) -> StreamingResponse:
+    # the import runs on a session of its own for as long as the progress is streamed, hand the request's one back first
+    await release_db(db)
+    upload = await spool_body(request)
+
+    async def progress():
+        try:
+            async with asynccontextmanager(get_db)() as import_db:
+                async for report in BulkImport(table, import_db).run(iter_lines(iter_chunks(upload)), fmt):
+                    yield dumps(report) + b"\n"
+        finally:
+            await upload.close()
+
+    return StreamingResponse(progress(), media_type=EXPORT_FORMATS["ndjson"])
+
+
+# create users from an NDJSON or CSV body (name, username, email, password), progress streamed back as NDJSON
+@a_api.post("/import/users")
+async def import_users(request: Request, format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: AsyncSession | Session = Depends(get_db)) -> StreamingResponse:
+    return await import_response("users", format, request, db)
+
+
+# create contacts from an NDJSON or CSV body (username, friend_username, status), progress streamed back as NDJSON
+@a_api.post("/import/contacts")
+async def import_contacts(request: Request, format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: AsyncSession | Session = Depends(get_db)) -> StreamingResponse:
+    return await import_response("contacts", format, request, db)
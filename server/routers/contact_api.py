@@ -1,11 +1,37 @@
-from fastapi import APIRouter, Depends, Request
+import asyncio
+import json
+import os
+import time
+
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from schemas.contact_schema import *
 from actions.services.contactService import ContactService
-from dependencies import get_contact_services
+from dependencies import get_contact_services, get_db, release_db
+from actions.util.eventBus import Subscriber, event_bus
+from actions.util.tokenCache import token_cache
+from actions.util.socialGraph import GRAPH_DEFAULT_LIMIT, GRAPH_MAX_LIMIT
+from actions.util.pagination import PageParams, set_next_cursor
+from actions.util.etag import is_not_modified, not_modified, set_etag
+from actions.util.fastJson import FastJSONResponse
+from models.enum.contactList import ContactList
 
 c_api = APIRouter()
 
+# seconds between keep-alive comments on an idle event stream (proxies drop silent connections)
+EVENTS_HEARTBEAT = float(os.getenv("EVENTS_HEARTBEAT", 15))
+
+
+def list_response(rows: list[dict], next_cursor: str | None, etag: str) -> FastJSONResponse:
+    # the DAO mappings go straight to JSON bytes, response_model only documents the shape
+    response = FastJSONResponse(rows)
+    set_next_cursor(response, next_cursor)
+    set_etag(response, etag)
+    return response
+
 
 # add a contact API route
 @c_api.post("/add-contact", response_model=ContactResponse)
@@ -15,9 +41,33 @@ async def add_contact(request: Request, contact: ContactForm, contact_service: C
 
 
 # get all of users contacts API route
-@c_api.get("/my-contacts")
-async def get_my_contacts(request: Request, contact_service: ContactService = Depends(get_contact_services)):
-    return await contact_service.get_my_contacts(user=request.state.user)
+@c_api.get("/my-contacts", response_model=list[ContactWithUserResponse])
+async def get_my_contacts(request: Request, page: PageParams = Depends(), contact_service: ContactService = Depends(get_contact_services)) -> FastJSONResponse:
+    # unchanged since the client's copy: answer 304 without loading the list
+    etag = await contact_service.get_list_etag(request.state.user, ContactList.MY_CONTACTS, page)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    contacts, next_cursor = await contact_service.get_my_contacts(user=request.state.user, page=page)
+    return list_response(contacts, next_cursor, etag)
+
+
+# badge counts (requests to me, requests sent, contacts, blocked) API route
+@c_api.get("/summary", response_model=ContactSummary)
+async def get_summary(request: Request, contact_service: ContactService = Depends(get_contact_services)) -> ContactSummary:
+    return await contact_service.get_summary(user=request.state.user)
+
+
+# contacts the current user has in common with another user API route
+@c_api.get("/mutual/{user_id}", response_model=MutualContactsResponse)
+async def get_mutual_contacts(request: Request, user_id: int, limit: int = Query(GRAPH_DEFAULT_LIMIT, ge=1, le=GRAPH_MAX_LIMIT), contact_service: ContactService = Depends(get_contact_services)) -> MutualContactsResponse:
+    return await contact_service.get_mutual_contacts(user=request.state.user, other_id=user_id, limit=limit)
+
+
+# "people you may know" (friends of friends, most mutual contacts first) API route
+@c_api.get("/suggestions", response_model=list[ContactSuggestion])
+async def get_suggestions(request: Request, limit: int = Query(GRAPH_DEFAULT_LIMIT, ge=1, le=GRAPH_MAX_LIMIT), contact_service: ContactService = Depends(get_contact_services)) -> list[ContactSuggestion]:
+    return await contact_service.get_suggestions(user=request.state.user, limit=limit)
 
 
 # block a certain contact API route
@@ -50,17 +100,72 @@ async def remove_contact(request: Request, contact_id: int, contact_service: Con
     return await contact_service.remove_contact(user=request.state.user, id=contact_id)
 
 
+# accept, reject, block, unblock or remove several contacts in one request
+@c_api.post("/batch", response_model=ContactBatchResponse)
+async def batch_update_contacts(request: Request, batch: ContactBatchRequest, contact_service: ContactService = Depends(get_contact_services)) -> ContactBatchResponse:
+    return await contact_service.batch_update_contacts(user=request.state.user, batch=batch)
+
+
 # get a certain contact by ContactSearch API route
 @c_api.get("/get-contact/", response_model=ContactResponse)
 async def get_contact(contact_criteria: ContactSearch = Depends(), contact_service: ContactService = Depends(get_contact_services)) -> ContactResponse:
     return await contact_service.search_contact(contact_criteria)
 
 @c_api.get("/requests-to-me")
-async def foo(request: Request, contact_service: ContactService = Depends(get_contact_services)):
+async def foo(request: Request, page: PageParams = Depends(), contact_service: ContactService = Depends(get_contact_services)) -> FastJSONResponse:
     user = request.state.user
-    return await contact_service.get_contact_requests_to_me(user)
+    etag = await contact_service.get_list_etag(user, ContactList.REQUESTS_TO_ME, page)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    requests, next_cursor = await contact_service.get_contact_requests_to_me(user, page)
+    return list_response(requests, next_cursor, etag)
 
 @c_api.get("/requests-sent")
-async def foo(request: Request, contact_service: ContactService = Depends(get_contact_services)):
+async def foo(request: Request, page: PageParams = Depends(), contact_service: ContactService = Depends(get_contact_services)) -> FastJSONResponse:
     user = request.state.user
-    return await contact_service.get_requests_sent(user)
\ No newline at end of file
+    etag = await contact_service.get_list_etag(user, ContactList.REQUESTS_SENT, page)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    requests, next_cursor = await contact_service.get_requests_sent(user, page)
+    return list_response(requests, next_cursor, etag)
+
+
+# server-sent events for the current user's contacts (new requests, accepts, blocks, ...)
+@c_api.get("/events")
+async def contact_events(request: Request, db: AsyncSession | Session = Depends(get_db)) -> StreamingResponse:
+    # authenticated by the jwt_token cookie like every route, the stream itself never needs the database
+    await release_db(db)
+    subscriber = event_bus.subscribe(request.state.user.id)
+    # end the stream when the access token expires, the client reconnects with a refreshed one
+    expires_at = time.monotonic() + (request.state.token_exp - time.time())
+
+    return StreamingResponse(
+        event_stream(subscriber, request.state.token.access_token, expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def event_stream(subscriber: Subscriber, token: str, expires_at: float):
+    try:
+        yield "retry: 3000\n\n"
+        while time.monotonic() < expires_at:
+            if subscriber.lost:
+                # events were dropped for this client, it has to reload its lists
+                subscriber.lost = False
+                yield "event: resync\ndata: {}\n\n"
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), max(0.0, min(EVENTS_HEARTBEAT, expires_at - time.monotonic())))
+            except asyncio.TimeoutError:
+                event = None
+            # a logged out token stops receiving events at once, not only on the next heartbeat
+            if await token_cache.is_revoked(token):
+                return
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event['type']}\ndata: {json.dumps(event['contact'])}\n\n"
+    finally:
+        event_bus.unsubscribe(subscriber)
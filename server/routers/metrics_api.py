@@ -0,0 +1,56 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from database import engine, async_engine
+from actions.util.metrics import Collector, render_metrics
+from actions.util.passwordHasher import password_hasher
+from actions.util.tokenCache import token_cache
+from actions.util.userCache import user_cache
+from actions.util.rateLimiter import login_ip_limiter, login_user_limiter
+from actions.util.eventBus import event_bus
+from actions.util.socialGraph import social_graph
+
+m_api = APIRouter()
+
+
+def pool_stats() -> dict[tuple, float]:
+    stats = {}
+    for name, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        # only QueuePool exposes these (SQLite may use a static or null pool)
+        if hasattr(pool, "checkedout"):
+            stats[(name, "checked_out")] = pool.checkedout()
+            stats[(name, "overflow")] = pool.overflow()
+            stats[(name, "size")] = pool.size()
+    return stats
+
+
+# sampled at scrape time, nothing is added to the request path
+Collector("db_pool_connections", "SQLAlchemy pool state per engine.", "gauge", pool_stats, ("engine", "state"))
+Collector("bcrypt_queue_depth", "Password hashes waiting for a worker.", "gauge", lambda: {(): password_hasher.queue_depth})
+Collector("bcrypt_in_flight", "Password hashes queued or running.", "gauge", lambda: {(): password_hasher.in_flight})
+Collector("bcrypt_rejected_total", "Password hashes refused with 503 because the queue was full.", "counter", lambda: {(): password_hasher.rejected})
+Collector("user_cache_requests_total", "User identity cache lookups by tier and result.", "counter", lambda: {
+    ("local", "hit"): user_cache.local.hits,
+    ("local", "miss"): user_cache.local.misses,
+    ("redis", "hit"): user_cache.redis_hits,
+    ("redis", "miss"): user_cache.redis_misses,
+}, ("tier", "result"))
+Collector("token_cache_requests_total", "Verified token cache lookups by result.", "counter", lambda: {
+    ("hit",): token_cache.cache.hits,
+    ("miss",): token_cache.cache.misses,
+}, ("result",))
+
+Collector("login_rate_limited_total", "Login attempts refused with 429 by limiter.", "counter", lambda: {
+    ("user",): login_user_limiter.rejected,
+    ("ip",): login_ip_limiter.rejected,
+}, ("limiter",))
+Collector("contact_event_streams", "Open contact event streams on this worker.", "gauge", lambda: {(): event_bus.connections})
+Collector("contact_events_published_total", "Contact events published by this worker.", "counter", lambda: {(): event_bus.published})
+Collector("social_graph_edges", "ACCEPTED contacts held by the in-memory social graph.", "gauge", lambda: {(): social_graph.edges})
+Collector("contact_events_delivered_total", "Contact events queued to streams on this worker.", "counter", lambda: {(): event_bus.delivered})
+
+
+# Prometheus scrape endpoint
+@m_api.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics() -> str:
+    return render_metrics()
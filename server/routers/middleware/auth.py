@@ -1,29 +1,50 @@
-from fastapi import HTTPException 
-from fastapi.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
+import os
 
-from database import SessionLocal
+from fastapi import Depends, HTTPException, Request
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from dependencies import get_db
 from actions.util.jwtHelper import JwtHelper 
 
 
-class JWTMiddleWare(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        # paths to exclude
-        excluded_paths = {"/openapi.json", "/docs", "/user/login", "/user/create-account", "/user/refresh-token"}
-
-        # check if the request path is excluded
-        if request.url.path in excluded_paths:
-            return await call_next(request)
-        db = SessionLocal()
-        jwtHelper = JwtHelper(db)
-        try:
-
-            await jwtHelper.verify_token(request)
-            response = await call_next(request)
-        except HTTPException as e:
-            return JSONResponse(content={"detail":e.detail}, status_code=e.status_code)
-        except Exception as exc:
-            return JSONResponse(content={"detail": f"Error: {str(exc)}"}, status_code=500)
-        finally:
-            db.close() 
-        return response 
\ No newline at end of file
+# usernames allowed on the /admin routes (comma separated)
+ADMIN_USERNAMES = frozenset(name.strip() for name in os.getenv("ADMIN_USERNAMES", "").split(",") if name.strip())
+
+# paths that do not require an access token
+EXCLUDED_PATHS = frozenset({"/openapi.json", "/docs", "/metrics", "/user/login", "/user/create-account", "/user/refresh-token"})
+
+
+async def verify_jwt(request: Request, db: AsyncSession | Session = Depends(get_db)) -> None:
+    """ App wide dependency that authenticates the request from the `jwt_token` cookie.
+
+        It replaces the old BaseHTTPMiddleware, which wrapped every response in an
+        extra task and opened a second session per request. FastAPI caches `get_db`
+        per request, so the user lookup shares the route's session (the session only
+        checks out a connection once it runs a query). On success the token and
+        user are stored in `request.state`; failures raise an HTTPException.
+
+    Args:
+        request (Request): The incoming request.
+        db (AsyncSession | Session, optional): The request's database session.
+                                               Defaults to Depends(get_db).
+    """
+    # fast path for public routes
+    if request.scope["path"] in EXCLUDED_PATHS:
+        return
+
+    await JwtHelper(db).verify_token(request)
+
+
+async def require_admin(request: Request) -> None:
+    """ Router dependency of the admin routes, runs after `verify_jwt` authenticated the request.
+
+    Args:
+        request (Request): The incoming request.
+
+    Raises:
+        HTTPException: 403 when the user is not listed in ADMIN_USERNAMES.
+    """
+    user = getattr(request.state, "user", None)
+    if user is None or user.username not in ADMIN_USERNAMES:
+        raise HTTPException(status_code=403, detail="Admin access required.")
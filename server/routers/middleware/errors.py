@@ -0,0 +1,29 @@
+import logging
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from redis import RedisError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from database import DB_RETRY_AFTER
+
+logger = logging.getLogger(__name__)
+
+
+async def pool_timeout_handler(request: Request, exc: PoolTimeoutError) -> JSONResponse:
+    """ Every pooled connection stayed busy for DB_POOL_TIMEOUT, tell the client to come back shortly. """
+    return JSONResponse(
+        content={"detail": "Server is busy. Please try again."},
+        status_code=503,
+        headers={"Retry-After": str(DB_RETRY_AFTER)}
+    )
+
+
+async def redis_error_handler(request: Request, exc: RedisError) -> JSONResponse:
+    """ Redis is down or timed out where it has no in-process fallback (the session store), answer like a saturated pool. """
+    logger.warning("redis unavailable on %s: %s", request.url.path, exc)
+    return JSONResponse(
+        content={"detail": "Server is busy. Please try again."},
+        status_code=503,
+        headers={"Retry-After": str(DB_RETRY_AFTER)}
+    )
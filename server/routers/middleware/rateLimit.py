@@ -0,0 +1,25 @@
+from fastapi import HTTPException, Request
+
+from actions.util.rateLimiter import login_ip_limiter, login_user_limiter
+
+
+async def limit_login(request: Request, username: str) -> None:
+    """ Rejects login attempts over the per username or per IP limit with 429.
+
+        Called first thing in the login route: the request's session has not
+        checked out a connection yet, so throttled attempts never cost a query
+        or a bcrypt check.
+
+    Args:
+        request (Request): The incoming request.
+        username (str): The username the client is trying to log in as.
+
+    Raises:
+        HTTPException: 429 with Retry-After when a limit is exceeded.
+    """
+    # both counters are bumped, so a client rotating usernames is still held by its IP
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = max(await login_ip_limiter.hit(client_ip), await login_user_limiter.hit(username.lower()))
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many login attempts. Please try again later.",
+                            headers={"Retry-After": str(retry_after)})
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi.responses import Response
 
 from dependencies import get_user_services
 from schemas.user_schema import UserResponse, UserCreate, UserLogin
 from schemas.token_schema import *
 from actions.services.userServices import UserServices
+from routers.middleware.rateLimit import limit_login
+from actions.util.pagination import PageParams, set_next_cursor
+from actions.util.fastJson import FastJSONResponse
+from actions.util.userSearch import SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
 
 
 u_api = APIRouter()
@@ -19,7 +23,10 @@ async def create_account(user: UserCreate, user_services: UserServices = Depends
 
 # login API route
 @u_api.post("/login", response_model=TokenData)
-async def login(user: UserLogin, response: Response, user_services: UserServices = Depends(get_user_services)) -> TokenData:
+async def login(user: UserLogin, request: Request, response: Response, user_services: UserServices = Depends(get_user_services)) -> TokenData:
+    # throttle before any query or password check
+    await limit_login(request, user.username)
+
     # validate user login data
     jwt_access_token, jwt_refresh_token, u = await user_services.login_user(user)
 
@@ -57,9 +64,12 @@ async def refresh_token(request: Request, response: Response, user_services: Use
 
 # # logout route
 @u_api.post("/logout", response_model=UserResponse)
-async def logout(response: Response, request: Request) -> UserResponse:
+async def logout(response: Response, request: Request, user_services: UserServices = Depends(get_user_services)) -> UserResponse:
     user = request.state.user
 
+    # revoke the access token and end the refresh token's session
+    await user_services.logout_user(user.id, request.state.token.access_token, request.cookies.get("refresh_token"))
+
     response.delete_cookie("jwt_token")
     response.delete_cookie("refresh_token")
     
@@ -70,6 +80,21 @@ async def logout(response: Response, request: Request) -> UserResponse:
     return user 
 
 
+# log out of every session (all devices) route
+@u_api.post("/logout-all", response_model=UserResponse)
+async def logout_all(response: Response, request: Request, user_services: UserServices = Depends(get_user_services)) -> UserResponse:
+    user = request.state.user
+    await user_services.logout_everywhere(user.id, request.state.token.access_token)
+
+    response.delete_cookie("jwt_token")
+    response.delete_cookie("refresh_token")
+
+    request.state.user = None
+    request.state.token = None
+
+    return user
+
+
 # # get current auth user API route
 @u_api.get("/current-user", response_model=UserResponse) 
 async def current_user(request: Request) -> UserResponse:
@@ -78,12 +103,21 @@ async def current_user(request: Request) -> UserResponse:
 
 # # get all of the users
 @u_api.get("/all-users",response_model=list[UserResponse]) 
-async def get_all_users(user_services: UserServices = Depends(get_user_services)) -> list[UserResponse]:
-    users = await user_services.get_all_users() 
-    return [UserResponse.model_validate(u) for u in users]
+async def get_all_users(page: PageParams = Depends(), user_services: UserServices = Depends(get_user_services)) -> FastJSONResponse:
+    # mappings straight to JSON bytes, response_model only documents the shape
+    users, next_cursor = await user_services.get_all_users(page) 
+    response = FastJSONResponse(users)
+    set_next_cursor(response, next_cursor)
+    return response
 
 
 # search for a user using their username
 @u_api.get("/search", response_model=UserResponse)
 async def search(username: str, user_services: UserServices = Depends(get_user_services)) -> UserResponse:
-    return await user_services.search_by_username(username)
\ No newline at end of file
+    return await user_services.search_by_username(username)
+
+
+# search-as-you-type over usernames and names, best matches first
+@u_api.get("/search-users", response_model=list[UserResponse])
+async def search_users(q: str, limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT), user_services: UserServices = Depends(get_user_services)) -> list[UserResponse]:
+    return await user_services.search_users(q, limit)
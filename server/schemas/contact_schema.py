@@ -1,6 +1,8 @@
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from models.contact import Status
+from models.enum.action import Action
+from schemas.user_schema import UserResponse
 
 
 # base schema for contact
@@ -25,8 +27,65 @@ class ContactResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+# used to return a contact along with the other user of the contact
+class ContactWithUserResponse(ContactResponse):
+    other_user: UserResponse
+
+
+# one contact of a bulk import, both users by username
+class ContactImport(BaseModel):
+    username: str           # the user the contact is created for (current_user_id)
+    friend_username: str    # the other user (friend_id)
+    status: Status = Status.ACCEPTED
+
+
 # used for search criteria
 class ContactSearch(BaseModel):
     id: int | None = None
     user_id: int | None = None
-    username: str | None = None
\ No newline at end of file
+    username: str | None = None
+
+
+# one action of a batch request
+class ContactBatchItem(BaseModel):
+    contact_id: int
+    action: Action
+
+
+# used to apply several contact actions at once
+class ContactBatchRequest(BaseModel):
+    items: list[ContactBatchItem] = Field(min_length=1, max_length=500)
+
+
+# outcome of one action of a batch request
+class ContactBatchResult(BaseModel):
+    contact_id: int
+    action: Action
+    ok: bool
+    status: Status | None = None    # status of the contact after the action
+    detail: str | None = None       # why the action was not applied
+
+
+class ContactBatchResponse(BaseModel):
+    results: list[ContactBatchResult]
+
+
+# badge counts of the current user's contacts
+class ContactSummary(BaseModel):
+    requests_to_me: int     # requests waiting for the user's answer
+    requests_sent: int      # requests the user sent that are still open
+    contacts: int           # accepted contacts
+    blocked: int            # blocked contacts, whoever blocked
+    statuses: dict[Status, int]     # contacts per status, both sides together
+
+
+# contacts the current user has in common with another user
+class MutualContactsResponse(BaseModel):
+    count: int                  # all mutual contacts
+    users: list[UserResponse]   # the first `limit` of them
+
+
+# "people you may know": a friend of a friend
+class ContactSuggestion(BaseModel):
+    user: UserResponse
+    mutual_count: int   # contacts in common with the current user
@@ -0,0 +1,86 @@
+""" Shared fixtures. Run from the `server` directory: `python -m pytest tests`.
+
+    The app reads its settings at import time, so the environment is set
+    here, before any app module is imported: a throwaway SQLite database and
+    no Redis (caches, limiters and the session store use their in-process
+    fallbacks).
+"""
+import os
+import tempfile
+
+os.environ["DB_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="tulz-test-"), "test.db")
+os.environ["REDIS_URL"] = ""
+os.environ.setdefault("SECRET_KEY", "test-secret-" + "x" * 32)
+os.environ.setdefault("REFRESH_KEY", "test-refresh-" + "x" * 32)
+os.environ.setdefault("ALLOWED_URL", "http://localhost:5173")
+os.environ.setdefault("ADMIN_USERNAMES", "admin")
+os.environ.setdefault("BCRYPT_WORKERS", "2")
+
+from datetime import datetime
+
+import bcrypt
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from database import Base, engine, SessionLocal
+from models.contact import Contact
+from models.user import User
+from actions.util.userCache import user_cache
+from actions.util.tokenCache import token_cache
+from actions.util.userSearch import user_search_index
+from actions.util.socialGraph import social_graph
+from actions.util.rateLimiter import login_ip_limiter, login_user_limiter
+
+PASSWORD = "test-password"
+# one cheap hash shared by every seeded user
+PASSWORD_HASH = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode()
+
+
+@pytest.fixture(autouse=True)
+def schema():
+    """ Every test starts from empty tables and empty in-process caches. """
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    for cache in (user_cache.local, token_cache.cache, token_cache.revoked, login_user_limiter.local, login_ip_limiter.local):
+        cache.clear()
+    user_search_index.loaded = False
+    social_graph.adjacency, social_graph.edges, social_graph.repeated, social_graph.loaded = [], 0, {}, False
+    yield
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client():
+    import main
+    with TestClient(main.app, base_url="https://testserver") as c:
+        yield c
+
+
+def make_users(*usernames: str) -> list[int]:
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"name": name.title(), "username": name, "email": f"{name}@example.com", "password": PASSWORD_HASH}
+            for name in usernames
+        ])
+    with SessionLocal() as session:
+        return [session.query(User.id).filter(User.username == name).scalar() for name in usernames]
+
+
+def make_contact(current_user_id: int, friend_id: int, status) -> int:
+    with SessionLocal() as session:
+        contact = Contact(current_user_id=current_user_id, friend_id=friend_id, status=status, last_updated=datetime.now())
+        session.add(contact)
+        session.commit()
+        return contact.id
+
+
+def login(client: TestClient, username: str) -> None:
+    """ Logs `client` in, the cookies then authenticate its next requests. """
+    response = client.post("/user/login", json={"username": username, "email": f"{username}@example.com", "password": PASSWORD})
+    assert response.status_code == 200, response.text
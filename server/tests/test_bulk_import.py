@@ -0,0 +1,46 @@
+import json
+
+from sqlalchemy import select
+
+from models.contact import Contact
+from models.enum.status import Status
+from models.user import User
+from tests.conftest import login, make_users
+
+
+def reports(response) -> list[dict]:
+    assert response.status_code == 200, response.text
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_import_users_from_ndjson_body(client, db):
+    make_users("admin")
+    login(client, "admin")
+    body = "\n".join(json.dumps(row) for row in [
+        {"name": "Anna", "username": "anna", "email": "anna@example.com", "password": "secret-1"},
+        {"name": "Bob", "username": "bob", "email": "bob@example.com", "password": "secret-2"},
+        {"name": "Anna again", "username": "anna", "email": "anna2@example.com", "password": "secret-3"},
+        "not an object",
+    ])
+
+    last = reports(client.post("/admin/import/users", content=body))[-1]
+    assert (last["done"], last["read"], last["imported"], last["duplicates"], last["invalid"]) == (True, 4, 2, 1, 1)
+    assert sorted(e["line"] for e in last["errors"]) == [3, 4]
+    assert set(db.scalars(select(User.username))) == {"admin", "anna", "bob"}
+
+
+def test_import_contacts_from_csv_body(client, db):
+    admin, anna, bob, cleo = make_users("admin", "anna", "bob", "cleo")
+    login(client, "admin")
+    body = "username,friend_username,status\nanna,bob,ACCEPTED\nbob,anna,ACCEPTED\nanna,cleo,REQUESTED\nanna,nobody,ACCEPTED\n"
+
+    last = reports(client.post("/admin/import/contacts", params={"format": "csv"}, content=body))[-1]
+    assert (last["imported"], last["duplicates"], last["invalid"]) == (2, 1, 1)
+    pairs = {(c.current_user_id, c.friend_id, c.status) for c in db.scalars(select(Contact))}
+    assert pairs == {(anna, bob, Status.ACCEPTED), (anna, cleo, Status.REQUESTED)}
+
+
+def test_import_is_admin_only(client):
+    make_users("anna")
+    login(client, "anna")
+    assert client.post("/admin/import/users", content="").status_code == 403
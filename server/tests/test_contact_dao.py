@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from actions.dal.contactDAO import ContactDAO
+from actions.util.queryCounter import query_budget
+from database import engine
+from models.contact import Contact
+from models.enum.status import Status
+from models.user import User
+from tests.conftest import make_contact, make_users
+
+
+def expected_contacts(db, user_id: int, status: Status) -> list[dict]:
+    """ What get_contacts used to mean, spelled out with the ORM: the user's contacts
+        with `status` on either side, by id, each with the other user of the contact. """
+    contacts = (db.query(Contact)
+                  .filter((Contact.current_user_id == user_id) | (Contact.friend_id == user_id), Contact.status == status)
+                  .order_by(Contact.id)
+                  .all())
+    result = []
+    for c in contacts:
+        other = db.get(User, c.friend_id if c.current_user_id == user_id else c.current_user_id)
+        result.append({
+            "id": c.id, "current_user_id": c.current_user_id, "friend_id": c.friend_id, "status": c.status,
+            "date_added": c.date_added, "last_updated": c.last_updated,
+            "other_user": {"id": other.id, "name": other.name, "username": other.username, "email": other.email},
+        })
+    return result
+
+
+@pytest.fixture
+def graph():
+    """ Contacts of "me" on both sides and in several statuses, plus contacts between other users. """
+    me, a, b, c, d = make_users("me", "anna", "bob", "cleo", "dan")
+    make_contact(me, a, Status.ACCEPTED)        # sent by me
+    make_contact(b, me, Status.ACCEPTED)        # received by me
+    make_contact(me, c, Status.REQUESTED)
+    make_contact(d, me, Status.PENDING)
+    make_contact(me, d, Status.BLOCKED)
+    make_contact(c, me, Status.BLOCKED)
+    make_contact(a, b, Status.ACCEPTED)         # not mine
+    make_contact(c, d, Status.PENDING)          # not mine
+    make_contact(me, b, Status.REMOVED)
+    return me
+
+
+@pytest.mark.parametrize("status", list(Status))
+def test_get_contacts_matches_both_sides_in_id_order(db, graph, status):
+    user = SimpleNamespace(id=graph)
+    assert ContactDAO(db).get_contacts(user, status) == expected_contacts(db, graph, status)
+
+
+def test_get_contacts_accepted_sees_both_directions(db, graph):
+    rows = ContactDAO(db).get_contacts(SimpleNamespace(id=graph), Status.ACCEPTED)
+    assert [row["other_user"]["username"] for row in rows] == ["anna", "bob"]
+    assert all(graph in (row["current_user_id"], row["friend_id"]) for row in rows)
+
+
+@pytest.mark.parametrize("status", [Status.ACCEPTED, Status.PENDING, Status.BLOCKED])
+def test_get_contacts_is_one_query_scoped_to_the_user(db, graph, status):
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        with query_budget(1):
+            rows = ContactDAO(db).get_contacts(SimpleNamespace(id=graph), status)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    # the database itself returns only the user's rows: nothing is fetched to be filtered in Python
+    [(statement, parameters)] = statements
+    with engine.connect() as conn:
+        fetched = conn.exec_driver_sql(statement, parameters).fetchall()
+    assert len(fetched) == len(rows) == len(expected_contacts(db, graph, status))
+
+
+def test_get_contacts_blocked_and_pending(db, graph):
+    dao = ContactDAO(db)
+    user = SimpleNamespace(id=graph)
+    assert [row["other_user"]["username"] for row in dao.get_contacts(user, Status.BLOCKED)] == ["dan", "cleo"]
+    assert [row["other_user"]["username"] for row in dao.get_contacts(user, Status.PENDING)] == ["dan"]
+
+
+def test_get_contacts_keyset_pages_cover_the_list(db, graph):
+    dao = ContactDAO(db)
+    user = SimpleNamespace(id=graph)
+    full = dao.get_contacts(user, Status.BLOCKED)
+    first = dao.get_contacts(user, Status.BLOCKED, None, 1)
+    second = dao.get_contacts(user, Status.BLOCKED, first[-1]["id"], 1)
+    assert first + second == full
+    assert dao.get_contacts(user, Status.BLOCKED, second[-1]["id"], 1) == []
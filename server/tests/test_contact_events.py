@@ -0,0 +1,38 @@
+import asyncio
+import time
+
+from actions.util.eventBus import event_bus
+from actions.util.tokenCache import token_cache
+from routers.contact_api import event_stream
+
+TOKEN = "header.payload.signature"
+
+
+async def collect(stream, timeout: float = 2.0) -> list[str]:
+    async def drain():
+        return [chunk async for chunk in stream]
+    return await asyncio.wait_for(drain(), timeout)
+
+
+def test_stream_ends_when_the_token_expires():
+    async def scenario():
+        subscriber = event_bus.subscribe(1)
+        chunks = await collect(event_stream(subscriber, TOKEN, time.monotonic() + 0.1))
+        assert chunks[0].startswith("retry:")
+        assert subscriber not in event_bus.subscribers.get(1, ())
+
+    asyncio.run(scenario())
+
+
+def test_revoked_token_gets_no_more_events():
+    async def scenario():
+        subscriber = event_bus.subscribe(1)
+        stream = event_stream(subscriber, TOKEN, time.monotonic() + 60)
+        assert (await anext(stream)).startswith("retry:")
+
+        await token_cache.revoke(TOKEN, {"exp": time.time() + 60})
+        # an event arriving before the next heartbeat must not reach a logged out client
+        await event_bus.publish([1], {"type": "accepted", "contact": {"id": 1}})
+        assert await collect(stream) == []
+
+    asyncio.run(scenario())
@@ -0,0 +1,120 @@
+import pytest
+from sqlalchemy import event, select
+
+from actions.util.queryCounter import QUERY_COUNT_HEADER
+from database import async_engine, engine
+from models.contact import Contact
+from models.contactCounter import ContactCounter, RECEIVER, SENDER
+from models.enum.status import Status
+from tests.conftest import login, make_contact, make_users
+
+
+def summary(client) -> dict:
+    return client.get("/contact/summary").json()["statuses"]
+
+
+@pytest.fixture
+def contact_updates():
+    """ UPDATE statements on the contacts table, whichever engine DB_MODE uses. """
+    updates = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("UPDATE CONTACTS"):
+            updates.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for e in engines:
+        event.listen(e, "before_cursor_execute", record)
+    yield updates
+    for e in engines:
+        event.remove(e, "before_cursor_execute", record)
+
+
+def test_only_the_blocker_can_unblock(client):
+    anna, bob = make_users("anna", "bob")
+    contact_id = make_contact(anna, bob, Status.REQUESTED)
+
+    login(client, "bob")
+    assert client.put(f"/contact/accept-contact/{contact_id}").status_code == 200
+    blocked = client.put(f"/contact/block-contact/{contact_id}")
+    assert blocked.json()["status"] == Status.BLOCKED
+
+    # the blocked user cannot lift the block, through either route
+    login(client, "anna")
+    assert client.put(f"/contact/unblock-contact/{contact_id}").status_code == 400
+    batch = client.post("/contact/batch", json={"items": [{"contact_id": contact_id, "action": "unblock"}]})
+    assert batch.json()["results"][0]["ok"] is False
+
+    login(client, "bob")
+    unblocked = client.put(f"/contact/unblock-contact/{contact_id}")
+    assert unblocked.status_code == 200
+    assert unblocked.json()["status"] == Status.PENDING
+
+
+def test_batch_unblock_by_the_blocker(client):
+    anna, bob = make_users("anna", "bob")
+    contact_id = make_contact(anna, bob, Status.REQUESTED)
+
+    login(client, "anna")
+    assert client.put(f"/contact/block-contact/{contact_id}").status_code == 200
+    batch = client.post("/contact/batch", json={"items": [{"contact_id": contact_id, "action": "unblock"}]})
+    assert batch.json()["results"][0] == {"contact_id": contact_id, "action": "unblock", "ok": True, "status": "PENDING", "detail": None}
+
+
+def test_transition_is_one_update_and_keeps_the_counters(client, contact_updates):
+    anna, bob = make_users("anna", "bob")
+    login(client, "anna")
+    contact_id = client.post("/contact/add-contact", json={"current_user_id": anna, "friend_id": bob}).json()["id"]
+
+    login(client, "bob")
+    assert client.put(f"/contact/accept-contact/{contact_id}").status_code == 200
+    assert summary(client)[Status.ACCEPTED] == 1
+
+    contact_updates.clear()
+
+    # BLOCK may leave REQUESTED or ACCEPTED, both are handled by the same statement
+    blocked = client.put(f"/contact/block-contact/{contact_id}")
+    assert blocked.status_code == 200
+    assert len(contact_updates) == 1
+    assert "IN" in contact_updates[0].upper()
+    # the UPDATE and the counter upsert, nothing reloads the returned contact
+    assert blocked.headers[QUERY_COUNT_HEADER] == "2"
+    for username in ("bob", "anna"):
+        login(client, username)
+        counts = summary(client)
+        assert (counts[Status.ACCEPTED], counts[Status.BLOCKED]) == (0, 1)
+
+
+def recounted(db) -> dict:
+    """ The contact counters recomputed from the contacts table, the invariant bump_counters keeps. """
+    expected = {}
+    for c in db.scalars(select(Contact)):
+        for key in ((c.current_user_id, SENDER, c.status), (c.friend_id, RECEIVER, c.status)):
+            expected[key] = expected.get(key, 0) + 1
+    return expected
+
+
+def stored(db) -> dict:
+    return {(c.user_id, c.role, c.status): c.count for c in db.scalars(select(ContactCounter)) if c.count}
+
+
+def test_batch_counts_only_the_rows_it_changed(client, db, contact_updates):
+    anna, bob, cleo = make_users("anna", "bob", "cleo")
+    login(client, "anna")
+    first, second = (client.post("/contact/add-contact", json={"current_user_id": anna, "friend_id": f}).json()["id"] for f in (bob, cleo))
+
+    login(client, "bob")
+    assert client.put(f"/contact/accept-contact/{first}").status_code == 200
+    # the contact was accepted already (a stale client, or a concurrent request), the other one is not bob's
+    batch = client.post("/contact/batch", json={"items": [{"contact_id": first, "action": "accept"}, {"contact_id": second, "action": "accept"}]})
+    assert [r["ok"] for r in batch.json()["results"]] == [False, False]
+
+    login(client, "cleo")
+    client.get("/user/current-user")
+    contact_updates.clear()
+    batch = client.post("/contact/batch", json={"items": [{"contact_id": second, "action": "accept"}, {"contact_id": first, "action": "block"}]})
+
+    assert [r["ok"] for r in batch.json()["results"]] == [True, False]
+    # one conditional UPDATE per action of the batch, the check is part of it, plus the counter upsert
+    assert len(contact_updates) == 2
+    assert batch.headers[QUERY_COUNT_HEADER] == "3"
+    assert stored(db) == recounted(db)
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from database import DB_MODE, engine
+from tests.conftest import login, make_users
+
+
+@pytest.fixture
+def on_event_loop():
+    """ Statements run by the sync engine on a thread with a running event loop. """
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.mark.skipif(DB_MODE != "sync", reason="only the sync engine can block the event loop")
+def test_no_query_runs_on_the_event_loop(client, on_event_loop):
+    anna, bob = make_users("anna", "bob")
+    assert client.post("/user/create-account", json={"name": "Cleo", "username": "cleo", "email": "cleo@example.com", "password": "secret"}).status_code == 200
+
+    login(client, "anna")
+    contact_id = client.post("/contact/add-contact", json={"current_user_id": anna, "friend_id": bob}).json()["id"]
+    login(client, "bob")
+    assert client.put(f"/contact/accept-contact/{contact_id}").status_code == 200
+    batch = client.post("/contact/batch", json={"items": [{"contact_id": contact_id, "action": "block"}]})
+    assert batch.json()["results"][0]["ok"] is True
+
+    # objects returned by committing DAO methods are not expired, so nothing reloads them lazily
+    assert on_event_loop == []
@@ -0,0 +1,26 @@
+from database import engine
+from migrations import m0006_backfill_blocked_by
+from models.contact import Contact
+from models.enum.status import Status
+from tests.conftest import login, make_contact, make_users
+
+
+def test_legacy_blocked_contacts_can_be_unblocked_after_the_backfill(client, db):
+    anna, bob = make_users("anna", "bob")
+    # blocked before blocked_by existed
+    contact_id = make_contact(anna, bob, Status.BLOCKED)
+    accepted_id = make_contact(bob, anna, Status.ACCEPTED)
+
+    login(client, "anna")
+    assert client.put(f"/contact/unblock-contact/{contact_id}").status_code == 400
+
+    with engine.begin() as conn:
+        m0006_backfill_blocked_by.upgrade(conn)
+
+    assert db.get(Contact, accepted_id).blocked_by is None
+    login(client, "bob")
+    assert client.put(f"/contact/unblock-contact/{contact_id}").status_code == 400
+    login(client, "anna")
+    unblocked = client.put(f"/contact/unblock-contact/{contact_id}")
+    assert unblocked.status_code == 200
+    assert unblocked.json()["status"] == Status.PENDING
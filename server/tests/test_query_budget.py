@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+
+from actions.dal.contactDAO import ContactDAO
+from actions.util.queryCounter import QueryBudgetExceeded, assert_query_budget, query_budget
+from actions.util.userCache import user_cache
+from models.enum.status import Status
+from tests.conftest import login, make_contact, make_users
+
+
+@pytest.fixture(params=[3, 30], ids=["few-contacts", "many-contacts"])
+def me(request):
+    """ "me" with `param` accepted contacts, so each budget is checked not to grow with the list. """
+    me, *friends = make_users("me", *[f"friend{i}" for i in range(request.param)])
+    for i, friend in enumerate(friends):
+        # both sides of the contact, like real data
+        make_contact(me, friend, Status.ACCEPTED) if i % 2 else make_contact(friend, me, Status.ACCEPTED)
+    return me
+
+
+def logged_in(client, username: str) -> None:
+    """ Logs in and warms the user cache, so a budget only counts the endpoint's own queries. """
+    login(client, username)
+    client.get("/user/current-user")
+
+
+def test_current_user_budget(client, me):
+    login(client, "me")
+    # a cold user cache loads the user once, a warm one not at all
+    user_cache.local.clear()
+    assert_query_budget(client.get("/user/current-user"), 1)
+    assert_query_budget(client.get("/user/current-user"), 0)
+
+
+def test_contact_list_budget(client, me):
+    logged_in(client, "me")
+    response = client.get("/contact/my-contacts")
+    assert response.status_code == 200
+    # the list ETag and the page, whatever the number of contacts
+    assert_query_budget(response, 2)
+
+
+def test_summary_budget(client, me):
+    logged_in(client, "me")
+    response = client.get("/contact/summary")
+    assert response.status_code == 200
+    # counted from contact_counters, not from the contacts
+    assert_query_budget(response, 1)
+
+
+def test_get_contacts_budget(db, me):
+    with query_budget(1):
+        ContactDAO(db).get_contacts(SimpleNamespace(id=me), Status.ACCEPTED)
+
+
+def test_budget_reports_the_statements(db, me):
+    with pytest.raises(QueryBudgetExceeded, match="ran 2 queries, budget is 1"):
+        with query_budget(1):
+            dao = ContactDAO(db)
+            dao.get_contacts(SimpleNamespace(id=me), Status.ACCEPTED)
+            dao.get_contacts(SimpleNamespace(id=me), Status.PENDING)
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from actions.util.rateLimiter import LOGIN_RATE_LIMIT_USER, SlidingWindowLimiter
+from actions.util.redisClient import set_redis
+from tests.conftest import make_users
+
+
+def test_login_is_throttled_per_username(client):
+    make_users("anna")
+    attempt = {"username": "anna", "email": "anna@example.com", "password": "wrong-password"}
+    for _ in range(LOGIN_RATE_LIMIT_USER):
+        assert client.post("/user/login", json=attempt).status_code != 429
+    throttled = client.post("/user/login", json=attempt)
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) >= 1
+
+
+def test_limiter_shares_counters_through_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+
+    async def scenario():
+        set_redis(fakeredis.FakeAsyncRedis())
+        try:
+            # two limiters with the same name stand for two workers
+            first, second = SlidingWindowLimiter("test", limit=2, window=60), SlidingWindowLimiter("test", limit=2, window=60)
+            assert await first.hit("anna") == 0
+            assert await second.hit("anna") == 0
+            assert await first.hit("anna") > 0
+            assert not first.local and not second.local
+        finally:
+            set_redis(None)
+
+    asyncio.run(scenario())
@@ -0,0 +1,44 @@
+import pytest
+
+from actions.util.redisClient import set_redis
+from tests.conftest import login, make_users
+
+
+@pytest.fixture(params=["local", "redis"])
+def store(request):
+    """ Runs a test against the in-process session store and, when fakeredis is installed, against Redis. """
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        set_redis(fakeredis.FakeAsyncRedis())
+    yield request.param
+    set_redis(None)
+
+
+def refresh(client, refresh_token: str):
+    client.cookies.clear()
+    client.cookies.set("refresh_token", refresh_token)
+    return client.post("/user/refresh-token")
+
+
+def test_refresh_token_works_once(store, client):
+    make_users("anna")
+    login(client, "anna")
+    first = client.cookies["refresh_token"]
+
+    rotated = refresh(client, first)
+    assert rotated.status_code == 200
+    second = rotated.cookies["refresh_token"]
+
+    # presenting the rotated token again ends the whole session, the new token included
+    assert refresh(client, first).status_code == 401
+    assert refresh(client, second).status_code == 401
+
+
+def test_logout_everywhere_ends_every_session(store, client):
+    make_users("anna")
+    login(client, "anna")
+    phone = client.cookies["refresh_token"]
+    login(client, "anna")
+    assert client.post("/user/logout-all").status_code == 200
+
+    assert refresh(client, phone).status_code == 401
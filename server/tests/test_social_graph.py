@@ -0,0 +1,49 @@
+from actions.util.socialGraph import SocialGraph, apply_contact_event, social_graph
+from models.enum.status import Status
+
+
+def event(a: int, b: int, status: Status, previous: Status | None) -> dict:
+    contact = {"id": 1, "current_user_id": a, "friend_id": b, "status": status.value}
+    return {"type": "test", "contact": contact, "previous_status": previous.value if previous else None}
+
+
+def loaded(edges: list[tuple[int, int]]) -> SocialGraph:
+    graph = SocialGraph()
+    graph.adjacency, graph.edges, graph.repeated = SocialGraph.build(edges)
+    graph.loaded = True
+    return graph
+
+
+def test_edge_outlives_one_of_two_accepted_rows():
+    # two ACCEPTED rows between 1 and 2, one in each direction
+    graph = loaded([(1, 2), (2, 1), (2, 3)])
+    assert graph.edges == 2 and graph.repeated == {(1, 2): 1}
+
+    graph.apply(2, 1, accepted=False)
+    assert graph.connected(1, 2) and graph.mutual(1, 3) == [2]
+    graph.apply(1, 2, accepted=False)
+    assert not graph.connected(1, 2) and graph.edges == 1
+
+
+def test_added_twice_removed_twice():
+    graph = loaded([])
+    graph.apply(1, 2, accepted=True)
+    graph.apply(2, 1, accepted=True)
+    assert graph.edges == 1
+    graph.apply(1, 2, accepted=False)
+    assert graph.connected(2, 1)
+    graph.apply(1, 2, accepted=False)
+    assert not graph.connected(2, 1) and graph.repeated == {}
+
+
+def test_only_rows_entering_or_leaving_accepted_count():
+    social_graph.adjacency, social_graph.edges, social_graph.repeated = SocialGraph.build([(1, 2)])
+    social_graph.loaded = True
+
+    # a second row of the pair is requested then rejected: it never was ACCEPTED
+    apply_contact_event(event(1, 2, Status.REQUESTED, None))
+    apply_contact_event(event(1, 2, Status.REJECTED, Status.REQUESTED))
+    assert social_graph.connected(1, 2)
+
+    apply_contact_event(event(1, 2, Status.REMOVED, Status.ACCEPTED))
+    assert not social_graph.connected(1, 2)